@@ -0,0 +1,76 @@
+"""
+Compare fixed size serial reads with `serialReader` on a pseudo terminal, POSIX only.
+
+A writer thread sends 30 bytes frames stamped with their send time at 500 and 2000 frames per second,
+the receive loop reads them either 30 bytes at a time or with `serialReader`, spending `WORK`
+seconds per read as parsing would. Reads per second, received frames and frame latency are reported,
+a reader falling behind accumulates a backlog and its latency grows.
+"""
+
+import os
+import struct
+import threading
+import time
+
+from serial import Serial
+
+from eConEXG.utils.serialio import serialReader
+
+FRAME = 30
+DURATION = 5
+WORK = 0.001
+
+
+def writer(fd: int, fs: int, stop: threading.Event):
+    start = time.perf_counter()
+    count = 0
+    while not stop.is_set():
+        due = start + count / fs
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        stamp = struct.pack("<Q", time.perf_counter_ns())
+        os.write(fd, stamp + bytes(FRAME - len(stamp)))
+        count += 1
+
+
+def run(fs: int, adaptive: bool):
+    master, slave = os.openpty()
+    dev = Serial(os.ttyname(slave), timeout=1)
+    reader = serialReader(dev, FRAME) if adaptive else None
+    stop = threading.Event()
+    thread = threading.Thread(target=writer, args=(master, fs, stop), daemon=True)
+    thread.start()
+    calls, latency, buffer = 0, [], bytearray()
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        data = reader.read() if adaptive else dev.read(FRAME)
+        now = time.perf_counter_ns()
+        calls += 1
+        buffer.extend(data)
+        while len(buffer) >= FRAME:
+            (sent,) = struct.unpack_from("<Q", buffer)
+            latency.append((now - sent) / 1e6)
+            del buffer[:FRAME]
+        time.sleep(WORK)  # parsing and sinks
+    stop.set()
+    while thread.is_alive():  # unblock the writer
+        dev.reset_input_buffer()
+        thread.join(0.01)
+    dev.close()
+    os.close(master)
+    latency.sort()
+    elapsed = time.perf_counter() - start
+    name = "serialReader" if adaptive else f"read({FRAME})"
+    print(
+        f"{fs:>6} Hz {name:<14}{calls / elapsed:>10.0f} reads/s"
+        f"{len(latency) / elapsed:>10.0f} frames/s"
+        f"{latency[len(latency) // 2]:>10.2f} ms p50"
+        f"{latency[int(len(latency) * 0.99)]:>10.2f} ms p99"
+    )
+
+
+if __name__ == "__main__":
+    for fs in (500, 2000):
+        run(fs, adaptive=False)
+        run(fs, adaptive=True)
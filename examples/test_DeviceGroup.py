@@ -0,0 +1,35 @@
+import time
+
+from eConEXG import DeviceGroup, iFocus, iRecorder
+
+group = DeviceGroup(fs=1000, block_size=50)
+
+# iRecorder is connected by address, iFocus connects on construction
+dev = iRecorder(dev_type="USB32")
+dev.set_frequency(1000)
+group.add_device(dev, addr=dev.find_devs(duration=1)[0], name="iRecorder")
+group.add_device(lambda: iFocus(), name="iFocus")
+
+group.connect()
+print(group.get_dev_info())
+
+# optional sink invoked with every merged block
+group.add_sink(lambda data, timestamps: None)
+
+group.start_acquisition_data()
+count = 0
+start = time.time()
+try:
+    while time.time() - start < 10:
+        ret = group.get_data(timeout=0.02)
+        if ret is None:
+            continue
+        data, timestamps = ret
+        count += data.shape[0]
+except KeyboardInterrupt:
+    pass
+print(f"average fs:{count / (time.time() - start)}")
+print(group.get_metrics())
+
+group.close_dev()
+print(">>>test finished<<<")
@@ -1,5 +1,9 @@
-import re
-from datetime import datetime
+import numpy as np
+
+from ..utils.decoder import decode_int, gather_index
+from ..utils.framing import frameSync
+from ..utils.gaps import fill_gaps, gap_runs, lost_frames
+from ..utils.stats import linkStats
 
 
 class Parser:
@@ -18,78 +22,100 @@ class Parser:
     _length = _header + _eegs + _imus + 4
 
     def __init__(self) -> None:
-        self.__buffer = bytearray()
         self.eeg_idx = [i * self._byts + self._header for i in range(5)]
         self.imu_start = self._eegs + self._header
         self.imu_idx = [
             i + self.imu_start for i in range(0, self._imus, self._imu_bytes)
         ]
-        self.__pattern = re.compile(
-            b"\xbb\xaa.{%d}" % (self._length - 2), flags=re.DOTALL
-        )
+        self.__sync = frameSync(b"\xbb\xaa", self._length, self.__check)
         self.fallof = 1
         self.battery = 0
+        # (samples, channels, bytes) and (channels, bytes) index in a frame
+        exg = [[i, i + 5 * self._byts] for i in self.eeg_idx]
+        self.__exg_gather = gather_index(exg, self._byts)
+        self.__imu_gather = gather_index(self.imu_idx, self._imu_bytes)
+        self.scale = (np.array([self._ratio] * 2), np.array([self._imu_ratio] * 3))
+        self.raw = False
+        self.stats = linkStats("DFocus")
+        self.gap_fill = None
+        self.max_gap = 255
+        self.gaps = []
         self.clear_buffer()
 
     def clear_buffer(self):
-        del self.__buffer[:]
+        self.__sync.reset()
         self.__last = 255
+        self.__prev = None
         self.__drop = 0
 
+    def __check(self, frame: bytes) -> bool:
+        return (~sum(frame[self._header : self._checksum]) & 0xFF) == frame[
+            self._checksum
+        ]
+
     def parse_data(self, q: bytes) -> list[list[float]]:
-        self.__buffer.extend(q)
-        if len(self.__buffer) < self._length:
+        self.__sync.extend(q)
+        if len(self.__sync) < self._length:
             return
-        frames = []
-        for frame_obj in self.__pattern.finditer(self.__buffer):
-            frame = memoryview(frame_obj.group())
-            if (
-                frame[self._checksum]
-                != ~sum(frame[self._header : self._checksum]) & 0xFF
-            ):
-                err = f"|Frame Checksum invalid, packet dropped{datetime.now()}\n|Current:{frame.hex()}"
-                print(err)
-                continue
-            cur_num = frame[self._seq]
-            if cur_num != ((self.__last + 1) % 256):
-                self.__drop += 1
-                err = f">>>> EEG Pkt Los Cur:{cur_num} Last valid:{self.__last} buf len:{len(self.__buffer)} dropped: {self.__drop} times {datetime.now()}<<<<\n"
-                print(err)
-            self.__last = cur_num
+        packets = self.__sync.read()
+        self.stats.add_resync(self.__sync.skipped)
+        checksum = ~packets[:, self._header : self._checksum].sum(axis=1) & 0xFF
+        invalid = checksum != packets[:, self._checksum]
+        for packet in packets[invalid]:
+            self.stats.add_checksum_error()
+            err = f"Frame Checksum invalid, packet dropped: {packet.tobytes().hex()}"
+            self.stats.warn(err)
+        packets = packets[~invalid]
+        if len(packets) == 0:
+            return
+        seq = packets[:, self._seq].astype(int)
+        last = np.concatenate(([self.__last], seq[:-1]))
+        lost = lost_frames(seq, last)
+        for i in np.flatnonzero(lost):
+            self.__drop += 1
+            self.stats.add_gap(int(lost[i]))
+            err = f"EEG Pkt Los Cur:{seq[i]} Last valid:{last[i]} buf len:{len(self.__sync)} dropped: {self.__drop} times"
+            self.stats.warn(err)
+        self.stats.add_frames(len(packets))
+        self.__last = int(seq[-1])
+        self.fallof = int(packets[-1, self._fall_off])
+        self.battery = int(packets[-1, self._batt])
+        return self.__decode(packets, lost)
+
+    def __decode(self, packets: np.ndarray, lost: np.ndarray) -> list[list[float]]:
+        exg = decode_int(packets, self.__exg_gather, "big")
+        imu = decode_int(packets, self.__imu_gather, "little")
+        if self.gap_fill is not None:
+            exg, imu = self.__fill(exg, imu, lost)
+        if self.raw:
+            return exg.reshape(-1, exg.shape[-1]), imu
+        return self.to_frames(exg, imu)
+
+    def __fill(self, exg: np.ndarray, imu: np.ndarray, lost: np.ndarray):
+        lost = np.array(lost)
+        lost[lost > self.max_gap] = 0
+        if self.__prev is None:  # first frame of a stream
+            lost[0] = 0
+        spp = exg.shape[1]
+        exg = exg.reshape(-1, exg.shape[-1])
+        prev, self.__prev = self.__prev, (exg[-1], imu[-1])
+        self.gaps = gap_runs(lost, spp)
+        if not self.gaps:
+            return exg.reshape(-1, spp, exg.shape[-1]), imu
+        # integer counts can't hold nan
+        mode = "zero" if self.raw and self.gap_fill == "nan" else self.gap_fill
+        rows = np.zeros(len(exg), dtype=int)
+        rows[::spp] = lost * spp  # missing samples before the first sample of frames
+        exg = fill_gaps(exg, rows, mode, None if prev is None else prev[0])
+        imu = fill_gaps(imu, lost, mode, None if prev is None else prev[1])
+        return exg.reshape(-1, spp, exg.shape[-1]), imu
 
-            eeg = [
-                [
-                    int.from_bytes(
-                        frame[i : i + self._byts],
-                        signed=True,
-                        byteorder="big",
-                    )
-                    * self._ratio,
-                    int.from_bytes(
-                        frame[i + 15 : i + 15 + self._byts],
-                        signed=True,
-                        byteorder="big",
-                    )
-                    * self._ratio,
-                ]
-                for i in self.eeg_idx
-            ]
-            imu = [
-                int.from_bytes(
-                    frame[i : i + self._imu_bytes],
-                    signed=True,
-                    byteorder="little",
-                )
-                * self._imu_ratio
-                for i in self.imu_idx
-            ]
-            eeg.append(imu)
-            frames.append(eeg)
-            self.fallof = frame[self._fall_off]
-            self.battery = frame[self._batt]
-        if frames:
-            del self.__buffer[: frame_obj.end()]
-            return frames
+    def to_frames(self, exg: np.ndarray, imu: np.ndarray) -> list[list[float]]:
+        """Scale raw counts to frames returned in float mode."""
+        frames = (exg.reshape(len(imu), -1, exg.shape[-1]) * self.scale[0]).tolist()
+        for frame, row in zip(frames, (imu * self.scale[1]).tolist()):
+            frame.append(row)
+        return frames
 
 
 if __name__ == "__main__":
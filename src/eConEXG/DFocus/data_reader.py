@@ -2,15 +2,21 @@ import time
 import queue
 from queue import Queue
 from threading import Thread
-from typing import Optional
+from typing import Optional, Union
 from enum import Enum
 from .data_parser import Parser
 from .device_socket import sock
+from ..utils.discovery import discovery
+from ..utils.capture import replay_socket
+from ..utils.dispatch import dispatchMixin
+from ..utils.nested import nestedDispatcher
 import traceback
 from copy import deepcopy
 
+import numpy as np
 
-class DFocus(Thread):
+
+class DFocus(dispatchMixin, Thread):
     class Dev(Enum):
         SIGNAL = 10
         SIGNAL_START = 11
@@ -32,20 +38,23 @@ class DFocus(Thread):
     def __init__(self, port: Optional[str] = None) -> None:
         """
         Args:
-            port: if not given, connect to the first available device.
+            port: if not given, connect to the first available device,
+                `"replay:<filename>"` to replay a file recorded by `create_capture_file()`.
         """
         super().__init__(daemon=True)
         self.__status = DFocus.Dev.TERMINATE
         if port is None:
-            port = DFocus.find_devs()[0]
+            port = discovery.find_first("DFocus", timeout=0)["addr"]
         self.__save_data = Queue()
         self.__parser = Parser()
         self.dev_args = deepcopy(DFocus.dev_args)
-        self.dev = sock(port)
+        self._dispatch = nestedDispatcher(
+            "DFocus", self.__parser, lambda: self.dev.recv_socket()
+        )
+        self.dev = replay_socket(port) or sock(port)
         self.set_frequency()
         self.__with_q = True
         self.__socket_flag = "Device not connected, please connect first."
-        self.__bdf_flag = False
         try:
             self.dev.connect_socket()
         except Exception as e:
@@ -55,8 +64,6 @@ class DFocus(Thread):
                 raise e
         self.__status = DFocus.Dev.IDLE_START
         self.__socket_flag = None
-        self.__lsl_imu_flag = False
-        self.__lsl_exg_flag = False
         self.__enable_imu = False
         self.dev_args["name"] = port
         self.start()
@@ -113,9 +120,13 @@ class DFocus(Thread):
         """
         return sock._find_devs()
 
+    def _check_idle(self):
+        if self.__status == DFocus.Dev.SIGNAL:
+            raise Exception("Data acquisition already started, please stop first.")
+
     def get_data(
         self, timeout: Optional[float] = 0.02
-    ) -> Optional[list[Optional[list]]]:
+    ) -> Optional[Union[list[Optional[list]], tuple]]:
         """
         Acquire all available data, make sure this function is called in a loop when `with_q` is set to `True` in`start_acquisition_data()`
 
@@ -126,6 +137,8 @@ class DFocus(Thread):
             A list of frames, each frame is made up of 5 exg data and 1 imu data in a shape as below:
                 [[`CH0_0`], [`CH0_1`], [`CH0_2`], [`CH0_3`], [`CH0_4`], [`CH0_0`], [`CH1_1`], [`CH1_2`], [`CH1_3`], [`CH1_4`], [`imu_x`, `imu_y`, `imu_z`]],
                     in which number `0~4` after `_` indicates the time order of channel data.
+                In raw mode, a tuple of `int32` arrays `(exg, imu)` in shape `(samples, exg_channels)`
+                    and `(frames, imu_channels)`, see `set_raw_mode()`.
 
         Raises:
             Exception: if device not connected, connection failed, data transmission timeout/init failed, or unknown error.
@@ -141,6 +154,12 @@ class DFocus(Thread):
             data: list = self.__save_data.get(timeout=timeout)
         except queue.Empty:
             return []
+        if self.__parser.raw:
+            data = [data]
+            while not self.__save_data.empty():
+                data.append(self.__save_data.get())
+            exg, imu = zip(*data)
+            return np.concatenate(exg), np.concatenate(imu)
         while not self.__save_data.empty():
             data.extend(self.__save_data.get())
         return data
@@ -156,6 +175,7 @@ class DFocus(Thread):
         """
         self.__check_dev_status()
         self.__with_q = with_q
+        self._dispatch.queue = self.__save_data if with_q else None
         if self.__status == DFocus.Dev.SIGNAL:
             return
         self.__status = DFocus.Dev.SIGNAL_START
@@ -186,24 +206,30 @@ class DFocus(Thread):
             raise Exception("Data acquisition not started, please start first.")
         if hasattr(self, "_lsl_exg"):
             raise Exception("LSL stream already opened.")
-        from ..utils.lslWrapper import lslSender
+        from ..utils.lslWrapper import lslMarkerSender, lslSender
 
+        name = f"{self.dev_args['type']}EXG{self.dev_args['name'][-2:]}"
         self._lsl_exg = lslSender(
             self.dev_args["channel_exg"],
-            f"{self.dev_args['type']}EXG{self.dev_args['name'][-2:]}",
+            name,
             "EXG",
             self.dev_args["fs_exg"],
             with_trigger=False,
+            **self._dispatch.lsl_format(0),
         )
-        self.__lsl_exg_flag = True
+        self._lsl_marker = lslMarkerSender(name)
+        self._dispatch.lsl = self._lsl_exg
+        self._dispatch.lsl_marker = self._lsl_marker
 
     def close_lsl_exg(self):
         """
         Close LSL EXG stream manually, invoked automatically after `stop_acquisition()` and `close_dev()`
         """
-        self.__lsl_exg_flag = False
+        self._dispatch.lsl = self._dispatch.lsl_marker = None
         if hasattr(self, "_lsl_exg"):
             del self._lsl_exg
+        if hasattr(self, "_lsl_marker"):
+            del self._lsl_marker
 
     def open_lsl_imu(self):
         """
@@ -227,14 +253,15 @@ class DFocus(Thread):
             self.dev_args["fs_imu"],
             unit="degree",
             with_trigger=False,
+            **self._dispatch.lsl_format(1),
         )
-        self.__lsl_imu_flag = True
+        self._dispatch.lsl_imu = self._lsl_imu
 
     def close_lsl_imu(self):
         """
         Close LSL IMU stream manually, invoked automatically after `stop_acquisition()` and `close_dev()`
         """
-        self.__lsl_imu_flag = False
+        self._dispatch.lsl_imu = None
         if hasattr(self, "_lsl_imu"):
             del self._lsl_imu
 
@@ -277,13 +304,13 @@ class DFocus(Thread):
                 self.dev_args["fs_exg"],
                 self.dev_args["type"],
             )
-        self.__bdf_flag = True
+        self._dispatch.bdf = self._bdf_file
 
     def close_bdf_file(self):
         """
         Close and save BDF file manually, invoked automatically after `stop_acquisition()` or `close_dev()`
         """
-        self.__bdf_flag = False
+        self._dispatch.bdf = None
         if hasattr(self, "_bdf_file"):
             self._bdf_file.close_bdf()
             del self._bdf_file
@@ -311,36 +338,29 @@ class DFocus(Thread):
             self.join()
 
     def __recv_data(self):
+        self._dispatch.start(
+            self.dev_args["fs_exg"],
+            len(self.dev_args["channel_exg"]),
+            self.__stream_info(),
+        )
         try:
             self.dev.start_data()
             self.__status = DFocus.Dev.SIGNAL
+            self._dispatch.reader.start()
         except Exception:
             self.__socket_flag = "SIGNAL mode initialization failed."
             self.__status = DFocus.Dev.TERMINATE_START
 
         while self.__status in [DFocus.Dev.SIGNAL]:
             try:
-                data = self.dev.recv_socket()
-                if not data:
-                    raise Exception("Data transmission timeout.")
-                ret = self.__parser.parse_data(data)
-                if ret:
-                    if self.__with_q:
-                        self.__save_data.put(ret)
-                    if self.__bdf_flag:
-                        self._bdf_file.write_chunk(ret)
-                    if self.__lsl_exg_flag:
-                        self._lsl_exg.push_chunk(
-                            [frame for frames in ret for frame in frames[:-1]]
-                        )
-                    if self.__lsl_imu_flag:
-                        self._lsl_imu.push_chunk([frame[-1] for frame in ret])
+                self._dispatch.step()
             except Exception as e:
                 print(e)
                 self.__socket_flag = "Data transmission timeout."
                 self.__status = DFocus.Dev.TERMINATE_START
 
         # clear buffer
+        self._dispatch.reader.stop()
         self.close_lsl_exg()
         self.close_lsl_imu()
         self.close_bdf_file()
@@ -358,6 +378,11 @@ class DFocus(Thread):
                     self.__socket_flag = "Connection lost."
                 self.__status = DFocus.Dev.TERMINATE_START
 
+    def __stream_info(self) -> dict:
+        info = self.get_dev_info()
+        info["scale"] = self.get_scale() if self._dispatch.raw else None
+        return info
+
     def run(self):
         while self.__status != DFocus.Dev.TERMINATE_START:
             if self.__status == DFocus.Dev.SIGNAL_START:
@@ -369,6 +394,7 @@ class DFocus(Thread):
             else:
                 self.__socket_flag = f"Unknown status: {self.__status.name}"
                 break
+        self._dispatch.close()
         try:
             self.dev.close_socket()
         finally:
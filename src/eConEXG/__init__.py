@@ -2,16 +2,93 @@ __all__ = [
     "triggerBoxWired",
     "triggerBoxWireless",
     "lightStimulator",
+    "markerScheduler",
     "iRecorder",
     "iFocus",
     "DFocus",
     "eConAlpha",
     "iSense",
+    "DeviceGroup",
+    "dspPipeline",
+    "spectralEngine",
+    "statsExporter",
+    "profiling",
+    "streamServer",
+    "processDevice",
+    "blockSubscriber",
+    "epochExtractor",
 ]
+import sys
+from importlib import import_module
+from types import ModuleType
+from typing import TYPE_CHECKING
+
 from .version import __version__  # noqa: F401
-from .triggerBox import triggerBoxWired, triggerBoxWireless, lightStimulator
-from .iRecorder import iRecorder
-from .iFocus import iFocus
-from .DFocus import DFocus
-from .eConAlpha import eConAlpha
-from .iSense import iSense
+
+# device classes are imported on first access (PEP 562), so that e.g. trigger box users
+# don't pay for numpy, pyusb or ctypes libraries loaded by other devices.
+_lazy = {
+    "triggerBoxWired": ".triggerBox",
+    "triggerBoxWireless": ".triggerBox",
+    "lightStimulator": ".triggerBox",
+    "markerScheduler": ".triggerBox",
+    "iRecorder": ".iRecorder",
+    "iFocus": ".iFocus",
+    "DFocus": ".DFocus",
+    "eConAlpha": ".eConAlpha",
+    "iSense": ".iSense",
+    "DeviceGroup": ".utils.deviceGroup",
+    "dspPipeline": ".utils.dsp",
+    "spectralEngine": ".utils.spectrum",
+    "statsExporter": ".utils.stats",
+    "profiling": ".utils.profiler",
+    "streamServer": ".utils.streaming",
+    "processDevice": ".utils.worker",
+    "blockSubscriber": ".utils.subscriber",
+    "epochExtractor": ".utils.epochs",
+}
+
+if TYPE_CHECKING:
+    from .DFocus import DFocus
+    from .eConAlpha import eConAlpha
+    from .iFocus import iFocus
+    from .iRecorder import iRecorder
+    from .iSense import iSense
+    from .triggerBox import (
+        lightStimulator,
+        markerScheduler,
+        triggerBoxWired,
+        triggerBoxWireless,
+    )
+    from .utils.deviceGroup import DeviceGroup
+    from .utils.dsp import dspPipeline
+    from .utils.epochs import epochExtractor
+    from .utils.profiler import profiling
+    from .utils.spectrum import spectralEngine
+    from .utils.stats import statsExporter
+    from .utils.streaming import streamServer
+    from .utils.subscriber import blockSubscriber
+    from .utils.worker import processDevice
+
+
+def __getattr__(name: str):
+    if name not in _lazy:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_lazy[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+class _package(ModuleType):
+    def __setattr__(self, name, value):
+        # importing a device subpackage binds it to this package, keep the device class
+        if name in _lazy and isinstance(value, ModuleType):
+            value = getattr(value, name, value)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _package
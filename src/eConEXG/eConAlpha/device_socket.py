@@ -21,9 +21,12 @@ class sock:
     def __init__(self, port, data_len) -> None:
         from serial import Serial
 
+        from ..utils.serialio import serialReader
+
         self.delay = 0.1
-        self.dev = Serial(port=port, timeout=3)
+        self.dev = Serial(port=port, timeout=3, exclusive=True)
         self.data_len = data_len
+        self.reader = serialReader(self.dev, data_len)
 
     def set_frequency(self, fs):
         time.sleep(self.delay)
@@ -34,19 +37,10 @@ class sock:
 
     @staticmethod
     def find_devs() -> list:
-        from serial.tools.list_ports import comports
-        from serial import Serial, serialutil
+        from ..utils.discovery import registry
 
-        ret = []
-        devices = comports()
-        for device in devices:
-            if (device.vid == 0x2FE3) and (device.pid == 0x0001):
-                try:
-                    dev = Serial(port=device.device, timeout=1)
-                except serialutil.SerialException:
-                    continue
-                dev.close()
-                ret.append(device.device)
+        devices = registry.devices("eConAlpha")
+        ret = [device["device"] for device in devices if device["available"]]
         if len(ret) == 0:
             raise Exception("eConAlpha device not found")
         return ret
@@ -68,7 +62,7 @@ class sock:
     def recv_socket(self, buffer_size: Optional[int] = None):
         if buffer_size is None:
             buffer_size = self.data_len
-        return self.dev.read(buffer_size)
+        return self.reader.read(buffer_size)
 
     def shock_band(self):
         self.dev.write(self.cmd["V"])
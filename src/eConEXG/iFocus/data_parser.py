@@ -1,5 +1,9 @@
-import re
-from datetime import datetime
+import numpy as np
+
+from ..utils.decoder import decode_int, gather_index
+from ..utils.framing import frameSync
+from ..utils.gaps import fill_gaps, gap_runs, lost_frames
+from ..utils.stats import linkStats
 
 
 class Parser:
@@ -13,7 +17,6 @@ class Parser:
     _imus = 3 * _imu_bytes
 
     def __init__(self) -> None:
-        self.__buffer = bytearray()
         self.eeg_idx = [i + self._header for i in range(0, self._eegs, self._byts)]
         self.eeg_fall = self._header + self._eegs
         self.eeg_checksum = self.eeg_fall + 1
@@ -25,78 +28,110 @@ class Parser:
         self.imu_checksum = self.imu_start + self._imus
         self.imu_seq = self.imu_checksum + 1
         self._threshold = self.imu_seq + 1
-        self.__pattern = re.compile(
-            b"\xbb\xaa.{%d}\xdd\xcc.{8}" % (self._eegs + 3), flags=re.DOTALL
-        )
-
+        self.__sync = frameSync(b"\xbb\xaa", self._threshold, self.__check)
+        # (samples, channels, bytes) and (channels, bytes) index in a frame
+        self.__exg_gather = gather_index(np.array(self.eeg_idx)[:, None], self._byts)
+        self.__imu_gather = gather_index(self.imu_idx, self._imu_bytes)
+        self.scale = (np.array([self._ratio]), np.array([self._imu_ratio] * 3))
+        self.raw = False
+        self.stats = linkStats("iFocus")
+        self.gap_fill = None
+        self.max_gap = 255
+        self.gaps = []
         self.clear_buffer()
 
     def clear_buffer(self):
-        del self.__buffer[:]
+        self.__sync.reset()
         self.eeg_last = 255
+        self.__prev = None
         self.imu_last = 255
         self.__drop_eeg = 0
         self.__drop_imu = 0
 
+    def __check(self, frame: bytes) -> bool:
+        return (
+            frame[self.eeg_seq + 1 : self.imu_start] == b"\xdd\xcc"
+            and sum(frame[self._header : self.eeg_checksum]) & 0xFF
+            == frame[self.eeg_checksum]
+            and sum(frame[self.imu_start : self.imu_checksum]) & 0xFF
+            == frame[self.imu_checksum]
+        )
+
     def parse_data(self, q: bytes) -> list[list[float]]:
-        self.__buffer.extend(q)
-        if len(self.__buffer) < self._threshold:
+        self.__sync.extend(q)
+        if len(self.__sync) < self._threshold:
+            return
+        packets = self.__sync.read()
+        self.stats.add_resync(self.__sync.skipped)
+        eeg_sum = packets[:, self._header : self.eeg_checksum].sum(axis=1) & 0xFF
+        imu_sum = packets[:, self.imu_start : self.imu_checksum].sum(axis=1) & 0xFF
+        marker = packets[:, self.eeg_seq + 1 : self.imu_start] == (0xDD, 0xCC)
+        invalid_eeg = eeg_sum != packets[:, self.eeg_checksum]
+        invalid_imu = (imu_sum != packets[:, self.imu_checksum]) | ~marker.all(axis=1)
+        invalid = invalid_eeg | invalid_imu
+        for i in np.flatnonzero(invalid):
+            self.stats.add_checksum_error()
+            kind = "EEG" if invalid_eeg[i] else "IMU"
+            err = (
+                f"{kind} Checksum invalid, packet dropped: {packets[i].tobytes().hex()}"
+            )
+            self.stats.warn(err)
+        packets = packets[~invalid]
+        if len(packets) == 0:
             return
-        frames = []
-        for frame_obj in self.__pattern.finditer(self.__buffer):
-            frame = memoryview(frame_obj.group())
-            if (
-                frame[self.eeg_checksum]
-                != sum(frame[self._header : self.eeg_checksum]) & 0xFF
-            ):
-                err = f"|EEG Checksum invalid, packet dropped{datetime.now()}\n|Current:{frame.hex()}"
-                print(err)
-                continue
-            if (
-                frame[self.imu_checksum]
-                != sum(frame[self.imu_start : self.imu_checksum]) & 0xFF
-            ):
-                err = f"|IMU Checksum invalid, packet dropped{datetime.now()}\n|Current:{frame.hex()}"
-                print(err)
-                continue
-            cur_num = frame[self.eeg_seq]
-            if cur_num != ((self.eeg_last + 1) % 256):
-                self.__drop_eeg += 1
-                err = f">>>> EEG Pkt Los Cur:{cur_num} Last valid:{self.eeg_last} buf len:{len(self.__buffer)} dropped: {self.__drop_eeg} times {datetime.now()}<<<<\n"
-                print(err)
-            self.eeg_last = cur_num
-            cur_num = frame[self.imu_seq]
-            if cur_num != ((self.imu_last + 1) % 256):
-                self.__drop_imu += 1
-                err = f">>>> IMU Pkt Los Cur:{cur_num} Last valid:{self.imu_last} buf len:{len(self.__buffer)} dropped: {self.__drop_imu} times {datetime.now()}<<<<\n"
-                print(err)
-            self.imu_last = cur_num
+        seq = packets[:, self.eeg_seq].astype(int)
+        last = np.concatenate(([self.eeg_last], seq[:-1]))
+        lost = lost_frames(seq, last)
+        for i in np.flatnonzero(lost):
+            self.__drop_eeg += 1
+            self.stats.add_gap(int(lost[i]))
+            err = f"EEG Pkt Los Cur:{seq[i]} Last valid:{last[i]} buf len:{len(self.__sync)} dropped: {self.__drop_eeg} times"
+            self.stats.warn(err)
+        self.eeg_last = int(seq[-1])
+        seq = packets[:, self.imu_seq].astype(int)
+        last = np.concatenate(([self.imu_last], seq[:-1]))
+        for i in np.flatnonzero(lost_frames(seq, last)):
+            self.__drop_imu += 1
+            err = f"IMU Pkt Los Cur:{seq[i]} Last valid:{last[i]} buf len:{len(self.__sync)} dropped: {self.__drop_imu} times"
+            self.stats.warn(err)
+        self.imu_last = int(seq[-1])
+        self.stats.add_frames(len(packets))
+        return self.__decode(packets, lost)
+
+    def __decode(self, packets: np.ndarray, lost: np.ndarray) -> list[list[float]]:
+        exg = decode_int(packets, self.__exg_gather, "little")
+        imu = decode_int(packets, self.__imu_gather, "little")
+        if self.gap_fill is not None:
+            exg, imu = self.__fill(exg, imu, lost)
+        if self.raw:
+            return exg.reshape(-1, exg.shape[-1]), imu
+        return self.to_frames(exg, imu)
+
+    def __fill(self, exg: np.ndarray, imu: np.ndarray, lost: np.ndarray):
+        lost = np.array(lost)
+        lost[lost > self.max_gap] = 0
+        if self.__prev is None:  # first frame of a stream
+            lost[0] = 0
+        spp = exg.shape[1]
+        exg = exg.reshape(-1, exg.shape[-1])
+        prev, self.__prev = self.__prev, (exg[-1], imu[-1])
+        self.gaps = gap_runs(lost, spp)
+        if not self.gaps:
+            return exg.reshape(-1, spp, exg.shape[-1]), imu
+        # integer counts can't hold nan
+        mode = "zero" if self.raw and self.gap_fill == "nan" else self.gap_fill
+        rows = np.zeros(len(exg), dtype=int)
+        rows[::spp] = lost * spp  # missing samples before the first sample of frames
+        exg = fill_gaps(exg, rows, mode, None if prev is None else prev[0])
+        imu = fill_gaps(imu, lost, mode, None if prev is None else prev[1])
+        return exg.reshape(-1, spp, exg.shape[-1]), imu
 
-            eeg = [
-                [
-                    int.from_bytes(
-                        frame[i : i + self._byts],
-                        signed=True,
-                        byteorder="little",
-                    )
-                    * self._ratio
-                ]
-                for i in self.eeg_idx
-            ]
-            imu = [
-                int.from_bytes(
-                    frame[i : i + self._imu_bytes],
-                    signed=True,
-                    byteorder="little",
-                )
-                * self._imu_ratio
-                for i in self.imu_idx
-            ]
-            eeg.append(imu)
-            frames.append(eeg)
-        if frames:
-            del self.__buffer[: frame_obj.end()]
-            return frames
+    def to_frames(self, exg: np.ndarray, imu: np.ndarray) -> list[list[float]]:
+        """Scale raw counts to frames returned in float mode."""
+        frames = (exg.reshape(len(imu), -1, exg.shape[-1]) * self.scale[0]).tolist()
+        for frame, row in zip(frames, (imu * self.scale[1]).tolist()):
+            frame.append(row)
+        return frames
 
 
 if __name__ == "__main__":
@@ -10,8 +10,11 @@ class sock:
     def __init__(self, port) -> None:
         from serial import Serial
 
+        from ..utils.serialio import serialReader
+
         self.delay = 0.1
-        self.dev = Serial(port=port, baudrate=921600, timeout=3)
+        self.dev = Serial(port=port, baudrate=921600, timeout=3, exclusive=True)
+        self.reader = serialReader(self.dev, 30)
 
     def set_frequency(self, fs):
         self.dev.flush()
@@ -26,22 +29,10 @@ class sock:
 
     @staticmethod
     def _find_devs() -> list:
-        from serial.tools.list_ports import comports
-        from serial import Serial, serialutil
+        from ..utils.discovery import registry
 
-        ret = []
-        devices = comports()
-        for device in devices:
-            if (
-                "FTDI" in device.manufacturer
-                and "ifocus" in device.serial_number.lower()
-            ) or (device.vid == 0x2FE3 and device.pid == 0x0001):
-                try:
-                    dev = Serial(port=device.device, baudrate=921600, timeout=1)
-                except serialutil.SerialException:
-                    continue
-                dev.close()
-                ret.append(device.device)
+        devices = registry.devices("iFocus")
+        ret = [device["device"] for device in devices if device["available"]]
         if len(ret) == 0:
             raise Exception("iFocus device not found")
         return ret
@@ -57,7 +48,7 @@ class sock:
         raise Exception("connection failed, no data available.")
 
     def recv_socket(self, buffer_size: int = 30):
-        return self.dev.read(buffer_size)
+        return self.reader.read(buffer_size)
 
     def start_data(self):
         self.dev.read_all()
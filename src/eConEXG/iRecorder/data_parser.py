@@ -1,9 +1,12 @@
-import re
-from datetime import datetime
 from typing import Optional
 
 import numpy as np
 
+from ..utils.decoder import decode_int, gather_index
+from ..utils.framing import frameSync
+from ..utils.gaps import fill_gaps, gap_runs, lost_frames
+from ..utils.stats import linkStats
+
 
 class Parser:
     _byts = 3
@@ -18,9 +21,14 @@ class Parser:
         self.chs = chs
         self.batt_val = 0
         self.imp_flag = False
+        self.raw = False
+        self.stats = linkStats("iRecorder")
+        self.gap_fill: Optional[str] = None
+        self.max_gap = 255
+        self.gaps: list[tuple[int, int]] = []
         self._ratio = 0.02235174
-        length = self.chs * self._byts + abs(self._checksum)
-        self.__pattern = re.compile(b"\xbb\xaa.{%d}" % length, flags=re.DOTALL)
+        length = self._start + self.chs * self._byts + abs(self._checksum)
+        self.__sync = frameSync(b"\xbb\xaa", length, self.__check)
 
     def _update_fs(self, fs):
         self._imp_len = int(512 * 2 * fs / 500)
@@ -31,8 +39,9 @@ class Parser:
         self.clear_buffer()
 
     def clear_buffer(self):
-        self.__buffer = bytearray()
+        self.__sync.reset()
         self.__last_num = 255
+        self.__prev = None
         self._drop_count = 0
         self.__impe_queue = np.zeros((self._imp_len, self.chs))
         self.__imp_idx = 0
@@ -40,6 +49,10 @@ class Parser:
 
     def _update_chs(self, chs: list[int]):
         self.ch_idx = chs[:]
+        # byte offsets of wanted channels in a frame
+        offset = self._start + self._byts * np.array(self.ch_idx, dtype=int)
+        self.__gather = gather_index(offset, self._byts)
+        self.scale = np.array([self._ratio] * len(self.ch_idx) + [1.0])
         self.impedance = None
 
     def _cal_imp(self, frames):
@@ -60,40 +73,64 @@ class Parser:
         impe_data = np.where(iserror <= 0.2, np.inf, impe_data).tolist()
         self.impedance = impe_data
 
+    def __check(self, frame: bytes) -> bool:
+        return (~sum(frame[self._start : self._checksum]) & 0xFF) == frame[
+            self._checksum
+        ]
+
     def parse_data(self, q: bytes) -> Optional[list[list[float]]]:
-        self.__buffer.extend(q)
-        if len(self.__buffer) < self._threshold:
+        self.__sync.extend(q)
+        if len(self.__sync) < self._threshold:
             return
-        frames = []
-        for frame_obj in self.__pattern.finditer(self.__buffer):
-            frame = memoryview(frame_obj.group())
-            raw = frame[self._start : self._checksum]
-            if frame[self._checksum] != (~sum(raw)) & 0xFF:
-                self._drop_count += 1
-                err = f"|Checksum invalid, packet dropped{datetime.now()}\n|Current:{frame.hex()}"
-                print(err)
-                continue
-            cur_num = frame[self._seq]
-            if cur_num != ((self.__last_num + 1) % 256):
-                self._drop_count += 1
-                err = f">>>> Pkt Los Cur:{cur_num} Last valid:{self.__last_num} buf len:{len(self.__buffer)} dropped times:{self._drop_count} {datetime.now()}<<<<\n"
-                print(err)
-            self.__last_num = cur_num
-            data = [
-                int.from_bytes(
-                    raw[i * self._byts : (i + 1) * self._byts],
-                    signed=True,
-                    byteorder="big",
-                )
-                * self._ratio
-                for i in self.ch_idx
-            ]
-            data.append(frame[self._trigger])
-            frames.append(data)
-        if frames:
-            del self.__buffer[: frame_obj.end()]
-            self.batt_val = frame[self._battery]
-            if self.imp_flag:
-                self._cal_imp(frames)
-                return
-            return frames
+        packets = self.__sync.read()
+        self.stats.add_resync(self.__sync.skipped)
+        if len(packets) == 0:
+            return
+        # checksums are verified on full frames
+        checksum = ~packets[:, self._start : self._checksum].sum(axis=1) & 0xFF
+        invalid = checksum != packets[:, self._checksum]
+        for packet in packets[invalid]:
+            self._drop_count += 1
+            self.stats.add_checksum_error()
+            err = f"Checksum invalid, packet dropped: {packet.tobytes().hex()}"
+            self.stats.warn(err)
+        packets = packets[~invalid]
+        if len(packets) == 0:
+            return
+        seq = packets[:, self._seq].astype(int)
+        last = np.concatenate(([self.__last_num], seq[:-1]))
+        lost = lost_frames(seq, last)
+        for i in np.flatnonzero(lost):
+            self._drop_count += 1
+            self.stats.add_gap(int(lost[i]))
+            err = f"Pkt Los Cur:{seq[i]} Last valid:{last[i]} buf len:{len(self.__sync)} dropped times:{self._drop_count}"
+            self.stats.warn(err)
+        self.stats.add_frames(len(packets))
+        self.__last_num = int(seq[-1])
+        self.batt_val = int(packets[-1, self._battery])
+        # decode wanted channels only
+        data = decode_int(packets, self.__gather)
+        trigger = packets[:, self._trigger]
+        if self.gap_fill is not None and not self.imp_flag:
+            data, trigger = self.__fill(data, trigger, lost)
+        if self.raw and not self.imp_flag:
+            return np.column_stack((data, trigger))
+        frames = (data * self._ratio).tolist()
+        for frame, trigger in zip(frames, trigger.tolist()):
+            frame.append(trigger)
+        if self.imp_flag:
+            self._cal_imp(frames)
+            return
+        return frames
+
+    def __fill(self, data: np.ndarray, trigger: np.ndarray, lost: np.ndarray):
+        lost = np.where(lost <= self.max_gap, lost, 0)
+        if self.__prev is None:  # first frame of a stream
+            lost[0] = 0
+        prev, self.__prev = self.__prev, data[-1]
+        self.gaps = gap_runs(lost)
+        if not self.gaps:
+            return data, trigger
+        # integer counts can't hold nan
+        mode = "zero" if self.raw and self.gap_fill == "nan" else self.gap_fill
+        return fill_gaps(data, lost, mode, prev), fill_gaps(trigger, lost, "zero")
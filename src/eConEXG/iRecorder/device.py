@@ -8,13 +8,15 @@ from copy import deepcopy
 from enum import Enum
 from queue import Queue
 from threading import Thread
-from typing import Optional, Callable
+from typing import Callable, Optional, Union
 
+from ..utils.capture import replay_socket
+from ..utils.dispatch import epochMixin, frameDispatcher
 from .data_parser import Parser
 from .physical_interface import get_interface, get_sock
 
 
-class iRecorder(Thread):
+class iRecorder(epochMixin, Thread):
     class Dev(Enum):
         SIGNAL = 10  # signal transmission mode
         SIGNAL_START = 11
@@ -41,14 +43,16 @@ class iRecorder(Thread):
         self.__with_q = True
         self.__error_message = "Device not connected, please connect first."
         self.__save_data = Queue()
-        self.__update_func = None
         self.__status = iRecorder.Dev.TERMINATE
-        self.__lsl_flag = False
-        self.__bdf_flag = False
         self.__dev_args = {"type": dev_type}
         self.__dev_args.update({"channel": self.__get_chs()})
 
         self.__parser = Parser(self.__dev_args["channel"])
+        self._dispatch = frameDispatcher(
+            "iRecorder", self.__parser, lambda: self.dev.recv_socket(), 500
+        )
+        # reconnect attempts, first delay and max delay in seconds
+        self.__reconnect = (1 if dev_type == "W32" else 0, 0.0, 0.0)
         self.__interface = get_interface(dev_type, self.__info_q)
         self.__dev_sock = get_sock(dev_type)
         self.__dev_args.update({"AdapterInfo": self.__interface.interface})
@@ -59,13 +63,16 @@ class iRecorder(Thread):
         self.set_frequency()
         self.update_channels()
 
-    def find_devs(self, duration: Optional[int] = None) -> Optional[list]:
+    def find_devs(
+        self, duration: Optional[int] = None, first: bool = False
+    ) -> Optional[list]:
         """
         Search for available devices, can only be called once per instance.
 
         Args:
             duration: Search interval in seconds, blocks for about `duration` seconds and return found devices,
                 if set to `None`, return `None` immediately, devices can later be acquired by calling `get_devs()` in a loop.
+            first: if True, return as soon as any device is found instead of waiting for `duration` seconds.
 
         Returns:
             Available devices.
@@ -80,11 +87,14 @@ class iRecorder(Thread):
         self.__interface.start()
         if duration is None:
             return
+        ret = []
         start = time.time()
         while time.time() - start < duration:
-            time.sleep(0.5)
+            ret.extend(self.get_devs())
+            if first and ret:
+                break
         self.__finish_search()
-        return self.get_devs()
+        return ret
 
     def get_devs(self, verbose: bool = False) -> list:
         """
@@ -179,12 +189,73 @@ class iRecorder(Thread):
         if self.dev is not None:
             self.dev.set_fs(fs)
 
+    def set_wifi_options(
+        self,
+        rcvbuf: int = 1 << 20,
+        nodelay: bool = True,
+        quickack: bool = False,
+        latency: float = 0,
+    ) -> None:
+        """
+        Tune the TCP receive path of W32 devices, applied on the next `connect_device()`.
+
+        Received bytes are drained into a large buffer in one `recv_into()` call. With a positive
+            `latency`, on Linux and macOS the socket only wakes up once `latency` seconds of data are
+            buffered (`SO_RCVLOWAT`), so each call returns a block of frames instead of a single Wi-Fi
+            packet, at the cost of that much extra delay, e.g. `0.02`.
+
+        Args:
+            rcvbuf: kernel receive buffer size in bytes (`SO_RCVBUF`) absorbing Wi-Fi jitter, `0` for system default.
+            nodelay: disable Nagle algorithm (`TCP_NODELAY`) so that commands are sent at once.
+            quickack: acknowledge received data at once (`TCP_QUICKACK`), Linux only, costs one system call per read.
+            latency: seconds of data to buffer before a read returns, `0` to return as soon as any byte arrives, the default.
+
+        Raises:
+            ValueError: if device type is not W32 or arguments are invalid.
+        """
+        if self.__dev_args["type"] != "W32":
+            raise ValueError("Wi-Fi options only apply to W32 devices.")
+        if rcvbuf < 0 or latency < 0:
+            raise ValueError("rcvbuf and latency should not be negative.")
+        self.__dev_args["wifi"] = {
+            "rcvbuf": rcvbuf,
+            "nodelay": nodelay,
+            "quickack": quickack,
+            "latency": latency,
+        }
+
+    def set_reconnect(
+        self, retries: int = 5, backoff: float = 0.5, max_backoff: float = 8.0
+    ) -> None:
+        """
+        Reconnect automatically when the connection drops during data or impedance acquisition.
+
+        The receive thread reopens the transport with exponential backoff, waiting `backoff`, `2 * backoff`,
+            ... up to `max_backoff` seconds before each attempt, and sends the start command again.
+            BDF file and LSL stream are kept open. Samples missed during the outage are counted from
+            the host clock and inserted as in `set_gap_fill()`, `0` if gap fill is disabled, and reported
+            by `get_gaps()` and as a `gap` annotation in the BDF file, so timestamps and markers after
+            the outage stay aligned. Acquisition stops with an error once all attempts failed.
+            By default W32 devices retry once without delay, other devices don't retry.
+
+        Args:
+            retries: reconnect attempts per outage, `0` to disable.
+            backoff: delay before the first attempt in seconds.
+            max_backoff: maximum delay between attempts in seconds.
+
+        Raises:
+            ValueError: if arguments are invalid.
+        """
+        if retries < 0 or backoff < 0 or max_backoff < backoff:
+            raise ValueError("Invalid reconnect arguments.")
+        self.__reconnect = (int(retries), float(backoff), float(max_backoff))
+
     def connect_device(self, addr: str) -> None:
         """
         Connect to device by address, block until connection is established or failed.
 
         Args:
-            addr: device address.
+            addr: device address, `"replay:<filename>"` to replay a file recorded by `create_capture_file()`.
 
         Raises:
             Exception: if device already connected or connection establishment failed.
@@ -192,10 +263,13 @@ class iRecorder(Thread):
         if self.is_alive():
             raise Exception("iRecorder already connected")
         try:
-            ret = self.__interface.connect(addr)
-            self.__dev_args.update({"name": addr, "sock": ret})
-            self.__dev_args.update({"_length": self.__parser.packet_len})
-            self.dev = self.__dev_sock(self.__dev_args)
+            self.__dev_args.update({"name": addr})
+            self.dev = replay_socket(addr)
+            if self.dev is None:
+                ret = self.__interface.connect(addr)
+                self.__dev_args.update({"sock": ret})
+                self.__dev_args.update({"_length": self.__parser.packet_len})
+                self.dev = self.__dev_sock(self.__dev_args)
             self.__parser.batt_val = self.dev.send_heartbeat()
             self.__error_message = None
             self.__status = iRecorder.Dev.IDLE_START
@@ -241,6 +315,7 @@ class iRecorder(Thread):
         """
         self.__check_dev_status()
         self.__with_q = with_q
+        self._dispatch.queue = self.__save_data if with_q else None
         if self.__status == iRecorder.Dev.SIGNAL:
             return
         if self.__status == iRecorder.Dev.IMPEDANCE:
@@ -259,11 +334,11 @@ class iRecorder(Thread):
         Args:
             function: The target function
         """
-        self.__update_func = function
+        self._dispatch.update = function if callable(function) else None
 
     def get_data(
         self, timeout: Optional[float] = 0.02
-    ) -> Optional[list[Optional[list]]]:
+    ) -> Optional[Union[list[Optional[list]], np.ndarray]]:
         """
         Acquire all available data, make sure this function is called in a loop when `with_q` is set to `True` in`start_acquisition_data()`
 
@@ -273,6 +348,7 @@ class iRecorder(Thread):
         Returns:
             A list of frames, each frame is a list contains all wanted eeg channels and trigger box channel,
                 eeg channels can be updated by `update_channels()`.
+                An `int32` array of frames in raw mode, see `set_raw_mode()`.
 
         Data Unit:
             - eeg: micro volts (µV)
@@ -290,6 +366,11 @@ class iRecorder(Thread):
             data: list = self.__save_data.get(timeout=timeout)
         except queue.Empty:
             return []
+        if self.__parser.raw:
+            data = [data]
+            while not self.__save_data.empty():
+                data.append(self.__save_data.get())
+            return np.concatenate(data)
         while not self.__save_data.empty():
             data.extend(self.__save_data.get())
         return data
@@ -384,24 +465,30 @@ class iRecorder(Thread):
             raise Exception("Data acquisition not started, please start first.")
         if hasattr(self, "_lsl_stream"):
             raise Exception("LSL stream already opened.")
-        from ..utils.lslWrapper import lslSender
+        from ..utils.lslWrapper import lslMarkerSender, lslSender
 
+        name = f"iRe{self.__dev_args['type']}_{self.__dev_args['name'][-2:]}"
         self._lsl_stream = lslSender(
             self.__dev_args["ch_info"],
-            f"iRe{self.__dev_args['type']}_{self.__dev_args['name'][-2:]}",
+            name,
             "EEG",
-            self.__dev_args["fs"],
+            self.__dev_args["fs"] / self._dispatch.decimation("lsl"),
             with_trigger=True,
+            **self._dispatch.raw_format(self.__parser.scale[:-1]),
         )
-        self.__lsl_flag = True
+        self._lsl_marker = lslMarkerSender(name)
+        self._dispatch.lsl = self._lsl_stream
+        self._dispatch.lsl_marker = self._lsl_marker
 
     def close_lsl_stream(self):
         """
         Close LSL stream manually, invoked automatically after `stop_acquisition()` or `close_dev()`
         """
-        self.__lsl_flag = False
+        self._dispatch.lsl = self._dispatch.lsl_marker = None
         if hasattr(self, "_lsl_stream"):
             del self._lsl_stream
+        if hasattr(self, "_lsl_marker"):
+            del self._lsl_marker
 
     def create_bdf_file(self, filename: str):
         """
@@ -429,13 +516,13 @@ class iRecorder(Thread):
             self.__dev_args["fs"],
             f"iRecorder_{self.__dev_args['type']}_{self.__dev_args['name']}",
         )
-        self.__bdf_flag = True
+        self._dispatch.bdf = self._bdf_file
 
     def close_bdf_file(self):
         """
         Close and save BDF file manually, invoked automatically after `stop_acquisition()` or `close_dev()`
         """
-        self.__bdf_flag = False
+        self._dispatch.bdf = None
         if self._bdf_file is not None:
             self._bdf_file.close_bdf()
             self._bdf_file = None
@@ -459,6 +546,11 @@ class iRecorder(Thread):
     #     """
     #     self.handler = handler
 
+    def _check_idle(self):
+        if self.__status not in [iRecorder.Dev.IDLE, iRecorder.Dev.TERMINATE]:
+            warn = "Device acquisition in progress, please stop_acquisition() first."
+            raise Exception(warn)
+
     def __check_dev_status(self):
         if self.__error_message is None:
             return
@@ -477,6 +569,7 @@ class iRecorder(Thread):
             else:
                 self.__error_message = f"Unknown status: {self.__status}"
                 break
+        self._dispatch.close()
         try:
             self.dev.close_socket()
         except Exception:
@@ -489,7 +582,11 @@ class iRecorder(Thread):
 
     def __recv_data(self, imp_mode=True):
         self.__parser.imp_flag = imp_mode
-        retry = 0
+        self._dispatch.start(
+            self.__dev_args["fs"],
+            len(self.__dev_args["ch_info"]) + 1,
+            self.__stream_info(),
+        )
         try:
             if imp_mode:
                 self.dev.start_impe()
@@ -499,41 +596,22 @@ class iRecorder(Thread):
                 self.dev.start_data()
                 self.__status = iRecorder.Dev.SIGNAL
                 print("SIGNAL START")
+            self._dispatch.reader.start()
         except Exception:
             self.__error_message = "Data/Impedance mode initialization failed."
             self.__status = iRecorder.Dev.TERMINATE_START
         # recv data
         while self.__status in [iRecorder.Dev.SIGNAL, iRecorder.Dev.IMPEDANCE]:
             try:
-                data = self.dev.recv_socket()
-                if not data:
-                    raise Exception("Remote end closed.")
-                ret = self.__parser.parse_data(data)
-                if ret:
-                    if self.__with_q:
-                        self.__save_data.put(ret)
-                    elif isinstance(self.__update_func, Callable):
-                        ret_array = np.array(ret)
-                        if ret_array.size > 0:
-                            self.__update_func(ret_array)
-                    if self.__bdf_flag:
-                        self._bdf_file.write_chunk(ret)
-                    if self.__lsl_flag:
-                        self._lsl_stream.push_chunk(ret)
+                self._dispatch.step()
             except Exception:
                 traceback.print_exc()
-                if (self.__dev_args["type"] == "W32") and (retry < 1):
-                    try:
-                        print("Wi-Fi reconnecting...")
-                        self.dev.close_socket()
-                        self.dev = self.__dev_sock(self.__dev_args, retry_timeout=3)
-                        retry += 1
-                        continue
-                    except Exception:
-                        print("Wi-Fi reconnection failed")
+                if self.__resume(imp_mode):
+                    continue
                 self.__error_message = "Data transmission timeout."
                 self.__status = iRecorder.Dev.TERMINATE_START
         # postprocess
+        self._dispatch.reader.stop()
         self.close_bdf_file()
         self.close_lsl_stream()
         self.__parser.clear_buffer()
@@ -549,6 +627,53 @@ class iRecorder(Thread):
                     self.__error_message = "Device connection lost."
                 self.__status = iRecorder.Dev.TERMINATE_START
 
+    def __resume(self, imp_mode: bool) -> bool:
+        """Reopen the transport and restart acquisition, return whether it succeeded."""
+        retries, backoff, max_backoff = self.__reconnect
+        if "sock" not in self.__dev_args:  # replayed capture ended
+            return False
+        lost = time.perf_counter()
+        self._dispatch.reader.stop()
+        for attempt in range(retries):
+            if self.__status not in [iRecorder.Dev.SIGNAL, iRecorder.Dev.IMPEDANCE]:
+                return False
+            print(f"Reconnecting, attempt {attempt + 1}/{retries}...")
+            try:
+                self.dev.close_socket()
+            except Exception:
+                pass
+            time.sleep(min(backoff * 2**attempt, max_backoff))
+            try:
+                if self.__dev_args["type"] == "W32":
+                    self.dev = self.__dev_sock(self.__dev_args, retry_timeout=3)
+                else:
+                    self.dev = self.__dev_sock(self.__dev_args)
+                if imp_mode:
+                    self.dev.start_impe()
+                else:
+                    self.dev.start_data()
+            except Exception:
+                traceback.print_exc()
+                continue
+            # sequence numbers restart, missing samples are counted from host clock instead
+            drops = self.__parser._drop_count
+            self.__parser.clear_buffer()
+            self.__parser._drop_count = drops
+            self.__parser.stats.add_reconnect()
+            self._dispatch.outage = lost
+            self._dispatch.reader.start()
+            print(f"Reconnected after {time.perf_counter() - lost:.1f}s")
+            return True
+        print("Reconnection failed")
+        return False
+
+    def __stream_info(self) -> dict:
+        info = self.get_dev_info()
+        info.pop("sock", None)
+        info["fs"] = self.__dev_args["fs"] / self._dispatch.decimation("lsl")
+        info["scale"] = self.get_scale() if self._dispatch.raw else None
+        return info
+
     def __idle_state(self):
         timestamp = time.time()
         self.__status = iRecorder.Dev.IDLE
@@ -1,9 +1,10 @@
 import time
 from queue import Queue
 from threading import Thread
-from serial.tools.list_ports import comports
 from typing import Literal
 
+from ...utils.discovery import registry
+
 
 class com(Thread):
     def __init__(
@@ -20,28 +21,11 @@ class com(Thread):
         return "Serial Port"
 
     def __find_devices(self):
-        nearby_devices = comports()
-        for device in nearby_devices:
-            if not (device.pid == 0x5740 and device.vid == 0x0483):
-                continue
-            serial_number = device.serial_number.split("_")
-            if self.dev_type == "USB8":
-                if "ir1" != serial_number[0].lower():
-                    continue
-                display_name = f"iRe8-{serial_number[-1]}"
-            elif self.dev_type == "USB16":
-                if "ir2" != serial_number[0].lower():
-                    continue
-                display_name = f"iRe16-{serial_number[-1]}"
-            elif self.dev_type == "USB32":
-                if serial_number[0].lower() in ["ir1", "ir2"]:
-                    continue
-                display_name = f"iRe32-{serial_number[-1]}"
-            else:
-                return
+        for device in registry.devices(self.dev_type):
+            display_name = device["types"][self.dev_type]
             if display_name not in self.added_devices.keys():
-                self.added_devices[display_name] = device.device
-                self.device_queue.put([display_name, device.device, display_name])
+                self.added_devices[display_name] = device["device"]
+                self.device_queue.put([display_name, device["device"], display_name])
 
     def run(self):
         while self.__search_flag:
@@ -3,16 +3,33 @@ from typing import Optional
 
 
 class wifi_socket:
+    # receive defaults, iRecorder.set_wifi_options() overrides them per device in sock_args["wifi"]
+    _defaults = {"rcvbuf": 1 << 20, "nodelay": True, "quickack": False, "latency": 0}
+
     def __init__(self, sock_args, retry_timeout=5) -> None:
-        from socket import socket, AF_INET, SOCK_STREAM
+        import socket
 
         self.__sock_args = sock_args
+        self.options = {**wifi_socket._defaults, **sock_args.get("wifi", {})}
         self.length = sock_args["_length"] * 10
-        self.__socket = socket(AF_INET, SOCK_STREAM)
+        self.__socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # enlarge kernel buffer before connecting so the TCP window is scaled accordingly
+        if self.options["rcvbuf"]:
+            self.__socket.setsockopt(
+                socket.SOL_SOCKET, socket.SO_RCVBUF, self.options["rcvbuf"]
+            )
+        if self.options["nodelay"]:  # single byte commands are sent at once
+            self.__socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.__quickack = None
+        if self.options["quickack"] and hasattr(socket, "TCP_QUICKACK"):
+            self.__quickack = (socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
         self.__socket.settimeout(retry_timeout)
         self.__socket.connect(self.__sock_args["sock"])
         time.sleep(0.1)
         self.__socket.settimeout(5)
+        self.__buffer = bytearray(max(self.length, 1 << 18))
+        self.__view = memoryview(self.__buffer)
+        self.set_fs(sock_args.get("fs", 500))
 
     def close_socket(self):
         try:
@@ -21,18 +38,34 @@ class wifi_socket:
             self.__socket.close()
             self.__socket = None
 
+    def __set_lowat(self, nbytes: int):
+        import socket
+
+        # wake recv only once a block is buffered, not supported on Windows
+        try:
+            self.__socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVLOWAT, nbytes)
+        except (AttributeError, OSError):
+            pass
+
     def start_impe(self):
         self.__socket.send(b"Z")
+        self.__set_lowat(self.__lowat)
 
     def start_data(self):
         self.__socket.send(b"W")
+        self.__set_lowat(self.__lowat)
 
     def recv_socket(self, buffersize: Optional[int] = None):
-        if buffersize is None:
-            buffersize = self.length
-        return self.__socket.recv(buffersize)
+        if buffersize is not None:
+            return self.__socket.recv(buffersize)
+        # drain all buffered bytes in one call
+        n = self.__socket.recv_into(self.__view)
+        if self.__quickack is not None:  # reset by the kernel after each ack
+            self.__socket.setsockopt(*self.__quickack)
+        return bytes(self.__view[:n])
 
     def stop_recv(self):
+        self.__set_lowat(1)
         self.__socket.send(b"R")
 
     def send_heartbeat(self):
@@ -41,7 +74,8 @@ class wifi_socket:
         return bettery
 
     def set_fs(self, fs):
-        pass
+        frame = self.__sock_args["_length"]
+        self.__lowat = max(int(fs * frame * self.options["latency"]), 1)
 
 
 class bluetooth_socket:
@@ -108,12 +142,15 @@ class com_socket:
     def __init__(self, sock_args) -> None:
         from serial import Serial
 
+        from ...utils.serialio import serialReader
+
         self.command_wait = 0.05
         self.__sock_args = sock_args
         self.length = sock_args["_length"] * 10
         self.__socket = Serial(timeout=5)
         self.__socket.port = self.__sock_args["sock"]
         self.__socket.open()
+        self.__reader = serialReader(self.__socket, self.length)
         self.__socket.write(self.cmd[self.__sock_args["fs"]])
         time.sleep(self.command_wait)
         self.__socket.read_all()
@@ -138,9 +175,7 @@ class com_socket:
         self.__socket.read(ack)
 
     def recv_socket(self, buffersize: Optional[int] = None):
-        if buffersize is None:
-            buffersize = self.length
-        return self.__socket.read(buffersize)
+        return self.__reader.read(buffersize)
 
     def stop_recv(self):
         self.__socket.write(self.cmd["R"])
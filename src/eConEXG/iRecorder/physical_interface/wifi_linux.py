@@ -61,13 +61,17 @@ class wifiLinux(Thread):
     def run(self):
         added_devices = set()
         search_interval = 0
+        rescan = "no"  # report networks cached by NetworkManager immediately
         while self.__search_flag:
             dur = time.time()
             result = subprocess.run(
-                self.cmd_search + [self.__interface, "--rescan", "yes"],
+                self.cmd_search + [self.__interface, "--rescan", rescan],
                 capture_output=True,
                 text=True,
             )
+            if rescan == "no":
+                rescan = "yes"
+                search_interval = -0.5
             search_interval = min(search_interval + 0.5, 5)
             while time.time() - dur < search_interval:
                 if not self.__search_flag:
@@ -1,12 +1,12 @@
-import ctypes
 import math
-from pathlib import Path
-from platform import system
-import re
-from datetime import datetime
 from threading import Thread
 import numpy as np
 
+from ..utils.decoder import decode_int, gather_index
+from ..utils.framing import frameSync
+from ..utils.gaps import fill_gaps, gap_runs, lost_frames
+from ..utils.stats import linkStats
+
 
 class Parser:
     # signal format
@@ -18,22 +18,15 @@ class Parser:
     _ratio = 0.02235174
 
     def __init__(self, fs=2000, eeg_chs=128, emg_chs=8):
-        class Witharray(ctypes.Structure):
-            _fields_ = [("data", ctypes.c_double * 136)]
-
-        suff = (
-            "dll"
-            if system() == "Windows"
-            else ("dylib" if system() == "Darwin" else "so")
-        )
-        base = str(Path(__file__).parent.joinpath("transform." + suff))
-        self.__parser = ctypes.CDLL(base)
-        self.__parser.function.argtypes = [ctypes.c_char_p]
-        self.__parser.function.restype = Witharray
         self.eeg_chs = eeg_chs
         self.emg_chs = emg_chs
         self.fs = fs
         self.batt_val = 0
+        self.raw = False
+        self.stats = linkStats("iSense")
+        self.gap_fill = None
+        self.max_gap = 255
+        self.gaps = []
         # impedance params
         self.imp_len = int(512 * 2 * fs / 500)
         self.imp_factor = 1000 / 6 / (self.imp_len / 2) * math.pi / 4
@@ -42,11 +35,23 @@ class Parser:
         self.length = (
             int(self.vld_chs / 8 * 9) * self.ch_bytes + self._start - self._seq
         )
-        ptn = b"\xc6\x91\x19\x99\x27\x02\x19\x42.{%d}" % self.length
-        self.__pattern = re.compile(ptn, flags=re.DOTALL)
+        header = b"\xc6\x91\x19\x99\x27\x02\x19\x42"
+        self.__sync = frameSync(header, len(header) + self.length, self.__check)
         self.pkt_size = self._get_ch_index()
+        # every 9th 3-byte group is a status word, channel k is at group k + k // 8 + 1
+        group = np.arange(self.vld_chs) + np.arange(self.vld_chs) // 8 + 1
+        self.__offsets = self._start + group * self.ch_bytes
+        self._update_chs(list(range(self.vld_chs)))
         self.clear_buffer()
 
+    def _update_chs(self, chs: list[int]):
+        self.ch_idx = list(chs)
+        self.__gather = gather_index(
+            self.__offsets[np.array(self.ch_idx, dtype=int)], self.ch_bytes
+        )
+        self.__gather_all = gather_index(self.__offsets, self.ch_bytes)
+        self.scale = np.array([self._ratio] * len(self.ch_idx) + [1.0])
+
     # get block size
     def _get_ch_index(self) -> int:
         """
@@ -58,8 +63,9 @@ class Parser:
         return max(int(length * self.fs * block_duration / 512) * 512, 512)
 
     def clear_buffer(self):
-        self.__buffer = bytearray()
+        self.__sync.reset()
         self._last = 255
+        self.__prev = None
         self.packet_drop_count = 0
         self.__impe_queue = np.zeros((self.imp_len, self.vld_chs), dtype=np.float32)
         self.imp_idx = 0
@@ -89,26 +95,58 @@ class Parser:
         if self.imp_flag:
             self.impedance = impe_data
 
+    def __check(self, frame: bytes) -> bool:
+        # sequence number is sent twice
+        return frame[self._seq] == frame[self._seq + 1]
+
     def parse_data(self, q: bytes) -> list[list[int]]:
-        self.__buffer.extend(q)
-        if len(self.__buffer) < self.pkt_size:
+        self.__sync.extend(q)
+        if len(self.__sync) < self.pkt_size:
+            return
+        packets = self.__sync.read()
+        self.stats.add_resync(self.__sync.skipped)
+        if len(packets) == 0:
             return
-        frames = []
-        for frame_obj in self.__pattern.finditer(self.__buffer):
-            frame = frame_obj.group()
-            cur = frame[self._seq]
-            if cur != ((self._last + 1) % 256) or cur != frame[self._seq + 1]:
-                self.packet_drop_count += 1
-                err = f"\n>>>> Pkt Los Cur:{cur} Last valid:{self._last}. {datetime.now()}, dropped packets:{self.packet_drop_count}<<<<"
-                print(err)
-            self._last = cur
-            data = self.__parser.function(frame[self._start :]).data[: self.vld_chs]
-            data.append(frame[self._trig + 1])  # trigger
-            frames.append(data)
-        if frames:
-            del self.__buffer[: frame_obj.end()]
-            self.batt_val = frame[self.__bat]
-            if self.imp_flag:
-                self._cal_imp(frames)
-                return
-            return frames
+        seq = packets[:, self._seq].astype(int)
+        last = np.concatenate(([self._last], seq[:-1]))
+        lost = lost_frames(seq, last)
+        corrupt = seq != packets[:, self._seq + 1]
+        for i in np.flatnonzero(lost.astype(bool) | corrupt):
+            self.packet_drop_count += 1
+            if lost[i]:
+                self.stats.add_gap(int(lost[i]))
+            if corrupt[i]:
+                self.stats.add_checksum_error()
+            err = f"Pkt Los Cur:{seq[i]} Last valid:{last[i]}, dropped packets:{self.packet_drop_count}"
+            self.stats.warn(err)
+        self.stats.add_frames(len(packets))
+        self._last = int(seq[-1])
+        self.batt_val = int(packets[-1, self.__bat])
+        # decode wanted channels only, (frames, channels, 3) big-endian bytes
+        gather = self.__gather_all if self.imp_flag else self.__gather
+        data = decode_int(packets, gather)
+        trigger = packets[:, self._trig + 1]
+        if self.gap_fill is not None and not self.imp_flag:
+            # sequence numbers of corrupted headers are not trusted
+            data, trigger = self.__fill(data, trigger, np.where(corrupt, 0, lost))
+        if self.raw and not self.imp_flag:
+            return np.column_stack((data, trigger))
+        frames = (data * self._ratio).tolist()
+        for frame, trigger in zip(frames, trigger.tolist()):
+            frame.append(trigger)
+        if self.imp_flag:
+            self._cal_imp(frames)
+            return
+        return frames
+
+    def __fill(self, data: np.ndarray, trigger: np.ndarray, lost: np.ndarray):
+        lost = np.where(lost <= self.max_gap, lost, 0)
+        if self.__prev is None:  # first frame of a stream
+            lost[0] = 0
+        prev, self.__prev = self.__prev, data[-1]
+        self.gaps = gap_runs(lost)
+        if not self.gaps:
+            return data, trigger
+        # integer counts can't hold nan
+        mode = "zero" if self.raw and self.gap_fill == "nan" else self.gap_fill
+        return fill_gaps(data, lost, mode, prev), fill_gaps(trigger, lost, "zero")
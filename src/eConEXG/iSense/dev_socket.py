@@ -30,9 +30,12 @@ class iSenseUSB:
         16000: b"\x00",
     }
 
-    def __init__(self, fs, pkt_size=4096 * 2):
+    def __init__(self, fs, pkt_size=4096 * 2, transfers=0):
         super().__init__()
         self.fs = fs
+        # queued asynchronous transfers, 0 for synchronous reads
+        self.transfers = transfers
+        self.__reader = None
         self.idVendor = 0x04B4
         self.idProduct = 0x00F1
         self.pkt_size = pkt_size
@@ -45,7 +48,8 @@ class iSenseUSB:
             fs = self.fs
         return self.pref + self.mode[mode] + self.fss[fs] + self.suffix
 
-    def connect_socket(self):
+    @staticmethod
+    def _get_backend():
         def load_base(*args, **kwargs):
             return str(Path(__file__).parent.joinpath("libusb-1.0." + suff))
 
@@ -55,7 +59,21 @@ class iSenseUSB:
             else ("dylib" if system() == "Darwin" else None)
         )
         base = load_base if suff else None
-        base = usb.backend.libusb1.get_backend(find_library=base)
+        return usb.backend.libusb1.get_backend(find_library=base)
+
+    @staticmethod
+    def _find_devs() -> list:
+        base = iSenseUSB._get_backend()
+        ret = []
+        for vid, pid in [(0x04B4, 0x00F1), (0x8001, 0x0001)]:
+            devs = usb.core.find(
+                idVendor=vid, idProduct=pid, find_all=True, backend=base
+            )
+            ret.extend(f"{dev.bus}:{dev.address}" for dev in devs)
+        return ret
+
+    def connect_socket(self):
+        base = self._get_backend()
         devs = usb.core.find(
             idVendor=self.idVendor,
             idProduct=self.idProduct,
@@ -83,6 +101,9 @@ class iSenseUSB:
             raise Exception("Driver issue! Please reinstall hardware driver.")
 
     def close_socket(self):
+        if self.__reader is not None:
+            self.__reader.close()
+            self.__reader = None
         try:
             self._socket.write(self.out_point, self._cmd(b"R"))
             time.sleep(self.delay)
@@ -94,16 +115,36 @@ class iSenseUSB:
     def start_impe(self):
         self._socket.write(self.out_point, self._cmd(b"Z"))
         time.sleep(self.delay)
+        self.__start_reader()
 
     def start_data(self):
         self._socket.write(self.out_point, self._cmd(b"W"))
         time.sleep(self.delay)
+        self.__start_reader()
         self.recv_socket()
 
+    def __start_reader(self):
+        if self.__reader is not None and self.__reader.count != self.transfers:
+            self.__reader.close()
+            self.__reader = None
+        if not self.transfers:
+            return
+        if self.__reader is None:
+            from .usb_transfer import bulkReader
+
+            self.__reader = bulkReader(
+                self._socket, self.in_point, self.pkt_size, self.transfers
+            )
+        self.__reader.start()
+
     def recv_socket(self):
+        if self.__reader is not None:
+            return self.__reader.read()
         return self._socket.read(self.in_point, self.pkt_size)
 
     def stop_recv(self):
+        if self.__reader is not None:
+            self.__reader.stop()
         self._socket.write(self.out_point, self._cmd(b"R"))
         time.sleep(self.delay)
 
@@ -113,8 +154,9 @@ class iSenseUSB:
         intf = cfg[(0, 0)]
         ep = usb.util.find_descriptor(
             intf,
-            custom_match=lambda e: usb.util.endpoint_direction(e.bEndpointAddress)
-            == usb.util.ENDPOINT_OUT,
+            custom_match=lambda e: (
+                usb.util.endpoint_direction(e.bEndpointAddress) == usb.util.ENDPOINT_OUT
+            ),
         )
         print("ep:", ep)
         assert ep is not None
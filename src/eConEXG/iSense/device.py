@@ -6,10 +6,13 @@ from datetime import datetime
 from enum import Enum
 from queue import Queue
 from threading import Thread
-from typing import Optional
+from typing import Optional, Union
 
+from ..utils.capture import replay_socket
+from ..utils.dispatch import epochMixin, frameDispatcher
 
-class iSense(Thread):
+
+class iSense(epochMixin, Thread):
     class Dev(Enum):
         SIGNAL = 10  # self.Dev.SIGNAL transmision mode
         SIGNAL_START = 11
@@ -20,7 +23,15 @@ class iSense(Thread):
         TERMINATE = 40  # Init state
         TERMINATE_START = 41
 
-    def __init__(self, fs: int):
+    _targets = ("queue", "lsl")  # no BDF output
+
+    def __init__(self, fs: int, addr: Optional[str] = None):
+        """
+        Args:
+            fs: sample frequency in Hz, see `get_available_frequency()`.
+            addr: `"replay:<filename>"` to replay a file recorded by `create_capture_file()`
+                instead of connecting to the USB device.
+        """
         from .data_parser import Parser
         from .dev_socket import iSenseUSB
 
@@ -31,13 +42,20 @@ class iSense(Thread):
                 "Frequency is unsupported. Available frequencies: 250, 500, 1000, 2000, 4000, 8000, 16000"
             )
         self.fs = fs
+        self.channels = list(range(136))
         self.__socket_flag = Queue()
         self.__save_data = Queue()
         self.__batt = 0
         self.__status = self.Dev.TERMINATE
         try:
             self.__parser = Parser(fs=self.fs)
-            self.__dev = iSenseUSB(self.fs, self.__parser.pkt_size)
+            self._dispatch = frameDispatcher(
+                "iSense", self.__parser, lambda: self.__dev.recv_socket(), fs
+            )
+            self._dispatch.queue = self.__save_data
+            self.__dev = replay_socket(addr) or iSenseUSB(
+                self.fs, self.__parser.pkt_size
+            )
             self.__dev.connect_socket()
             self.__dev.stop_recv()
             self.__socket_flag.put("Connected")
@@ -70,7 +88,51 @@ class iSense(Thread):
         while self.__status not in [self.Dev.SIGNAL, self.Dev.TERMINATE]:
             time.sleep(0.01)
 
-    def get_data(self, timeout: Optional[float] = 0.01) -> list[Optional[list]]:
+    def update_channels(self, channels: Optional[list[int]] = None) -> None:
+        """
+        Update channels to acquire, only wanted channels are decoded, invoke it when device is not acquiring data or impedance.
+
+        Args:
+            channels: hardware channel indexes from `0` to `135`, frames returned by `get_data()` contain
+                these channels in the given order and the trigger channel, if `None`, reset to all channels.
+
+        Raises:
+            Exception: if data/impedance acquisition in progress or channel index invalid.
+        """
+        if self.__status in [self.Dev.SIGNAL, self.Dev.IMPEDANCE]:
+            raise Exception("Data acquisition in progress, please stop first.")
+        channels = list(range(136)) if channels is None else list(channels)
+        if not all(0 <= ch < 136 for ch in channels):
+            raise Exception("Channel index should be from 0 to 135.")
+        self.__parser._update_chs(channels)
+        self.channels = channels
+
+    def set_usb_transfers(self, count: int = 8) -> None:
+        """
+        Read the USB endpoint with queued asynchronous bulk transfers, applied on the next acquisition start.
+
+        With synchronous reads the endpoint has no pending transfer while a block is parsed and the device
+            stalls, which limits sustainable throughput at 8000 Hz and above. With `count` transfers queued
+            through libusb each completed transfer is resubmitted at once, so the endpoint always has
+            one pending. Ignored when replaying a capture.
+
+        Args:
+            count: transfers kept pending, `0` for one synchronous read per loop.
+
+        Raises:
+            Exception: if data acquisition in progress.
+            ValueError: if count is negative.
+        """
+        if self.__status in [self.Dev.SIGNAL, self.Dev.IMPEDANCE]:
+            raise Exception("Data acquisition in progress, please stop first.")
+        if count < 0:
+            raise ValueError("Transfer count should not be negative.")
+        if hasattr(self.__dev, "transfers"):
+            self.__dev.transfers = int(count)
+
+    def get_data(
+        self, timeout: Optional[float] = 0.01
+    ) -> Union[list[Optional[list]], np.ndarray]:
         """
         Acquire amplifier data, make sure this function is called in a loop so that it can continuously read the data.
 
@@ -80,6 +142,7 @@ class iSense(Thread):
         Returns:
             A list of frames, each frame is a list contains all wanted eeg channels and triggerbox channel,
                 eeg channels can be updatd by `update_channels()`.
+                An `int32` array of frames in raw mode, see `set_raw_mode()`.
 
         Data Unit:
             - eeg: microvolts (µV)
@@ -94,6 +157,11 @@ class iSense(Thread):
             data: list = self.__save_data.get(timeout=timeout)
         except queue.Empty:
             return []
+        if self.__parser.raw:
+            data = [data]
+            while not self.__save_data.empty():
+                data.append(self.__save_data.get())
+            return np.concatenate(data)
         while not self.__save_data.empty():
             data.extend(self.__save_data.get())
         return data
@@ -163,7 +231,8 @@ class iSense(Thread):
             each frame is the same as described in `get_data()`.
 
         Args:
-            chs_info: Label the information of channels in LSL Stream
+            chs_info: Label the information of channels in LSL Stream, keys are hardware channel indexes
+                and should be acquired channels set by `update_channels()`.
 
         Raises:
             Exception: if data acquisition not started or LSL stream already opened.
@@ -174,23 +243,35 @@ class iSense(Thread):
             raise Exception("Data acquisition not started, please start first.")
         if hasattr(self, "_lsl_stream"):
             raise Exception("LSL stream already opened.")
-        from ..utils.lslWrapper import lslSender
+        from ..utils.lslWrapper import lslMarkerSender, lslSender
 
-        self.chs_index = [i for i in chs_info.keys()] + [136]
+        if not set(chs_info) <= set(self.channels):
+            raise Exception("Channels not acquired, please update_channels() first.")
+        self.chs_index = [self.channels.index(i) for i in chs_info] + [
+            len(self.channels)
+        ]
         self._lsl_stream = lslSender(
             chs_info,
             "iSense",
             "BioSignal",
-            self.fs,
+            self.fs / self._dispatch.decimation("lsl"),
             with_trigger=True,
+            **self._dispatch.raw_format(self.__parser.scale[self.chs_index[:-1]]),
         )
+        self._lsl_marker = lslMarkerSender("iSense")
+        self._dispatch.lsl_columns = self.chs_index
+        self._dispatch.lsl = self._lsl_stream
+        self._dispatch.lsl_marker = self._lsl_marker
 
     def close_lsl_stream(self):
         """
         Close LSL stream manually, invoked automatically after `stop_acquisition()` or `close_dev()`
         """
+        self._dispatch.lsl = self._dispatch.lsl_marker = None
+        self._dispatch.lsl_columns = None
         if hasattr(self, "_lsl_stream"):
             del self._lsl_stream
+            del self._lsl_marker
             del self.chs_index
 
     def get_dev_flag(self) -> Optional[str]:
@@ -206,6 +287,13 @@ class iSense(Thread):
         except queue.Empty:
             return
 
+    def _check_idle(self):
+        if self.__status in [self.Dev.SIGNAL, self.Dev.IMPEDANCE]:
+            raise Exception("Data acquisition in progress, please stop first.")
+
+    def _capture_info(self) -> dict:
+        return {"type": "iSense", "fs": self.fs, "channels": self.channels}
+
     def run(self):
         while self.__status not in [self.Dev.TERMINATE_START]:
             if self.__status == self.Dev.SIGNAL_START:
@@ -217,6 +305,7 @@ class iSense(Thread):
             else:
                 print(f"Unknown status: {self.__status}")
                 break
+        self._dispatch.close()
         try:
             self.__dev.close_socket()
         except Exception:
@@ -226,6 +315,7 @@ class iSense(Thread):
 
     def __recv_data(self, imp_mode=True):
         self.__parser.imp_flag = imp_mode
+        self._dispatch.start(self.fs, len(self.channels) + 1, self.__stream_info())
         try:
             if self.__parser.imp_flag:
                 self.__dev.start_impe()
@@ -233,26 +323,20 @@ class iSense(Thread):
             else:
                 self.__dev.start_data()
                 self.__status = self.Dev.SIGNAL
+            self._dispatch.reader.start()
         except Exception as e:
             self.__socket_flag.put(f"Data/IMPEDANCE initialization failed: {e}")
             self.__status = self.Dev.TERMINATE_START
 
         try:
             while self.__status in [self.Dev.SIGNAL, self.Dev.IMPEDANCE]:
-                data = self.__dev.recv_socket()
-                if not data:
-                    raise Exception("Remote end closed.")
-                ret = self.__parser.parse_data(data)
-                if ret:
-                    self.__save_data.put(ret)
-                    if hasattr(self, "_lsl_stream"):
-                        ret = np.array(ret)
-                        self._lsl_stream.push_chunk(ret[:, self.chs_index].tolist())
+                self._dispatch.step()
         except Exception as e:
             traceback.print_exc()
             self.__socket_flag.put(f"Transmission error: {e}")
             self.__status = self.Dev.TERMINATE_START
 
+        self._dispatch.reader.stop()
         try:
             self.__dev.stop_recv()
         except Exception as e:
@@ -267,6 +351,14 @@ class iSense(Thread):
             continue
         print(f"iSense data thread closed. {datetime.now()}")
 
+    def __stream_info(self) -> dict:
+        return {
+            "type": "iSense",
+            "fs": self.fs / self._dispatch.decimation("lsl"),
+            "channels": self.__parser.ch_idx,
+            "scale": self.get_scale() if self._dispatch.raw else None,
+        }
+
     def __idle_state(self):
         timestamp = time.time()
         self.__status = self.Dev.IDLE
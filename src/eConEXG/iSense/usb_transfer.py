@@ -0,0 +1,196 @@
+import ctypes
+import time
+from collections import deque
+
+import usb.util
+from usb.backend import libusb1
+
+# enum libusb_transfer_status
+_COMPLETED = 0
+_CANCELLED = 3
+_BULK = 2
+
+
+class _transfer(ctypes.Structure):
+    pass
+
+
+_callback = ctypes.CFUNCTYPE(None, ctypes.POINTER(_transfer))
+# struct libusb_transfer without the trailing isochronous packet descriptors
+_transfer._fields_ = [
+    ("dev_handle", ctypes.c_void_p),
+    ("flags", ctypes.c_uint8),
+    ("endpoint", ctypes.c_ubyte),
+    ("type", ctypes.c_ubyte),
+    ("timeout", ctypes.c_uint),
+    ("status", ctypes.c_int),
+    ("length", ctypes.c_int),
+    ("actual_length", ctypes.c_int),
+    ("callback", _callback),
+    ("user_data", ctypes.c_void_p),
+    ("buffer", ctypes.POINTER(ctypes.c_ubyte)),
+    ("num_iso_packets", ctypes.c_int),
+]
+
+
+class _timeval(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_usec", ctypes.c_long)]
+
+
+def _function(lib, name: str, restype, *argtypes):
+    # own prototypes, signatures declared by pyusb on the shared library are left untouched
+    return ctypes.CFUNCTYPE(restype, *argtypes)((name, lib))
+
+
+class bulkReader:
+    def __init__(
+        self, dev, endpoint: int, size: int, count: int = 8, timeout: float = 1.0
+    ):
+        """
+        Keep `count` asynchronous bulk IN transfers queued on an endpoint of a pyusb device.
+
+        Transfers are submitted to the libusb instance loaded by pyusb through `ctypes`. Each completed
+            transfer is copied to a queue of received chunks and resubmitted from its callback, so the
+            endpoint always has a pending transfer while the receive loop parses, instead of stalling
+            between synchronous reads. `read()` runs libusb events until a chunk is available and
+            returns all queued chunks in order.
+
+        Args:
+            dev: opened `usb.core.Device` using the libusb 1.0 backend.
+            endpoint: IN endpoint address.
+            size: bytes per transfer.
+            count: transfers kept pending.
+            timeout: seconds `read()` waits for data before raising.
+
+        Raises:
+            Exception: if `dev` doesn't use the libusb 1.0 backend, or transfers can't be allocated.
+        """
+        backend = dev._ctx.backend
+        if not isinstance(backend, libusb1._LibUSB):
+            raise Exception(
+                "Asynchronous USB transfers require the libusb 1.0 backend of pyusb, "
+                f"got {type(backend).__module__}, use set_usb_transfers(0) for synchronous reads."
+            )
+        usb.util.claim_interface(dev, 0)  # opens the device handle
+        lib = backend.lib
+        self.__ctx = backend.ctx
+        self.__alloc = _function(
+            lib, "libusb_alloc_transfer", ctypes.POINTER(_transfer), ctypes.c_int
+        )
+        self.__free = _function(
+            lib, "libusb_free_transfer", None, ctypes.POINTER(_transfer)
+        )
+        self.__submit = _function(
+            lib, "libusb_submit_transfer", ctypes.c_int, ctypes.POINTER(_transfer)
+        )
+        self.__cancel = _function(
+            lib, "libusb_cancel_transfer", ctypes.c_int, ctypes.POINTER(_transfer)
+        )
+        self.__events = _function(
+            lib,
+            "libusb_handle_events_timeout",
+            ctypes.c_int,
+            ctypes.c_void_p,
+            ctypes.POINTER(_timeval),
+        )
+        self.count = count
+        self.timeout = timeout
+        self.running = False
+        self.__chunks = deque()
+        self.__pending = 0
+        self.__error = None
+        self.__complete_cb = _callback(self.__complete)  # referenced while submitted
+        self.__buffers = []
+        self.__transfers = []
+        handle = dev._ctx.handle.handle
+        for _ in range(count):
+            transfer = self.__alloc(0)
+            if not transfer:
+                self.close()
+                raise Exception("Failed to allocate USB transfer.")
+            buffer = (ctypes.c_ubyte * size)()
+            fields = transfer.contents
+            fields.dev_handle = handle
+            fields.endpoint = endpoint
+            fields.type = _BULK
+            fields.timeout = 0
+            fields.length = size
+            fields.callback = self.__complete_cb
+            fields.buffer = ctypes.cast(buffer, ctypes.POINTER(ctypes.c_ubyte))
+            self.__buffers.append(buffer)
+            self.__transfers.append(transfer)
+
+    def start(self) -> None:
+        """Submit all transfers."""
+        if self.running:
+            return
+        self.__chunks.clear()
+        self.__error = None
+        self.running = True
+        for transfer in self.__transfers:
+            self.__submit_one(transfer)
+
+    def read(self) -> bytes:
+        """
+        Get bytes received since last call, block until any.
+
+        Raises:
+            Exception: if a transfer failed or no data arrived within `timeout` seconds.
+        """
+        deadline = time.perf_counter() + self.timeout
+        while not self.__chunks:
+            if self.__error is not None:
+                raise Exception(f"USB transfer failed, libusb status {self.__error}.")
+            if time.perf_counter() > deadline:
+                raise Exception("USB read timeout.")
+            self.__handle_events(0.1)
+        chunks = [self.__chunks.popleft() for _ in range(len(self.__chunks))]
+        return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+    def stop(self) -> None:
+        """Cancel pending transfers and wait for their completion."""
+        self.running = False
+        if not self.__pending:
+            return
+        for transfer in self.__transfers:
+            self.__cancel(transfer)
+        deadline = time.perf_counter() + self.timeout
+        while self.__pending and time.perf_counter() < deadline:
+            self.__handle_events(0.1)
+        self.__chunks.clear()
+
+    def close(self) -> None:
+        """Stop and free transfers."""
+        self.stop()
+        if self.__pending:  # still owned by libusb, leak rather than free
+            self.__transfers.clear()
+        for transfer in self.__transfers:
+            self.__free(transfer)
+        self.__transfers.clear()
+        self.__buffers.clear()
+
+    def __submit_one(self, transfer) -> None:
+        ret = self.__submit(transfer)
+        if ret < 0:
+            self.running = False
+            self.__error = ret
+            return
+        self.__pending += 1
+
+    def __complete(self, transfer) -> None:
+        self.__pending -= 1
+        fields = transfer.contents
+        if fields.status == _COMPLETED:
+            if fields.actual_length:
+                self.__chunks.append(
+                    ctypes.string_at(fields.buffer, fields.actual_length)
+                )
+            if self.running:
+                self.__submit_one(transfer)
+        elif fields.status != _CANCELLED:
+            self.running = False
+            self.__error = fields.status
+
+    def __handle_events(self, timeout: float) -> None:
+        tv = _timeval(int(timeout), int(timeout % 1 * 1e6))
+        self.__events(self.__ctx, ctypes.byref(tv))
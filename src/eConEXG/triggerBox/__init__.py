@@ -1,2 +1,12 @@
-__all__ = ["lightStimulator", "triggerBoxWired", "triggerBoxWireless"]
-from .triggerbox import lightStimulator, triggerBoxWired, triggerBoxWireless
+__all__ = [
+    "lightStimulator",
+    "markerScheduler",
+    "triggerBoxWired",
+    "triggerBoxWireless",
+]
+from .triggerbox import (
+    lightStimulator,
+    markerScheduler,
+    triggerBoxWired,
+    triggerBoxWireless,
+)
@@ -1,8 +1,16 @@
-from typing import Optional
+import heapq
 import time
+from collections import deque
+from threading import Condition, Thread
+from typing import Optional, Union
+
+from ..utils.realtime import raise_priority, timerResolution
 
 
 class triggerBoxWireless:
+    # shortest interval between markers the amplifier receives reliably, in seconds
+    _min_interval = 0.04
+
     def __init__(self, port: str = None):
         """
         Args:
@@ -25,6 +33,11 @@ class triggerBoxWireless:
         self.dev = Serial(port, baudrate=115200, timeout=1)
         self.__last_timestamp = time.perf_counter()
         self.__warn = "Marker interval too short, amplifier may fail to receive it. Suggested interval is above 50ms"
+        self._packets = {
+            i: i.to_bytes(length=1, byteorder="big", signed=False) + b"\x55\x66\x0d"
+            for i in range(1, 256)
+            if i != 13
+        }
         time.sleep(0.1)
 
     def sendMarker(self, marker: int):
@@ -37,21 +50,25 @@ class triggerBoxWireless:
         Raises:
             Exception: If the marker is invalid.
         """
-        if time.perf_counter() - self.__last_timestamp < 0.04:
+        if time.perf_counter() - self.__last_timestamp < self._min_interval:
             print(self.__warn)
+        self.dev.write(self._packet(marker))
+        self.__last_timestamp = time.perf_counter()
+
+    def _packet(self, marker: int) -> bytes:
         if not isinstance(marker, int):
             marker = int(marker)
-        if marker == 13 or marker <= 0 or marker > 255:
+        if marker not in self._packets:
             raise Exception("Invalid marker")
-        marker = marker.to_bytes(length=1, byteorder="big", signed=False)
-        self.dev.write(marker + b"\x55\x66\x0d")
-        self.__last_timestamp = time.perf_counter()
+        return self._packets[marker]
 
     def close_dev(self):
         self.dev.close()
 
 
 class triggerBoxWired:
+    _min_interval = 0.0
+
     def __init__(self, port: str = None):
         """
         Args:
@@ -72,6 +89,10 @@ class triggerBoxWired:
             else:
                 raise Exception("Trigger box not found")
         self.dev = Serial(port, timeout=1)
+        self._packets = {
+            i: i.to_bytes(length=1, byteorder="big", signed=False)
+            for i in range(1, 256)
+        }
 
     def sendMarker(self, marker: int):
         """
@@ -83,16 +104,182 @@ class triggerBoxWired:
         Raises:
             Exception: If the marker is invalid.
         """
+        self.dev.write(self._packet(marker))
+
+    def _packet(self, marker: int) -> bytes:
         if not isinstance(marker, int):
             marker = int(marker)
-        if marker <= 0 or marker > 255:
+        if marker not in self._packets:
             raise Exception("Invalid marker")
-        self.dev.write(marker.to_bytes(length=1, byteorder="big", signed=False))
+        return self._packets[marker]
 
     def close_dev(self):
         self.dev.close()
 
 
+class markerScheduler(Thread):
+    def __init__(
+        self,
+        trigger_box: Union[triggerBoxWired, triggerBoxWireless],
+        spin: float = 0.002,
+        drain: bool = False,
+        history: int = 10000,
+    ):
+        """
+        Send markers at scheduled `time.perf_counter()` deadlines from a dedicated high priority thread,
+            and report the achieved send time of each marker.
+
+        The thread starts with the first `schedule()`. Markers closer than the minimum interval of the
+            trigger box, 40 ms for `triggerBoxWireless`, are delayed to keep that interval, which shows
+            up as their jitter. If writing to the trigger box fails, the scheduler stops and the error
+            is raised by `schedule()` and `get_results()`.
+
+        Args:
+            trigger_box: an opened `triggerBoxWired` or `triggerBoxWireless`, its port is reused.
+            spin: seconds before a deadline to stop sleeping and busy-wait, increase it if the reported jitter is large.
+            drain: if True, wait until the driver transmitted the bytes before recording `done`.
+            history: number of marker reports to keep for `get_results()` and `get_jitter()`.
+        """
+        super().__init__(daemon=True, name="markerScheduler")
+        self.__box = trigger_box
+        self.__spin = spin
+        self.__drain = drain
+        self.__cond = Condition()
+        self.__pending = []  # heap of (deadline, id, marker, packet)
+        self.__results = deque(maxlen=history)
+        self.__history = deque(maxlen=history)
+        self.__id = 0
+        self.__run_flag = True
+        self.__error: Optional[Exception] = None
+        self.priority: Optional[str] = None
+
+    def schedule(self, marker: int, deadline: Optional[float] = None) -> int:
+        """
+        Queue a marker, return immediately.
+
+        Args:
+            marker: same as `sendMarker()` of the trigger box.
+            deadline: `time.perf_counter()` time to send the marker, send as soon as possible if `None` or already passed.
+
+        Returns:
+            Marker id, used to match reports from `get_results()`.
+
+        Raises:
+            Exception: If the marker is invalid, scheduler closed, or raised by a failed write.
+        """
+        self.__check()
+        packet = self.__box._packet(marker)
+        if deadline is None:
+            deadline = time.perf_counter()
+        with self.__cond:
+            if self.ident is None:
+                self.start()
+            self.__id += 1
+            heapq.heappush(self.__pending, (deadline, self.__id, marker, packet))
+            self.__cond.notify()
+            return self.__id
+
+    def get_results(self) -> list[dict]:
+        """
+        Retrieve reports of markers sent since last call.
+
+        Returns:
+            A list of dictionaries containing `id`, `marker`, `deadline`, `sent` (before write),
+                `done` (after write), `jitter` (`sent - deadline`) and `latency` (`done - sent`), in seconds.
+
+        Raises:
+            Exception: raised by a failed write to the trigger box.
+        """
+        if self.__error is not None:
+            raise self.__error
+        ret = []
+        while self.__results:
+            ret.append(self.__results.popleft())
+        return ret
+
+    def get_jitter(self) -> dict:
+        """
+        Summarize send timing of the last `history` markers.
+
+        Returns:
+            A dictionary containing `count`, `mean_us`, `std_us`, `p99_us`, `max_us` of absolute jitter,
+                and `max_latency_us` of write calls, in microseconds.
+        """
+        history = list(self.__history)
+        if not history:
+            return {"count": 0}
+        jitter = sorted(abs(ret[0]) * 1e6 for ret in history)
+        mean = sum(jitter) / len(jitter)
+        std = (sum((j - mean) ** 2 for j in jitter) / len(jitter)) ** 0.5
+        return {
+            "count": len(jitter),
+            "mean_us": mean,
+            "std_us": std,
+            "p99_us": jitter[min(int(len(jitter) * 0.99), len(jitter) - 1)],
+            "max_us": jitter[-1],
+            "max_latency_us": max(ret[1] for ret in history) * 1e6,
+        }
+
+    def close(self):
+        """
+        Stop the scheduler thread, pending markers are discarded, the trigger box is left open.
+        """
+        self.__run_flag = False
+        with self.__cond:
+            self.__cond.notify()
+        if self.is_alive():
+            self.join()
+
+    def __check(self):
+        if self.__error is not None:
+            raise self.__error
+        if not self.__run_flag:
+            raise Exception("Marker scheduler closed.")
+
+    def run(self):
+        self.priority = raise_priority()
+        interval = self.__box._min_interval
+        last = -interval
+        with timerResolution():
+            while self.__run_flag:
+                with self.__cond:
+                    if not self.__pending:
+                        self.__cond.wait(0.1)
+                        continue
+                    # keep the minimum interval of the trigger box after the last marker
+                    due = max(self.__pending[0][0], last + interval)
+                    remaining = due - time.perf_counter()
+                    if remaining > self.__spin:
+                        # woken up early if an earlier marker is scheduled
+                        self.__cond.wait(remaining - self.__spin)
+                        continue
+                    deadline, mid, marker, packet = heapq.heappop(self.__pending)
+                while time.perf_counter() < due:
+                    pass
+                sent = time.perf_counter()
+                try:
+                    self.__box.dev.write(packet)
+                    if self.__drain:
+                        self.__box.dev.flush()
+                except Exception as e:
+                    self.__error = e
+                    self.__run_flag = False
+                    return
+                done = last = time.perf_counter()
+                self.__history.append((sent - deadline, done - sent))
+                self.__results.append(
+                    {
+                        "id": mid,
+                        "marker": marker,
+                        "deadline": deadline,
+                        "sent": sent,
+                        "done": done,
+                        "jitter": sent - deadline,
+                        "latency": done - sent,
+                    }
+                )
+
+
 class lightStimulator:
     def __init__(self, port: str = None):
         from serial import Serial
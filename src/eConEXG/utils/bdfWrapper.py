@@ -43,6 +43,9 @@ class bdfSaver(EdfWriter, Thread):
     def write_Annotation(self, marker):
         super().writeAnnotation(self._data_position / self.fs, -1, marker)
 
+    def write_marker(self, position: int, marker: str, duration: float = -1):
+        super().writeAnnotation(position / self.fs, duration, marker)
+
     def _init_chs_info(self, dev_type, ch_info, ch_names) -> None:
         self.setEquipment(dev_type)
         self.setPatientName("eCon")
@@ -63,6 +66,8 @@ class bdfSaver(EdfWriter, Thread):
             self._halt_flag.wait()
             while not self._data_q.empty():
                 data_write = self._data_q.get()
+                # samples of lost frames filled with nan are written as 0
+                data_write = [np.nan_to_num(ch, nan=0.0) for ch in data_write]
                 self.writeSamples(data_write, digital=False)
                 self.elapsed_seconds += 1
             self._halt_flag.clear()
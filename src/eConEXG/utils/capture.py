@@ -0,0 +1,175 @@
+import json
+import struct
+import time
+from threading import Lock
+from typing import Iterator, Optional, Union
+
+MAGIC = b"ECXCAP1\n"
+REPLAY = "replay:"
+# receive time in nanoseconds since capture start, chunk length
+_RECORD = struct.Struct("<QI")
+_INFO = struct.Struct("<I")
+
+
+class captureWriter:
+    def __init__(self, filename: str, info: Optional[dict] = None):
+        """
+        Append raw transport chunks with their receive time to a binary capture file.
+
+        The file starts with `MAGIC` and a length prefixed JSON header holding `info`, followed by
+            one record per chunk: receive time in nanoseconds since capture start and chunk length
+            as little-endian `uint64` and `uint32`, then the chunk bytes. Writes go through a large
+            file buffer, so a chunk costs two buffered writes on the receive thread.
+
+        Args:
+            filename: capture file name, accept absolute or relative path.
+            info: device information stored in the header, e.g. `get_dev_info()`.
+
+        Raises:
+            OSError: if file creation failed.
+        """
+        self.filename = filename
+        self.__lock = Lock()
+        self.__file = open(filename, "wb", buffering=1 << 20)
+        header = json.dumps({"created": time.time(), "info": info or {}}, default=str)
+        header = header.encode()
+        self.__file.write(MAGIC + _INFO.pack(len(header)) + header)
+        self.__start = time.perf_counter_ns()
+
+    def write(self, data: bytes, timestamp: Optional[float] = None) -> None:
+        """
+        Append a chunk, ignored after `close()`.
+
+        Args:
+            data: received bytes.
+            timestamp: `time.perf_counter()` receive time of the chunk, `None` for the current time.
+        """
+        if timestamp is None:
+            now = time.perf_counter_ns()
+        else:
+            now = int(timestamp * 1e9)
+        with self.__lock:
+            if self.__file is None:
+                return
+            self.__file.write(_RECORD.pack(max(now - self.__start, 0), len(data)))
+            self.__file.write(data)
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+
+def read_capture(filename: str) -> tuple[dict, Iterator[tuple[int, bytes]]]:
+    """
+    Read a capture file written by `captureWriter`.
+
+    Args:
+        filename: capture file name.
+
+    Returns:
+        Header dictionary containing `created` and `info`, and an iterator of `(time_ns, chunk)`
+            records in receive order, a truncated last record is ignored.
+
+    Raises:
+        ValueError: if the file is not a capture file.
+
+    Examples:
+        >>> header, chunks = read_capture("capture.ecx")
+        >>> for _, chunk in chunks:
+        ...     parser.parse_data(chunk)
+    """
+    file = open(filename, "rb")
+    if file.read(len(MAGIC)) != MAGIC:
+        file.close()
+        raise ValueError(f"{filename} is not a capture file.")
+    (length,) = _INFO.unpack(file.read(_INFO.size))
+    header = json.loads(file.read(length))
+
+    def records():
+        with file:
+            while True:
+                head = file.read(_RECORD.size)
+                if len(head) < _RECORD.size:
+                    return
+                timestamp, length = _RECORD.unpack(head)
+                data = file.read(length)
+                if len(data) < length:
+                    return
+                yield timestamp, data
+
+    return header, records()
+
+
+class replaySocket:
+    def __init__(self, filename: str, realtime: bool = True):
+        """
+        Transport feeding a capture file back to a device, in place of its hardware socket.
+
+        Pass it, or a `"replay:<filename>"` string, as the device address, e.g.
+            `iFocus("replay:capture.ecx")`, `iRecorder("W32").connect_device("replay:capture.ecx")`
+            or `iSense(2000, addr="replay:capture.ecx")`. The device type and sample frequency
+            must match the captured ones, stored in `info`. Commands to the device are ignored,
+            once all chunks are read `recv_socket()` returns empty bytes and the device
+            stops acquisition as for a closed connection.
+
+        Args:
+            filename: capture file name.
+            realtime: `True` to return chunks at their captured pace counted from `start_data()`,
+                `False` to return them as fast as the device reads.
+        """
+        self.filename = filename
+        self.realtime = realtime
+        header, self.__records = read_capture(filename)
+        self.info: dict = header["info"]
+        self.__start = None
+
+    def recv_socket(self, *args, **kwargs) -> bytes:
+        try:
+            timestamp, data = next(self.__records)
+        except StopIteration:
+            return b""
+        if self.realtime:
+            if self.__start is None:
+                self.__start = time.perf_counter_ns() - timestamp
+            delay = (self.__start + timestamp - time.perf_counter_ns()) / 1e9
+            if delay > 0:
+                time.sleep(delay)
+        return data
+
+    def start_data(self):
+        self.__start = None
+
+    def start_impe(self):
+        self.__start = None
+
+    def stop_recv(self):
+        pass
+
+    def connect_socket(self):
+        pass
+
+    def close_socket(self):
+        self.__records.close()
+
+    def send_heartbeat(self) -> int:
+        return 0
+
+    def set_fs(self, fs):
+        pass
+
+    def set_frequency(self, fs):
+        pass
+
+    def shock_band(self):
+        pass
+
+
+def replay_socket(addr: Union[str, replaySocket, None]) -> Optional[replaySocket]:
+    """Return the replay transport given as device address, or `None` for a hardware address."""
+    if isinstance(addr, replaySocket):
+        return addr
+    if isinstance(addr, str) and addr.startswith(REPLAY):
+        return replaySocket(addr[len(REPLAY) :])
+    return None
@@ -0,0 +1,39 @@
+import numpy as np
+
+
+def gather_index(offsets, width: int) -> np.ndarray:
+    """
+    Byte indexes of integers in a frame.
+
+    Args:
+        offsets: byte offset of each integer, in any shape.
+        width: bytes per integer.
+
+    Returns:
+        Index array in shape `offsets.shape + (width,)`.
+    """
+    return np.asarray(offsets, dtype=int)[..., None] + np.arange(width)
+
+
+def decode_int(
+    packets: np.ndarray, gather: np.ndarray, byteorder: str = "big"
+) -> np.ndarray:
+    """
+    Decode signed integers from a block of frames in one pass.
+
+    Args:
+        packets: frames in shape `(frames, frame_length)`, dtype `uint8`.
+        gather: index array from `gather_index()`.
+        byteorder: `"big"` or `"little"`.
+
+    Returns:
+        `int32` array in shape `(frames,) + gather.shape[:-1]`.
+    """
+    raw = packets[:, gather].astype(np.int32)
+    if byteorder == "little":
+        raw = raw[..., ::-1]
+    value = raw[..., 0]
+    for i in range(1, gather.shape[-1]):
+        value = (value << 8) | raw[..., i]
+    sign = 1 << (8 * gather.shape[-1] - 1)
+    return (value ^ sign) - sign
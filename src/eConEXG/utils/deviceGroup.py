@@ -0,0 +1,416 @@
+import queue
+import time
+import traceback
+from queue import Queue
+from threading import Barrier, Condition, Thread
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+from .timestamp import timestampModel
+
+
+class _member:
+    def __init__(self, device, addr: Optional[str], name: Optional[str]):
+        self.device = device
+        self.addr = addr
+        self.name = name
+        self.start_time = None
+
+    def describe(self):
+        dev = self.device
+        if hasattr(dev, "get_dev_info"):
+            info = dev.get_dev_info()
+        else:  # iSense
+            info = {"type": "iSense", "fs": dev.fs}
+        self.type = info["type"]
+        if "ch_info" in info:  # iRecorder
+            self.fs = info["fs"]
+            self.labels = list(info["ch_info"].values()) + ["Trigger"]
+            self.nested = False
+        elif "channel_exg" in info:  # iFocus, DFocus, eConAlpha
+            self.fs = info["fs_exg"]
+            self.labels = list(info["channel_exg"].values())
+            self.nested = True
+        else:
+            self.fs = info["fs"]
+            self.labels = [f"CH{i}" for i in dev.channels] + ["Trigger"]
+            self.nested = False
+        self.discrete = [] if self.nested else [len(self.labels) - 1]
+        # sample times fitted by the receive thread from chunk arrival, free of polling jitter,
+        # devices in another process are timed when their data is polled
+        self.dispatch = getattr(dev, "_dispatch", None)
+        if self.dispatch is None:
+            self.model = timestampModel(self.fs)
+        else:
+            self.model = self.dispatch.markers.model
+        self.clear()
+
+    def clear(self):
+        if self.dispatch is None:
+            self.model.reset()
+            self.step = 1
+        else:  # reset by the device on start
+            self.step = self.dispatch.decimation("queue")
+        self.scale = (
+            self.device.get_scale() if hasattr(self.device, "get_scale") else None
+        )
+        self.buffer = np.zeros((0, len(self.labels)))
+        self.first_index = 0
+        self.max_latency = 0.0
+
+    def to_block(self, frames) -> np.ndarray:
+        if isinstance(frames, tuple):  # raw mode, EXG and IMU counts
+            return self.__scaled(frames[0], 0)
+        if isinstance(frames, np.ndarray) and frames.dtype.kind == "i":  # raw mode
+            return self.__scaled(frames)
+        if self.nested:
+            exg = [frame[:-1] for frame in frames]
+            return np.asarray(exg, dtype=float).reshape(-1, len(self.labels))
+        return np.asarray(frames, dtype=float).reshape(-1, len(self.labels))
+
+    def __scaled(self, counts: np.ndarray, stream: Optional[int] = None) -> np.ndarray:
+        block = counts.astype(float)
+        if self.scale is not None:
+            block *= self.scale if stream is None else self.scale[stream]
+        return block.reshape(-1, len(self.labels))
+
+    def append(self, block: np.ndarray, arrival: float):
+        if self.dispatch is None:
+            self.model.update(len(block), arrival)
+        self.max_latency = max(self.max_latency, self.model.latency)
+        self.buffer = np.concatenate((self.buffer, block))
+
+    def time_of(self, index):
+        # rows of a decimated queue are every `step` device samples
+        return self.model.time_of(np.asarray(index) * self.step)
+
+    def last_time(self) -> float:
+        return self.time_of(self.first_index + len(self.buffer) - 1)
+
+    def sample(self, ts: np.ndarray) -> np.ndarray:
+        times = self.time_of(self.first_index + np.arange(len(self.buffer)))
+        right = np.searchsorted(times, ts, side="right")
+        left = np.clip(right - 1, 0, len(times) - 1)
+        right = np.clip(right, 0, len(times) - 1)
+        span = times[right] - times[left]
+        weight = np.divide(
+            ts - times[left], span, out=np.zeros_like(ts), where=span > 0
+        )[:, None]
+        out = self.buffer[left] * (1 - weight) + self.buffer[right] * weight
+        out[:, self.discrete] = self.buffer[left][:, self.discrete]
+        out[ts > times[-1]] = np.nan
+        # keep the last sample before the next grid point for interpolation
+        keep = max(int(np.searchsorted(times, ts[-1], side="right")) - 1, 0)
+        self.buffer = self.buffer[keep:]
+        self.first_index += keep
+        return out
+
+    def drops(self) -> Optional[int]:
+        if hasattr(self.device, "get_stats"):
+            stats = self.device.get_stats()
+            return stats["checksum_errors"] + stats["seq_gaps"]
+
+
+class DeviceGroup:
+    def __init__(
+        self,
+        fs: Optional[float] = None,
+        block_size: int = 50,
+        max_delay: float = 1.0,
+    ):
+        """
+        Acquire data from several heterogeneous devices at once, merged into one stream
+            resampled to a common time base.
+
+        Args:
+            fs: sample frequency of the merged stream in Hz, if `None`, the highest device frequency is used.
+            block_size: number of samples per merged block.
+            max_delay: seconds to wait for a lagging device before its columns are filled with `nan`.
+        """
+        self.__members: list[_member] = []
+        self.__fs = fs
+        self.__block_size = block_size
+        self.__max_delay = max_delay
+        self.__sinks: list[Callable[[np.ndarray, np.ndarray], None]] = []
+        self.__save_data = Queue()
+        self.__cond = Condition()
+        self.__threads: list[Thread] = []
+        self.__running = False
+        self.__blocks = 0
+        self.__stalls = 0
+        self.__start_skew = None
+
+    def add_device(
+        self,
+        device: Union[Thread, Callable[[], Thread]],
+        addr: Optional[str] = None,
+        name: Optional[str] = None,
+    ) -> None:
+        """
+        Add a device to the group, invoke it before `connect()`.
+
+        Args:
+            device: a device instance, e.g. `iRecorder("USB32")`, or a callable returning a connected device,
+                e.g. `lambda: iFocus(port)`, which will be invoked in parallel in `connect()`.
+            addr: device address passed to `connect_device()`, only required for `iRecorder`.
+            name: name used in `get_dev_info()` and `get_metrics()`, defaults to device type with index.
+
+        Raises:
+            Exception: if group acquisition already started.
+        """
+        if self.__running:
+            raise Exception("Group acquisition in progress, please stop first.")
+        self.__members.append(_member(device, addr, name))
+
+    def connect(self) -> None:
+        """
+        Connect all devices in parallel, block until all connections are established or any failed.
+
+        Raises:
+            Exception: if any device connection failed, connected devices will be closed.
+        """
+        errors = []
+
+        def connect(member: _member):
+            try:
+                if not isinstance(member.device, Thread):
+                    member.device = member.device()
+                if member.addr is not None:
+                    member.device.connect_device(member.addr)
+                member.describe()
+            except Exception as e:
+                traceback.print_exc()
+                errors.append(e)
+
+        self.__run_parallel(connect)
+        if errors:
+            self.close_dev()
+            raise Exception(f"Device connection failed: {errors[0]}")
+        for i, member in enumerate(self.__members):
+            if member.name is None:
+                member.name = f"{member.type}_{i}"
+        if self.__fs is None:
+            self.__fs = max(member.fs for member in self.__members)
+
+    def get_dev_info(self) -> dict:
+        """
+        Get merged stream information.
+
+        Returns:
+            A dictionary containing:
+                `fs`: sample frequency of the merged stream in Hz;
+                `ch_info`: column index and `<device name>:<channel name>` mapping of merged blocks;
+                `devices`: per device `type`, `fs` and column slice in merged blocks.
+        """
+        ch_info, devices, offset = {}, {}, 0
+        for member in self.__members:
+            for label in member.labels:
+                ch_info[len(ch_info)] = f"{member.name}:{label}"
+            devices[member.name] = {
+                "type": member.type,
+                "fs": member.fs,
+                "columns": (offset, offset + len(member.labels)),
+            }
+            offset += len(member.labels)
+        return {"fs": self.__fs, "ch_info": ch_info, "devices": devices}
+
+    def add_sink(self, sink: Callable[[np.ndarray, np.ndarray], None]) -> None:
+        """
+        Register a function invoked with every merged block, e.g. an LSL or file writer.
+
+        Args:
+            sink: called as `sink(data, timestamps)` on the merge thread, `data` is in shape
+                `(block_size, channels)` and `timestamps` are host `time.perf_counter()` seconds.
+        """
+        self.__sinks.append(sink)
+
+    def remove_sink(self, sink: Callable[[np.ndarray, np.ndarray], None]) -> None:
+        """Unregister a function added by `add_sink()`."""
+        if sink in self.__sinks:
+            self.__sinks.remove(sink)
+
+    def start_acquisition_data(self) -> None:
+        """
+        Start data acquisition on all devices, start commands are released at the same moment
+            from one thread per device, block until all devices started or any failed.
+
+        Raises:
+            Exception: if any device failed to start, all devices will be stopped.
+        """
+        if self.__running:
+            return
+        for member in self.__members:
+            member.clear()
+        barrier = Barrier(len(self.__members))
+        errors = []
+
+        def start(member: _member):
+            barrier.wait()
+            try:
+                member.device.start_acquisition_data()
+                # after the command returned, its latency differs among device types
+                member.start_time = time.perf_counter()
+            except Exception as e:
+                errors.append(e)
+
+        self.__run_parallel(start)
+        if errors:
+            self.stop_acquisition()
+            raise Exception(f"Device acquisition failed to start: {errors[0]}")
+        starts = [member.start_time for member in self.__members]
+        self.__start_skew = max(starts) - min(starts)
+        self.__grid = None
+        self.__blocks = 0
+        self.__stalls = 0
+        self.__running = True
+        self.__threads = [
+            Thread(target=self.__read, args=(member,), daemon=True)
+            for member in self.__members
+        ]
+        self.__threads.append(Thread(target=self.__merge, daemon=True))
+        for thread in self.__threads:
+            thread.start()
+
+    def get_data(
+        self, timeout: Optional[float] = 0.02
+    ) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """
+        Acquire all available merged data.
+
+        Args:
+            timeout: Non-negative value, blocks at most `timeout` seconds and return, if set to `None`, blocks until new data is available.
+
+        Returns:
+            A tuple of `data` in shape `(samples, channels)` and `timestamps` in shape `(samples,)`,
+                or `None` if no data available. Columns are described by `get_dev_info()["ch_info"]`,
+                columns of a device lagging more than `max_delay` seconds are `nan`.
+        """
+        try:
+            blocks = [self.__save_data.get(timeout=timeout)]
+        except queue.Empty:
+            return
+        while not self.__save_data.empty():
+            blocks.append(self.__save_data.get())
+        data = np.concatenate([block[0] for block in blocks])
+        timestamps = np.concatenate([block[1] for block in blocks])
+        return data, timestamps
+
+    def get_metrics(self) -> dict:
+        """
+        Get aggregated acquisition metrics.
+
+        Returns:
+            A dictionary containing:
+                `start_skew_ms`: spread among devices of the time their start command returned;
+                `blocks`: merged blocks delivered;
+                `stalls`: blocks delivered with a lagging device filled with `nan`;
+                `drops`: total packet drop times reported by devices;
+                `devices`: per device `samples`, estimated `rate`, `latency_ms`, `max_latency_ms` and `drops`.
+        """
+        devices, total = {}, 0
+        for member in self.__members:
+            drops = member.drops()
+            total += drops or 0
+            devices[member.name] = {
+                "samples": member.model.count,
+                "rate": member.model.rate,
+                "latency_ms": member.model.latency * 1000,
+                "max_latency_ms": member.max_latency * 1000,
+                "drops": drops,
+            }
+        skew = self.__start_skew
+        return {
+            "start_skew_ms": None if skew is None else skew * 1000,
+            "blocks": self.__blocks,
+            "stalls": self.__stalls,
+            "drops": total,
+            "devices": devices,
+        }
+
+    def stop_acquisition(self) -> None:
+        """
+        Stop data acquisition on all devices.
+        """
+        self.__running = False
+        with self.__cond:
+            self.__cond.notify_all()
+        for thread in self.__threads:
+            thread.join()
+        self.__threads = []
+        for member in self.__members:
+            if isinstance(member.device, Thread) and member.device.is_alive():
+                try:
+                    member.device.stop_acquisition()
+                except Exception:
+                    traceback.print_exc()
+
+    def close_dev(self) -> None:
+        """
+        Close all device connections and release resources.
+        """
+        self.stop_acquisition()
+        for member in self.__members:
+            if isinstance(member.device, Thread):
+                try:
+                    member.device.close_dev()
+                except Exception:
+                    traceback.print_exc()
+
+    def __run_parallel(self, target: Callable[[_member], None]):
+        threads = [
+            Thread(target=target, args=(member,), daemon=True)
+            for member in self.__members
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def __read(self, member: _member):
+        while self.__running:
+            try:
+                frames = member.device.get_data(timeout=0.05)
+            except Exception:
+                traceback.print_exc()
+                break
+            if frames is None or len(frames) == 0:
+                continue
+            arrival = time.perf_counter()  # only used by devices without receive time
+            block = member.to_block(frames)
+            with self.__cond:
+                member.append(block, arrival)
+                self.__cond.notify()
+
+    def __merge(self):
+        while self.__running:
+            with self.__cond:
+                self.__cond.wait(timeout=0.1)
+                blocks = self.__collect()
+            for data, timestamps in blocks:
+                self.__save_data.put((data, timestamps))
+                for sink in self.__sinks[:]:
+                    try:
+                        sink(data, timestamps)
+                    except Exception:
+                        traceback.print_exc()
+
+    def __collect(self) -> list:
+        members = self.__members
+        if any(not len(member.buffer) for member in members):
+            return []
+        if self.__grid is None:
+            self.__grid = max(member.time_of(member.first_index) for member in members)
+        blocks = []
+        while True:
+            ts = self.__grid + np.arange(self.__block_size) / self.__fs
+            latest = [member.last_time() for member in members]
+            if ts[-1] > min(latest):
+                if max(latest) - ts[-1] < self.__max_delay:
+                    break
+                self.__stalls += 1
+            data = np.concatenate([member.sample(ts) for member in members], axis=1)
+            blocks.append((data, ts))
+            self.__grid = ts[-1] + 1 / self.__fs
+            self.__blocks += 1
+        return blocks
@@ -0,0 +1,474 @@
+import os
+import queue
+import select
+import struct
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from platform import system
+from queue import Queue
+from threading import Condition, Event, Lock, Thread
+from typing import Callable, Optional
+
+
+def _serial_number(port) -> list:
+    return (port.serial_number or "").lower().split("_")
+
+
+def _irecorder_usb(port, chs: int) -> Optional[str]:
+    if not (port.vid == 0x0483 and port.pid == 0x5740):
+        return
+    serial_number = _serial_number(port)
+    prefix = {8: "ir1", 16: "ir2"}
+    if chs in prefix and serial_number[0] != prefix[chs]:
+        return
+    if chs == 32 and serial_number[0] in prefix.values():
+        return
+    return f"iRe{chs}-{(port.serial_number or '').split('_')[-1]}"
+
+
+def _ifocus(port) -> Optional[str]:
+    serial_number = (port.serial_number or "").lower()
+    ftdi = "FTDI" in (port.manufacturer or "") and "ifocus" in serial_number
+    if ftdi or (port.vid == 0x2FE3 and port.pid == 0x0001):
+        return port.device
+
+
+def _econalpha(port) -> Optional[str]:
+    if port.vid == 0x2FE3 and port.pid == 0x0001:
+        return port.device
+
+
+def _trigger_wired(port) -> Optional[str]:
+    if port.vid == 0x0483 and port.pid == 0x5740:
+        return port.device
+
+
+def _trigger_wireless(port) -> Optional[str]:
+    if port.vid == 0x0403 and port.pid == 0x6001:
+        return port.device
+
+
+def _light_stimulator(port) -> Optional[str]:
+    if port.vid == 0x0403 and port.pid == 0x6001:
+        if port.serial_number in ["LIGHTSTIMA", "LIGHTSTIM"]:
+            return port.device
+
+
+# device type: (transport, matcher returning device name or None, open port to probe)
+RULES = {
+    "USB8": ("serial", lambda port: _irecorder_usb(port, 8), False),
+    "USB16": ("serial", lambda port: _irecorder_usb(port, 16), False),
+    "USB32": ("serial", lambda port: _irecorder_usb(port, 32), False),
+    "iFocus": ("serial", _ifocus, True),
+    "DFocus": ("serial", _ifocus, True),
+    "eConAlpha": ("serial", _econalpha, True),
+    "triggerBoxWired": ("serial", _trigger_wired, False),
+    "triggerBoxWireless": ("serial", _trigger_wireless, False),
+    "lightStimulator": ("serial", _light_stimulator, False),
+    "iSense": ("usb", None, False),
+    "W32": ("wifi", None, False),
+}
+
+
+def probe_ports(ports: list, **kwargs) -> list:
+    """
+    Open and close serial ports concurrently, return the ports that can be opened, in the given order.
+
+    Ports are opened with `exclusive=True`, so ports held by devices of this package, which lock
+        them the same way, are reported busy on POSIX systems as well.
+
+    Args:
+        ports: serial port names.
+        kwargs: extra arguments passed to `serial.Serial`.
+    """
+    from serial import Serial, serialutil
+
+    kwargs.setdefault("exclusive", True)
+
+    def probe(port):
+        try:
+            Serial(port=port, timeout=1, **kwargs).close()
+            return True
+        except serialutil.SerialException:
+            return False
+
+    if not ports:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(ports), 16)) as pool:
+        available = list(pool.map(probe, ports))
+    return [port for port, ok in zip(ports, available) if ok]
+
+
+class deviceRegistry:
+    """
+    Process-wide registry of serial devices keyed by VID/PID/serial number.
+    Ports are enumerated once, later changes come from inotify notifications on `/dev` under Linux,
+    or from polling `comports()` elsewhere. Ports of device types that need it are probed when they
+    appear and on `refresh()`, lookups return the cached result.
+    A process-wide instance is available as `eConEXG.utils.discovery.registry`.
+    """
+
+    def __init__(self, poll_interval: float = 1.0):
+        self.poll_interval = poll_interval
+        self.hotplug: Optional[str] = None  # "inotify" or "polling" once started
+        self.__start_lock = Lock()
+        self.__lock = Lock()
+        self.__changed = Condition(self.__lock)
+        self.__entries = {}
+        self.__ports = []
+        self.__callbacks = []
+        self.__thread = None
+
+    def start(self) -> None:
+        """Enumerate devices and start watching hot-plug events, invoked on first access."""
+        with self.__start_lock:
+            if self.__thread is not None:
+                return
+            self.refresh(reprobe=False)
+            self.__thread = Thread(target=self.__watch, daemon=True)
+            self.__thread.start()
+
+    def ports(self) -> list:
+        """Current `serial.tools.list_ports.comports()` result."""
+        self.start()
+        with self.__lock:
+            return self.__ports[:]
+
+    def devices(self, dev_type: Optional[str] = None) -> list[dict]:
+        """
+        Registered devices, ports are not probed again, see `refresh()`.
+
+        Args:
+            dev_type: only return devices matching this device type of `RULES`.
+
+        Returns:
+            A list of dictionaries with `key`, `device`, `vid`, `pid`, `serial_number`,
+                `types` mapping matched device types to device names, and `available`
+                telling whether the port could be opened when it was last probed.
+        """
+        self.start()
+        with self.__lock:
+            entries = [
+                e
+                for e in self.__entries.values()
+                if dev_type is None or dev_type in e["types"]
+            ]
+            return [dict(e) for e in entries]
+
+    def add_callback(
+        self,
+        on_add: Optional[Callable[[dict], None]] = None,
+        on_remove: Optional[Callable[[dict], None]] = None,
+    ) -> None:
+        """
+        Register hot-plug callbacks, invoked on the watcher thread with the device dictionary
+            described in `devices()`.
+        """
+        self.__callbacks.append((on_add, on_remove))
+        self.start()
+
+    def remove_callback(
+        self,
+        on_add: Optional[Callable[[dict], None]] = None,
+        on_remove: Optional[Callable[[dict], None]] = None,
+    ) -> None:
+        """Unregister callbacks added by `add_callback()`."""
+        if (on_add, on_remove) in self.__callbacks:
+            self.__callbacks.remove((on_add, on_remove))
+
+    def wait_change(self, timeout: Optional[float] = None) -> None:
+        """Block until devices are added or removed, or `timeout` seconds elapsed."""
+        with self.__changed:
+            self.__changed.wait(timeout)
+
+    def refresh(self, reprobe: bool = True) -> None:
+        """
+        Enumerate ports, probe new ones and dispatch changes, called by the watcher on hot-plug
+            events.
+
+        Args:
+            reprobe: probe known ports again as well, e.g. to find a port that was busy when
+                it was plugged in.
+        """
+        from serial.tools.list_ports import comports
+
+        ports = comports()
+        current = {self.__key(port): port for port in ports}
+        with self.__lock:
+            added = [key for key in current if key not in self.__entries]
+            removed = [
+                self.__entries.pop(k) for k in list(self.__entries) if k not in current
+            ]
+            known = list(self.__entries.values()) if reprobe else []
+        added = [self.__entry(key, current[key]) for key in added]
+        self.__probe(added + known)  # unlocked
+        with self.__changed:
+            for entry in added:
+                self.__entries[entry["key"]] = entry
+            self.__ports = ports
+            if added or removed:
+                self.__changed.notify_all()
+        for callback in self.__callbacks[:]:
+            for entry in added:
+                self.__dispatch(callback[0], entry)
+            for entry in removed:
+                self.__dispatch(callback[1], entry)
+
+    @staticmethod
+    def __key(port) -> tuple:
+        return (port.vid, port.pid, port.serial_number or port.device)
+
+    def __probe(self, entries: list[dict]):
+        entries = [e for e in entries if any(RULES[t][2] for t in e["types"])]
+        available = set(probe_ports([e["device"] for e in entries]))
+        with self.__lock:
+            for entry in entries:
+                entry["available"] = entry["device"] in available
+
+    @staticmethod
+    def __entry(key, port) -> dict:
+        types = {}
+        for dev_type, (transport, matcher, _) in RULES.items():
+            if transport != "serial":
+                continue
+            name = matcher(port)
+            if name is not None:
+                types[dev_type] = name
+        return {
+            "key": key,
+            "device": port.device,
+            "vid": port.vid,
+            "pid": port.pid,
+            "serial_number": port.serial_number,
+            "types": types,
+            "available": True,
+        }
+
+    @staticmethod
+    def __dispatch(callback, entry):
+        if callback is None:
+            return
+        try:
+            callback(dict(entry))
+        except Exception:
+            traceback.print_exc()
+
+    def __watch(self):
+        fd = self.__inotify()
+        self.hotplug = "polling" if fd is None else "inotify"
+        while True:
+            try:
+                if fd is None:
+                    time.sleep(self.poll_interval)
+                elif not self.__tty_event(fd):
+                    continue
+                self.refresh(reprobe=False)
+            except Exception:
+                traceback.print_exc()
+                time.sleep(self.poll_interval)
+
+    @staticmethod
+    def __inotify() -> Optional[int]:
+        if system() != "Linux":
+            return
+        import ctypes
+
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init()
+            if fd < 0:
+                return
+            if libc.inotify_add_watch(fd, b"/dev", 0x100 | 0x200) < 0:  # CREATE|DELETE
+                os.close(fd)
+                return
+            return fd
+        except (OSError, AttributeError):
+            return
+
+    @staticmethod
+    def __tty_event(fd) -> bool:
+        select.select([fd], [], [])
+        relevant = False
+        while select.select([fd], [], [], 0.2)[0]:  # debounce until udev settles
+            buffer = os.read(fd, 4096)
+            offset = 0
+            while offset < len(buffer):
+                length = struct.unpack_from("iIII", buffer, offset)[3]
+                name = buffer[offset + 16 : offset + 16 + length].rstrip(b"\0")
+                relevant |= name.startswith(b"tty")
+                offset += 16 + length
+        return relevant
+
+
+class deviceDiscovery:
+    """
+    Scan serial, USB and Wi-Fi transports concurrently, serial devices come from `registry`,
+    USB and Wi-Fi results are cached per transport.
+    A process-wide instance is available as `eConEXG.utils.discovery.discovery`.
+    """
+
+    ttl = {"usb": 1.0, "wifi": 10.0}
+
+    def __init__(self):
+        self.__lock = Lock()
+        self.__cache = {}  # transport: (timestamp, results)
+        self.__wifi = {}  # ssid: bssid, accumulated by the Wi-Fi search thread
+
+    def scan(self, dev_types: Optional[list] = None, timeout: float = 3) -> list[dict]:
+        """
+        Scan all transports required by `dev_types` concurrently.
+
+        Args:
+            dev_types: device types as keys of `RULES`, defaults to all.
+            timeout: seconds to wait for slow transports, e.g. Wi-Fi.
+
+        Returns:
+            A list of found devices, each as a dictionary with `type`, `transport`, `name` and `addr`,
+                `name` is the value passed to `connect_device()` or device constructors.
+        """
+        if dev_types is None:
+            dev_types = list(RULES.keys())
+        found = Queue()
+        stop = Event()
+        threads = self.__watch_all(dev_types, found, stop, once=True)
+        deadline = time.perf_counter() + timeout
+        for thread in threads:
+            thread.join(max(deadline - time.perf_counter(), 0))
+        stop.set()
+        ret = []
+        while not found.empty():
+            dev = found.get()
+            if dev not in ret:
+                ret.append(dev)
+        return ret
+
+    def find_first(self, dev_type: str, timeout: float = 5) -> dict:
+        """
+        Return the first available device of `dev_type` as soon as it appears on any transport.
+
+        Args:
+            dev_type: device type as key of `RULES`.
+            timeout: seconds to wait for a device to appear, `0` to only look at devices already
+                present, e.g. cached by the registry, without waiting.
+
+        Returns:
+            A dictionary with `type`, `transport`, `name` and `addr`.
+
+        Raises:
+            Exception: if no device found within `timeout` seconds.
+        """
+        if dev_type not in RULES:
+            raise ValueError(f"Unsupported device type: {dev_type}")
+        found = Queue()
+        stop = Event()
+        if timeout <= 0:
+            stop.set()  # watchers make a single pass
+        threads = self.__watch_all([dev_type], found, stop, once=False)
+        try:
+            if stop.is_set():
+                for thread in threads:
+                    thread.join()
+            return found.get(timeout=max(timeout, 0))
+        except queue.Empty:
+            raise Exception(f"{dev_type} device not found")
+        finally:
+            stop.set()
+
+    def __cached(self, transport, scanner, max_age=None):
+        if max_age is None:
+            max_age = self.ttl[transport]
+        with self.__lock:
+            cached = self.__cache.get(transport)
+        if cached is not None and time.perf_counter() - cached[0] <= max_age:
+            return cached[1]
+        results = scanner()
+        with self.__lock:
+            self.__cache[transport] = (time.perf_counter(), results)
+        return results
+
+    def __watch_all(self, dev_types, found, stop, once):
+        transports = {}
+        for dev_type in dev_types:
+            transports.setdefault(RULES[dev_type][0], []).append(dev_type)
+        watchers = {
+            "serial": self.__watch_serial,
+            "usb": self.__watch_usb,
+            "wifi": self.__watch_wifi,
+        }
+        threads = []
+        for transport, types in transports.items():
+            thread = Thread(
+                target=watchers[transport],
+                args=(types, found, stop, once),
+                daemon=True,
+            )
+            thread.start()
+            threads.append(thread)
+        return threads
+
+    def __watch_serial(self, dev_types, found, stop, once):
+        reported = set()
+        while True:
+            for dev_type in dev_types:
+                for entry in registry.devices(dev_type):
+                    if not entry["available"] or (dev_type, entry["key"]) in reported:
+                        continue
+                    reported.add((dev_type, entry["key"]))
+                    name = entry["types"][dev_type]
+                    found.put(self.__info(dev_type, "serial", name, entry["device"]))
+            if once or stop.is_set():
+                return
+            registry.wait_change(0.1)
+
+    def __watch_usb(self, dev_types, found, stop, once):
+        try:
+            from ..iSense.dev_socket import iSenseUSB
+        except ImportError:
+            return  # pyusb not installed
+        while True:
+            devs = self.__cached("usb", iSenseUSB._find_devs, None if once else 0.2)
+            for addr in devs:
+                found.put(self.__info("iSense", "usb", addr, addr))
+            if once or devs or stop.is_set():
+                return
+            stop.wait(0.2)
+
+    def __watch_wifi(self, dev_types, found, stop, once):
+        from ..iRecorder.physical_interface import get_interface
+
+        with self.__lock:
+            cached = self.__cache.get("wifi")
+        if cached is not None and time.perf_counter() - cached[0] <= self.ttl["wifi"]:
+            for ssid, bssid in cached[1].items():
+                found.put(self.__info("W32", "wifi", ssid, bssid))
+            return
+        if stop.is_set():
+            return
+        results = Queue()
+        try:
+            interface = get_interface("W32", results)
+        except Exception as e:
+            print(f"Wi-Fi discovery unavailable: {e}")
+            return
+        interface.start()
+        while not stop.is_set():
+            try:
+                info = results.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if not isinstance(info, list):
+                continue
+            with self.__lock:
+                self.__wifi[info[0]] = info[1]
+                self.__cache["wifi"] = (time.perf_counter(), dict(self.__wifi))
+            found.put(self.__info("W32", "wifi", info[0], info[1]))
+        interface.stop()
+
+    @staticmethod
+    def __info(dev_type, transport, name, addr) -> dict:
+        return {"type": dev_type, "transport": transport, "name": name, "addr": addr}
+
+
+registry = deviceRegistry()
+discovery = deviceDiscovery()
@@ -0,0 +1,672 @@
+import time
+from collections import deque
+from queue import Queue
+from typing import TYPE_CHECKING, Callable, Optional, Union
+
+import numpy as np
+
+from .gaps import fill_gaps
+from .markers import markerLog
+from .profiler import stageProfiler
+from .reader import socketReader
+from .subscriber import blockSubscriber
+
+if TYPE_CHECKING:
+    from .dsp import dspPipeline
+    from .epochs import epochExtractor
+    from .spectrum import spectralEngine
+    from .streaming import streamServer
+
+
+class frameDispatcher:
+    def __init__(self, name: str, parser, recv: Callable[[], bytes], fs: float):
+        """
+        Receive side shared by all devices, for frames made up of channel values and the trigger in the
+            last column, `int32` arrays in raw mode, see `nestedDispatcher` for frames packing the
+            EXG samples of a packet with an IMU row.
+
+        `step()` reads a chunk from the transport, `handle()` records and parses it, resolves software
+            markers and filled gaps to sample indexes, and passes the data through the pipeline to
+            spectrum, epochs, queue or update function, subscribers, BDF file, LSL streams and stream
+            server. Outputs are attributes set by the device, `None` when not in use.
+
+        Args:
+            name: device name, used for profiler, reader and subscriber thread names.
+            parser: device parser, with `parse_data()`, `raw`, `scale`, `gap_fill`, `gaps` and `stats`.
+            recv: transport read, see `socketReader`.
+            fs: sample frequency in Hz, updated by `start()`.
+        """
+        self.name = name
+        self.parser = parser
+        self.profiler = stageProfiler(name)
+        self.reader = socketReader(recv, f"{name} reader", profiler=self.profiler)
+        self.raw = False  # requested by the device, applied to the parser by start()
+        self.fs = float(fs)
+        self.markers = markerLog(fs)
+        self.gaps = deque(maxlen=4096)
+        self.outage: Optional[float] = None  # time the connection dropped
+        self.capture = None
+        self.queue: Optional[Queue] = None
+        self.update: Optional[Callable[[np.ndarray], None]] = None
+        self.pipeline = None  # dspPipeline and targets
+        self.spectrum = None
+        self.epochs = None
+        self.stream = None
+        self.subscribers: list[blockSubscriber] = []
+        self.bdf = None
+        self.lsl = None
+        self.lsl_columns: Optional[list[int]] = None
+        self.lsl_marker = None
+
+    def start(self, fs: float, columns: int, info: dict) -> None:
+        """
+        Apply raw mode, bind pipeline, spectrum and epochs, reset markers, gaps, counters and subscribers,
+            invoked by the receive thread when acquisition starts.
+
+        Args:
+            fs: sample frequency in Hz.
+            columns: columns of the data passed to the pipeline.
+            info: device information sent to stream server clients.
+        """
+        self.fs = float(fs)
+        self.parser.raw = self.raw
+        self.outage = None
+        self._bind(columns)
+        self.markers.reset(fs)
+        self.parser.stats.reset()
+        self.gaps.clear()
+        for subscriber in self.subscribers:
+            subscriber.reset()
+        if self.stream is not None:
+            self.stream.set_info(info)
+
+    def step(self) -> None:
+        """Read and handle a chunk, one iteration of the receive loop."""
+        self.profiler.begin()
+        data, arrival = self.reader.get()
+        self.handle(data, arrival)
+
+    def handle(self, data: bytes, arrival: float) -> None:
+        """
+        Handle a received chunk.
+
+        Args:
+            data: received bytes.
+            arrival: `time.perf_counter()` receive time.
+
+        Raises:
+            Exception: if `data` is empty.
+        """
+        capture = self.capture
+        if capture is not None:
+            capture.write(data, arrival)
+        self.profiler.mark("recv")
+        if not data:
+            raise Exception("Remote end closed.")
+        ret = self.parser.parse_data(data)
+        self.parser.stats.add_block(len(data), time.perf_counter() - arrival)
+        self.profiler.mark("parse")
+        if ret is None:
+            return
+        gaps = []
+        if self.outage is not None:
+            ret, gaps = self.__fill_outage(ret, arrival)
+        samples = self._samples(ret)
+        if not samples:
+            return
+        markers = self.markers.update(samples, arrival)
+        gaps += self.__log_gaps(samples)
+        self._push(ret)
+        if markers:
+            self.__write_markers(markers)
+        if gaps:
+            self.__write_gaps(gaps)
+
+    def check_pipeline(self, pipeline: "dspPipeline", targets: set) -> None:
+        """Raise if the data layout doesn't allow `pipeline` for `targets`."""
+        if pipeline.decimation > 1 and "bdf" in targets:
+            raise Exception(
+                "BDF file is saved at full rate, remove 'bdf' from targets."
+            )
+
+    def decimation(self, target: str) -> int:
+        """Decimation factor of the pipeline for `target`, `1` if it receives full rate data."""
+        pipeline = self.pipeline
+        if pipeline is None or target not in pipeline[1]:
+            return 1
+        return pipeline[0].decimation
+
+    def scale(self) -> Union[np.ndarray, tuple]:
+        """Copy of the scale factors of the parser."""
+        return self.parser.scale.copy()
+
+    def raw_format(self, scales: np.ndarray) -> dict:
+        """LSL stream options of `int32` samples in raw mode."""
+        if not self.parser.raw:
+            return {}
+        from pylsl import cf_int32
+
+        return {"precision": cf_int32, "scales": scales}
+
+    def subscribe(
+        self,
+        callback: Callable[[np.ndarray], None],
+        block_size: int,
+        dtype: Optional[np.dtype],
+        policy: str,
+        max_pending: int,
+    ) -> blockSubscriber:
+        subscriber = blockSubscriber(
+            callback, block_size, dtype, policy, max_pending, f"{self.name} subscriber"
+        )
+        subscriber.start()
+        self.subscribers = self.subscribers + [subscriber]
+        return subscriber
+
+    def unsubscribe(self, subscriber: blockSubscriber) -> None:
+        self.subscribers = [s for s in self.subscribers if s is not subscriber]
+        subscriber.close()
+
+    def get_gaps(self) -> list[dict]:
+        ret = []
+        while self.gaps:
+            ret.append(self.gaps.popleft())
+        return ret
+
+    def close(self) -> None:
+        """Close the capture file and stop subscribers, invoked when the device closes."""
+        capture, self.capture = self.capture, None
+        if capture is not None:
+            capture.close()
+        for subscriber in self.subscribers:
+            subscriber.close()
+
+    def _bind(self, columns: int):
+        fs = self.fs / self.decimation("queue")
+        if self.pipeline is not None:
+            self.pipeline[0].bind(self.fs, columns, (-1,))
+        if self.spectrum is not None:
+            self.spectrum.bind(fs, columns, (-1,))
+        if self.epochs is not None:
+            self.epochs.bind(fs, columns)
+
+    def _samples(self, ret) -> int:
+        return len(ret)
+
+    def _push(self, ret):
+        # outputs are read once, devices may close them from other threads
+        spectrum, epochs, subscribers = self.spectrum, self.epochs, self.subscribers
+        bdf, lsl, columns, stream = self.bdf, self.lsl, self.lsl_columns, self.stream
+        outs = self.__run_pipeline(ret)
+        frames = outs.get("queue", ret)
+        if self.parser.raw:  # scaled data for file, spectrum and epochs
+            outs = dict.fromkeys(("bdf", "spectrum"), ret * self.parser.scale)
+        if spectrum is not None:
+            spectrum.feed(outs.get("spectrum", frames))
+        if epochs is not None:
+            epochs.feed(outs.get("spectrum", frames))
+        self.profiler.mark("dsp")
+        if self.queue is not None:
+            if len(frames):
+                self.queue.put(frames)
+        elif self.update is not None:
+            array = np.asarray(frames)
+            if array.size > 0:
+                self.update(array)
+        for subscriber in subscribers:
+            subscriber.feed(frames)
+        self.profiler.mark("queue")
+        if bdf is not None:
+            bdf.write_chunk(outs.get("bdf", ret))
+        self.profiler.mark("bdf")
+        chunk = outs.get("lsl", ret)
+        if lsl is not None and len(chunk):
+            if columns is not None:
+                chunk = np.asarray(chunk)[:, columns].tolist()
+            lsl.push_chunk(chunk)
+        self.profiler.mark("lsl")
+        if stream is not None:
+            stream.publish(outs.get("lsl", ret))
+        self.profiler.mark("stream")
+
+    def __run_pipeline(self, ret: list) -> dict:
+        pipeline = self.pipeline
+        if pipeline is None:
+            return {}
+        out = pipeline[0].process(np.asarray(ret, dtype=float)).tolist()
+        return dict.fromkeys(pipeline[1], out)
+
+    def __fill_outage(self, ret, arrival: float) -> tuple:
+        """Insert samples missed since the connection dropped in front of the first chunk after it."""
+        self.outage = None
+        model = self.markers.model
+        if model.offset is None or not len(ret):  # dropped before any sample
+            return ret, []
+        expected = (arrival - model.latency - model.offset) * model.rate
+        missing = int(round(expected)) - model.count - len(ret)
+        if missing <= 0:
+            return ret, []
+        mode = self.parser.gap_fill
+        if mode is None or (mode == "nan" and self.parser.raw):
+            mode = "zero"
+        data = np.asarray(ret) if self.parser.raw else np.asarray(ret, dtype=float)
+        lost = np.zeros(len(data), dtype=int)
+        lost[0] = missing
+        filled = fill_gaps(data, lost, mode)
+        filled[:missing, -1] = 0  # no trigger in inserted samples
+        # gaps of the parser are counted from the start of the received chunk
+        self.parser.gaps = [(o + missing, n) for o, n in self.parser.gaps]
+        gaps = [{"index": model.count, "length": missing}]
+        self.gaps.extend(gaps)
+        return (filled if self.parser.raw else filled.tolist()), gaps
+
+    def __log_gaps(self, samples: int) -> list[dict]:
+        if self.parser.gap_fill is None or not self.parser.gaps:
+            return []
+        # index of the first sample of this chunk
+        start = self.markers.model.count - samples
+        gaps = [
+            {"index": start + offset, "length": length}
+            for offset, length in self.parser.gaps
+        ]
+        self.gaps.extend(gaps)
+        return gaps
+
+    def __write_gaps(self, gaps: list[dict]):
+        bdf = self.bdf
+        if bdf is None:
+            return
+        position = bdf._data_position - self.markers.model.count
+        for gap in gaps:
+            bdf.write_marker(
+                max(position + gap["index"], 0), "gap", gap["length"] / self.fs
+            )
+
+    def __write_markers(self, markers: list[dict]):
+        bdf = self.bdf
+        if bdf is not None:
+            # file position of the first sample of the stream
+            position = bdf._data_position - self.markers.model.count
+            for marker in markers:
+                bdf.write_marker(max(position + marker["index"], 0), marker["label"])
+        lsl_marker = self.lsl_marker
+        if lsl_marker is not None:
+            for marker in markers:
+                lsl_marker.push_marker(marker["label"], marker["timestamp"])
+
+
+class dispatchMixin:
+    """
+    Public methods of devices configuring the outputs of their `frameDispatcher`.
+
+    Devices set `_dispatch` and implement `_check_idle()`, raising if acquisition is in progress.
+        `_targets` lists the outputs a pipeline can be applied to.
+    """
+
+    _dispatch: frameDispatcher
+    _targets = ("queue", "lsl", "bdf")
+
+    def _check_idle(self) -> None:
+        raise NotImplementedError
+
+    def _capture_info(self) -> dict:
+        return self.get_dev_info()
+
+    def set_pipeline(
+        self,
+        pipeline: Optional["dspPipeline"] = None,
+        targets: tuple = ("queue", "lsl"),
+    ) -> None:
+        """
+        Process signal data by a `dspPipeline` before it reaches selected outputs, invoke it before `start_acquisition_data()`.
+
+        Args:
+            pipeline: filters, reference and decimation to apply, the trigger channel and IMU data are passed through,
+                `None` to remove. Frames of iFocus, DFocus and eConAlpha pack EXG and IMU data and can't be decimated.
+            targets: outputs receiving processed data, any of `"queue"` (`get_data()`, update function and subscribers),
+                `"lsl"` and `"bdf"` if the device saves BDF files, other outputs keep receiving raw data.
+
+        Raises:
+            Exception: if data acquisition in progress, raw mode enabled, `"nan"` gap fill set,
+                or decimation is requested for BDF output or frames packing IMU data.
+            ValueError: if targets are not supported by the device.
+        """
+        self._check_idle()
+        targets = set(targets)
+        if not targets <= set(self._targets):
+            names = [f"'{target}'" for target in self._targets]
+            raise ValueError(
+                f"Targets should be {', '.join(names[:-1])} or {names[-1]}."
+            )
+        dispatch = self._dispatch
+        if pipeline is not None:
+            if dispatch.parser.gap_fill == "nan":
+                raise Exception(
+                    "Filter states can't recover from nan, use set_gap_fill('linear')."
+                )
+            if dispatch.raw:
+                raise Exception("Raw mode enabled, please set_raw_mode(False) first.")
+            dispatch.check_pipeline(pipeline, targets)
+        dispatch.pipeline = None if pipeline is None else (pipeline, targets)
+
+    def set_raw_mode(self, raw: bool = True) -> None:
+        """
+        Deliver signal data as ADC counts instead of scaled values, invoke it before `start_acquisition_data()`.
+
+        In raw mode `get_data()` returns `int32` arrays as described there, the update function and subscribers
+            receive the same counts and LSL streams are opened with `int32` format, multiply data by
+            `get_scale()` to get values in the units described in `get_data()`.
+            BDF file, spectrum and epochs still receive scaled data.
+
+        Args:
+            raw: `True` to enable raw mode, `False` to restore float output.
+
+        Raises:
+            Exception: if data acquisition in progress or a pipeline is set.
+        """
+        self._check_idle()
+        if raw and self._dispatch.pipeline is not None:
+            raise Exception(
+                "Pipeline output is float, please set_pipeline(None) first."
+            )
+        self._dispatch.raw = bool(raw)
+
+    def get_scale(self) -> Union[np.ndarray, tuple[np.ndarray, np.ndarray]]:
+        """
+        Get scale factors converting raw counts to values, see `set_raw_mode()`.
+
+        Returns:
+            Scale factor of each column of a frame, in shape `(channels + 1,)`, `1` for the trigger box channel.
+                Scale factors of EXG channels and IMU channels for iFocus, DFocus and eConAlpha.
+        """
+        return self._dispatch.scale()
+
+    def set_gap_fill(self, mode: Optional[str] = "linear", max_gap: int = 255) -> None:
+        """
+        Conceal frames lost in transmission, invoke it before `start_acquisition_data()`.
+
+        Lost frames are counted from 8-bit frame sequence numbers and replaced by the same number of
+            inserted frames, so that sample indexes, BDF file time and LSL timing stay exact.
+            Inserted samples are reported by `get_gaps()` and written to BDF annotations.
+
+        Args:
+            mode: `"nan"` to insert `nan`, `"hold"` to repeat the last received sample, `"linear"` to
+                interpolate between samples around the gap, `None` to disable. Trigger channel is filled with `0`,
+                the IMU row of a lost frame is filled the same way as EXG samples, `nan` is replaced by `0` in raw mode.
+            max_gap: longest gap in frames to fill, longer gaps are left as is and only counted by `get_stats()`.
+
+        Raises:
+            Exception: if data acquisition in progress, or `"nan"` is requested with a pipeline set.
+            ValueError: if mode is not supported.
+        """
+        self._check_idle()
+        if mode is not None and mode not in ("nan", "hold", "linear"):
+            raise ValueError("Mode should be 'nan', 'hold', 'linear' or None.")
+        if mode == "nan" and self._dispatch.pipeline is not None:
+            raise Exception(
+                "Filter states can't recover from nan, use 'hold' or 'linear'."
+            )
+        self._dispatch.parser.gap_fill = mode
+        self._dispatch.parser.max_gap = int(max_gap)
+
+    def get_gaps(self) -> list[dict]:
+        """
+        Retrieve gaps filled by `set_gap_fill()` since last call.
+
+        Indexes and lengths count samples at the device sample rate, as received before `set_pipeline()`,
+            like BDF file and unprocessed outputs. Outputs decimated by the pipeline hold one sample
+            every `pipeline.decimation` samples, divide by it to index them.
+
+        Returns:
+            A list of dictionaries containing `index`: sample index of the first inserted sample counted
+                from `start_acquisition_data()`, EXG sample index for iFocus, DFocus and eConAlpha;
+                `length`: number of inserted samples. A validity mask of received samples is `False`
+                in `[index, index + length)` of each gap.
+        """
+        return self._dispatch.get_gaps()
+
+    def set_spectrum(self, engine: Optional["spectralEngine"] = None) -> None:
+        """
+        Compute spectrum of signal data in the receive thread, invoke it before `start_acquisition_data()`,
+            results are available through `get_spectrum()`.
+
+        Args:
+            engine: a `spectralEngine` instance, fed with the same data as `get_data()` without the trigger channel
+                and IMU data, `None` to remove.
+
+        Raises:
+            Exception: if data acquisition in progress.
+        """
+        self._check_idle()
+        self._dispatch.spectrum = engine
+
+    def get_spectrum(self) -> Optional[dict]:
+        """
+        Get the latest spectrum computed by the engine given to `set_spectrum()`, return immediately.
+
+        Returns:
+            Same as `spectralEngine.get_spectrum()`, `None` if no engine set or not enough data received.
+        """
+        spectrum = self._dispatch.spectrum
+        if spectrum is None:
+            return
+        return spectrum.get_spectrum()
+
+    def set_stream(self, server: Optional["streamServer"] = None) -> None:
+        """
+        Send data to remote clients of a `streamServer`, the same data as the LSL stream on stream `0`, the last column
+            is the trigger, EXG rows on stream `0` and IMU rows on stream `1` for iFocus, DFocus and eConAlpha.
+            Device information, sample frequency and scaling factors in raw mode are sent to clients when acquisition starts.
+
+        Args:
+            server: a started `streamServer` instance, `None` to stop sending.
+        """
+        self._dispatch.stream = server
+
+    def subscribe(
+        self,
+        callback: Callable[[np.ndarray], None],
+        block_size: int = 50,
+        dtype: Optional[np.dtype] = None,
+        policy: str = "drop_oldest",
+        max_pending: int = 16,
+    ) -> blockSubscriber:
+        """
+        Invoke a function with fixed-size blocks of data from a worker thread, see `blockSubscriber`.
+            Blocks hold the same rows as `get_data()`, channels and the trigger in the last column,
+            EXG samples in shape `(samples, exg_channels)` for iFocus, DFocus and eConAlpha,
+            processed by `set_pipeline()` targeting `"queue"`, raw counts in raw mode. Subscribers
+            work independently of `get_data()`.
+
+        Args:
+            callback: function invoked with each block in shape `(block_size, columns)`.
+            block_size: rows per block.
+            dtype: block data type, e.g. `np.float32`, `None` keeps `float64` values or `int32` raw counts.
+            policy: what happens once `max_pending` blocks wait for a slow callback, `"block"` waits in the
+                receive loop, `"drop_oldest"` drops a block, `"coalesce"` delivers queued blocks in one call.
+            max_pending: blocks queued for the callback.
+
+        Returns:
+            The started subscriber, pass it to `unsubscribe()` to stop it.
+
+        Raises:
+            ValueError: if arguments are invalid.
+        """
+        return self._dispatch.subscribe(
+            callback, block_size, dtype, policy, max_pending
+        )
+
+    def unsubscribe(self, subscriber: blockSubscriber) -> None:
+        """Stop a subscriber returned by `subscribe()` after its queued blocks are delivered."""
+        self._dispatch.unsubscribe(subscriber)
+
+    def create_capture_file(self, filename: str):
+        """
+        Record raw bytes received from the device with their receive time, until `close_capture_file()`
+            or `close_dev()`. The file can be replayed by passing `"replay:<filename>"` as the device address,
+            see `replaySocket`.
+
+        Args:
+            filename: file name to save raw bytes, accept absolute or relative path.
+
+        Raises:
+            Exception: if capture file already created.
+            OSError: if file creation failed.
+        """
+        if self._dispatch.capture is not None:
+            raise Exception("Capture file already created.")
+        from .capture import captureWriter
+
+        self._dispatch.capture = captureWriter(filename, self._capture_info())
+
+    def close_capture_file(self):
+        """
+        Close capture file manually, invoked automatically by `close_dev()`.
+        """
+        capture, self._dispatch.capture = self._dispatch.capture, None
+        if capture is not None:
+            capture.close()
+
+    def get_stats(self, fmt: Optional[str] = None) -> Union[dict, str]:
+        """
+        Get link quality counters of the current or last data acquisition, reset on `start_acquisition_data()`.
+
+        Args:
+            fmt: `None` for a dictionary, `"json"` or `"prometheus"` for serialized text.
+
+        Returns:
+            Same as `linkStats.get()` if `fmt` is `None`, otherwise `linkStats.export()`.
+        """
+        stats = self._dispatch.parser.stats
+        if fmt is None:
+            return stats.get()
+        return stats.export(fmt)
+
+    def set_reader_thread(
+        self,
+        enable: bool = True,
+        affinity: Optional[list[int]] = None,
+        priority: Optional[int] = None,
+    ) -> None:
+        """
+        Read the transport in a dedicated thread and tune the thread reading it, applied on the next acquisition start.
+
+        The reader thread blocks in the transport read, which releases the GIL, and queues received chunks
+            with their arrival time, so the transport is drained while the acquisition thread parses.
+            `affinity` and `priority` apply to the thread reading the transport: the reader thread if enabled,
+            otherwise the acquisition thread. Intervals between received chunks are profiled as the `arrival`
+            stage of `get_profile()`, compare its p99 and max with and without these options.
+
+        Args:
+            enable: `True` to read in a dedicated thread, `False` to read in the acquisition thread.
+            affinity: CPU cores to pin the reading thread to, Linux and Windows only.
+            priority: scheduling priority to request, `SCHED_FIFO` priority on Linux falling back to a nice
+                decrement, time critical priority on Windows, as far as permissions allow.
+
+        Raises:
+            Exception: if data acquisition in progress.
+        """
+        self._check_idle()
+        reader = self._dispatch.reader
+        self._dispatch.reader = socketReader(
+            reader.recv,
+            reader.name,
+            threaded=enable,
+            affinity=affinity,
+            priority=priority,
+            profiler=self._dispatch.profiler,
+        )
+
+    def set_profiling(self, enable: bool = True) -> None:
+        """
+        Enable timing of acquisition loop stages, timings are cleared when enabled.
+
+        Stages are `recv`: waiting for and reading data from the transport; `parse`: frame decoding;
+            `dsp`: pipeline, spectrum and epochs; `queue`: delivery to `get_data()`, update functions and subscribers;
+            `bdf`, `lsl` and `stream`: file, LSL and `set_stream()` sinks; `cycle`: a whole loop iteration;
+            `arrival`: interval between received chunks, see `set_reader_thread()`.
+
+        Args:
+            enable: `False` to stop timing, collected timings are kept.
+        """
+        profiler = self._dispatch.profiler
+        if enable:
+            profiler.reset()
+        profiler.enabled = enable
+
+    def get_profile(self, fmt: Optional[str] = None) -> Union[dict, str]:
+        """
+        Get acquisition loop stage timings collected since `set_profiling()`.
+
+        Args:
+            fmt: `None` for a dictionary, `"text"` for a table in microseconds.
+
+        Returns:
+            Same as `stageProfiler.get()` if `fmt` is `None`, otherwise `stageProfiler.report()`.
+        """
+        if fmt is None:
+            return self._dispatch.profiler.get()
+        if fmt == "text":
+            return self._dispatch.profiler.report()
+        raise ValueError("Format should be None or 'text'.")
+
+    def send_marker(self, marker: str, timestamp: Optional[float] = None) -> float:
+        """
+        Record a software marker at the sample acquired at `timestamp`, can be invoked after `start_acquisition_data()`
+            from any thread. The marker is written to BDF annotations and the LSL marker stream if opened,
+            and can be retrieved with its sample index by `get_markers()`.
+
+        Args:
+            marker: marker string.
+            timestamp: `time.perf_counter()` time of the event, defaults to now.
+
+        Returns:
+            The marker timestamp.
+        """
+        return self._dispatch.markers.mark(marker, timestamp)
+
+    def get_markers(self) -> list[dict]:
+        """
+        Retrieve software markers resolved since last call.
+
+        Indexes count samples at the device sample rate, as received before `set_pipeline()`, the same
+            index as the marker in the BDF file. With a decimating pipeline targeting `"queue"`,
+            the marker is at row `index // pipeline.decimation` of the data returned by `get_data()`.
+
+        Returns:
+            A list of dictionaries containing `index`: sample index counted from `start_acquisition_data()`,
+                EXG sample index for iFocus, DFocus and eConAlpha; `label`: marker string;
+                `timestamp`: `time.perf_counter()` time given to `send_marker()`.
+        """
+        return self._dispatch.markers.get()
+
+
+class epochMixin(dispatchMixin):
+    """Public methods of devices with a trigger channel, see `dispatchMixin`."""
+
+    def set_epochs(self, extractor: Optional["epochExtractor"] = None) -> None:
+        """
+        Cut windows around trigger events in the receive thread, invoke it before `start_acquisition_data()`,
+            epochs are available through `get_epochs()` as soon as their post-stimulus window is received.
+
+        Args:
+            extractor: an `epochExtractor` instance, fed with the same data as `get_data()` including the trigger channel,
+                in micro volts in raw mode, `None` to remove.
+
+        Raises:
+            Exception: if data acquisition in progress.
+        """
+        self._check_idle()
+        self._dispatch.epochs = extractor
+
+    def get_epochs(self) -> Optional[dict]:
+        """
+        Get epochs completed since last call by the extractor given to `set_epochs()`, return immediately.
+
+        Returns:
+            Same as `epochExtractor.get_epochs()`, `None` if no extractor set or no epoch completed.
+        """
+        epochs = self._dispatch.epochs
+        if epochs is None:
+            return
+        return epochs.get_epochs()
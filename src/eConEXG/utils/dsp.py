@@ -0,0 +1,290 @@
+from typing import Optional, Union
+
+import numpy as np
+
+
+class dspPipeline:
+    def __init__(self):
+        """
+        Streaming signal processing applied to data blocks between the parser and data sinks.
+
+        Filters are designed when the pipeline is bound to a stream, either by `set_pipeline()` of a device
+            or by `bind()`, and keep their state between blocks, so that consecutive blocks are processed
+            as one continuous signal. Channels are re-referenced, filtered by one cascade of second-order
+            sections and decimated in a single vectorized pass, discrete columns like the trigger channel
+            are passed through.
+
+        Examples:
+            >>> pipeline = dspPipeline().add_bandpass(1, 40).add_notch(50).set_reference("average")
+            >>> dev.set_pipeline(pipeline, targets=("queue", "lsl"))
+
+        Raises:
+            ImportError: if `scipy` is not installed when bound, install with `pip install eConEXG[dsp]`.
+        """
+        self.__filters = []
+        self.__reference: Union[str, list[int], None] = None
+        self.__decimation = 1
+        self.fs: Optional[float] = None
+        self._sos = None
+        self._decimator = None
+
+    @property
+    def decimation(self) -> int:
+        return self.__decimation
+
+    @property
+    def fs_out(self) -> Optional[float]:
+        """Sample frequency of processed blocks, available after bound."""
+        if self.fs is None:
+            return
+        return self.fs / self.__decimation
+
+    def add_bandpass(self, low: float, high: float, order: int = 4) -> "dspPipeline":
+        """
+        Add a Butterworth band-pass filter.
+
+        Args:
+            low: lower cutoff frequency in Hz.
+            high: upper cutoff frequency in Hz.
+            order: filter order.
+
+        Returns:
+            The pipeline itself, for chaining.
+        """
+        self.__filters.append(("bandpass", (low, high), order))
+        return self
+
+    def add_highpass(self, cutoff: float, order: int = 4) -> "dspPipeline":
+        """
+        Add a Butterworth high-pass filter, e.g. to remove baseline drift.
+
+        Args:
+            cutoff: cutoff frequency in Hz.
+            order: filter order.
+
+        Returns:
+            The pipeline itself, for chaining.
+        """
+        self.__filters.append(("highpass", cutoff, order))
+        return self
+
+    def add_lowpass(self, cutoff: float, order: int = 4) -> "dspPipeline":
+        """
+        Add a Butterworth low-pass filter.
+
+        Args:
+            cutoff: cutoff frequency in Hz.
+            order: filter order.
+
+        Returns:
+            The pipeline itself, for chaining.
+        """
+        self.__filters.append(("lowpass", cutoff, order))
+        return self
+
+    def add_notch(
+        self, freq: float = 50, quality: float = 30, harmonics: int = 1
+    ) -> "dspPipeline":
+        """
+        Add notch filters for power line interference.
+
+        Args:
+            freq: power line frequency in Hz, `50` or `60`.
+            quality: quality factor, higher value gives a narrower notch.
+            harmonics: number of harmonics to remove including the fundamental, those above Nyquist frequency are skipped.
+
+        Returns:
+            The pipeline itself, for chaining.
+        """
+        for i in range(1, harmonics + 1):
+            self.__filters.append(("notch", freq * i, quality))
+        return self
+
+    def set_reference(self, reference: Union[str, list[int], None]) -> "dspPipeline":
+        """
+        Re-reference channels before filtering.
+
+        Args:
+            reference: `"average"` for common average reference, a list of column indexes
+                whose mean is used as reference, e.g. `[3, 4]` for linked mastoids, or `None` to keep the original reference.
+
+        Returns:
+            The pipeline itself, for chaining.
+        """
+        if isinstance(reference, str) and reference != "average":
+            raise ValueError(
+                "Reference should be 'average', a list of indexes or None."
+            )
+        self.__reference = reference
+        return self
+
+    def set_decimation(self, factor: int) -> "dspPipeline":
+        """
+        Reduce the output sample frequency by an integer factor with a `polyphaseDecimator`.
+
+        Args:
+            factor: decimation factor, `1` to disable.
+
+        Returns:
+            The pipeline itself, for chaining.
+        """
+        if int(factor) < 1:
+            raise ValueError("Decimation factor should be a positive integer.")
+        self.__decimation = int(factor)
+        return self
+
+    def bind(self, fs: float, columns: int, discrete: tuple = ()) -> None:
+        """
+        Design filters for a stream and reset filter states, invoked by devices on acquisition start.
+
+        Args:
+            fs: sample frequency of the stream in Hz.
+            columns: number of columns of each block.
+            discrete: indexes of columns passed through without processing, e.g. trigger channel.
+        """
+        from scipy.signal import butter, iirnotch, sosfilt_zi, tf2sos
+
+        self.fs = float(fs)
+        self._discrete = [i % columns for i in discrete]
+        self._channels = [i for i in range(columns) if i not in self._discrete]
+        nyq = self.fs / 2
+        sections = []
+        for kind, param, arg in self.__filters:
+            if kind == "notch":
+                if param >= nyq:
+                    continue
+                sections.append(tf2sos(*iirnotch(param, arg, fs=self.fs)))
+            else:
+                sections.append(
+                    butter(arg, param, btype=kind, fs=self.fs, output="sos")
+                )
+        if sections:
+            self._sos = np.vstack(sections)
+            zi = sosfilt_zi(self._sos)  # (sections, 2)
+            self._zi_unit = zi[:, :, None]
+        else:
+            self._sos = None
+        self._decimator = None
+        if self.__decimation > 1:
+            self._decimator = polyphaseDecimator(self.__decimation, self._discrete)
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear filter states, the next block is processed as the start of a new signal."""
+        self._zi = None
+        if self._decimator is not None:
+            self._decimator.reset()
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Process a block of consecutive samples.
+
+        Args:
+            block: array in shape `(samples, columns)`.
+
+        Returns:
+            Processed block in shape `(samples // decimation, columns)`, approximately.
+        """
+        from scipy.signal import sosfilt
+
+        if self.fs is None:
+            raise Exception("Pipeline not bound, please invoke bind() first.")
+        out = np.array(block, dtype=float)
+        if len(out) == 0:
+            return out
+        ch = self._channels
+        data = out[:, ch]
+        if self.__reference == "average":
+            data -= data.mean(axis=1, keepdims=True)
+        elif self.__reference is not None:
+            data -= out[:, self.__reference].mean(axis=1, keepdims=True)
+        if self._sos is not None:
+            if self._zi is None:  # start from steady state of the first sample
+                self._zi = self._zi_unit * data[0]
+            data, self._zi = sosfilt(self._sos, data, axis=0, zi=self._zi)
+        out[:, ch] = data
+        if self._decimator is not None:
+            out = self._decimator.process(out)
+        return out
+
+
+class polyphaseDecimator:
+    def __init__(
+        self,
+        factor: int,
+        discrete: tuple = (),
+        taps: Optional[int] = None,
+        cutoff: float = 0.8,
+    ):
+        """
+        Streaming anti-aliased decimator. A linear phase FIR low-pass filter is evaluated only
+            at kept output samples, so the cost per input sample is `taps / factor` multiplications per channel.
+
+        Args:
+            factor: decimation factor.
+            discrete: indexes of columns not filtered, the largest value since the previous
+                output sample is kept instead, so that triggers are not lost.
+            taps: FIR filter length, defaults to `16 * factor + 1`, filtered columns are delayed by
+                `(taps - 1) / 2` input samples.
+            cutoff: pass band edge relative to the output Nyquist frequency.
+
+        Raises:
+            ImportError: if `scipy` is not installed.
+        """
+        from scipy.signal import firwin
+
+        self.factor = int(factor)
+        if self.factor < 1:
+            raise ValueError("Decimation factor should be a positive integer.")
+        taps = 16 * self.factor + 1 if taps is None else int(taps)
+        self._taps = firwin(taps, cutoff / self.factor)[::-1].copy()
+        self._discrete = list(discrete)
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear filter history, the next block is processed as the start of a new signal."""
+        self._history = None
+        self._phase = 0
+        self._carry = None
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Decimate a block of consecutive samples.
+
+        Args:
+            block: array in shape `(samples, columns)`.
+
+        Returns:
+            Decimated block, blocks of any length can be fed, output samples are evenly spaced across blocks.
+        """
+        from numpy.lib.stride_tricks import sliding_window_view
+
+        block = np.asarray(block, dtype=float)
+        factor, taps = self.factor, len(self._taps)
+        start = self._phase
+        keep = np.arange(start, len(block), factor)
+        self._phase = (start - len(block)) % factor
+        if self._history is None:  # start from steady state of the first sample
+            self._history = np.repeat(block[:1], taps - 1, axis=0)
+        signal = np.concatenate((self._history, block))
+        self._history = signal[len(signal) - taps + 1 :]
+        # window i covers input samples i - taps + 1 ~ i of this block
+        # basic slicing keeps a strided view, no window is copied
+        windows = sliding_window_view(signal, taps, axis=0)[start : len(block) : factor]
+        out = windows @ self._taps
+        if self._discrete:
+            out[:, self._discrete] = self.__hold(block[:, self._discrete], keep)
+        return out
+
+    def __hold(self, values: np.ndarray, keep: np.ndarray) -> np.ndarray:
+        values = values.copy()
+        if self._carry is not None and len(values):
+            values[0] = np.maximum(values[0], self._carry)
+        if len(keep) == 0:
+            if len(values):
+                self._carry = values.max(axis=0)
+            return values[:0]
+        starts = np.concatenate(([0], keep[:-1] + 1))
+        held = np.maximum.reduceat(values[: keep[-1] + 1], starts, axis=0)
+        self._carry = values[keep[-1] + 1 :].max(axis=0, initial=0)
+        return held
@@ -0,0 +1,174 @@
+from collections import deque
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+
+class epochExtractor:
+    def __init__(
+        self,
+        pre: float = 0.2,
+        post: float = 0.8,
+        events: Optional[Iterable[int]] = None,
+        baseline: Optional[tuple[Optional[float], Optional[float]]] = None,
+        capacity: int = 256,
+        callback: Optional[Callable[[dict], None]] = None,
+    ):
+        """
+        Streaming extraction of fixed-size windows around trigger events.
+
+        Received blocks are written to a ring buffer holding one window plus a block, and the trigger
+            column of each block is scanned at once for onsets, samples whose value is non-zero and
+            differs from the previous sample. An event is complete once `post` seconds after it
+            are received, all events completed by a block are cut from the ring buffer in a single
+            gather and queued for `get_epochs()`, or passed to `callback`.
+
+        Args:
+            pre: seconds before the event in each epoch.
+            post: seconds from the event on in each epoch, the event sample included.
+            events: trigger values to extract, `None` for all non-zero values.
+            baseline: `(start, end)` in seconds relative to the event, the mean of this interval
+                is subtracted from each channel, `None` as start or end for the epoch bounds,
+                e.g. `(None, 0)` for the whole pre-stimulus interval. `None` to disable.
+            capacity: epochs kept for `get_epochs()`, the oldest are dropped and counted in `dropped`.
+            callback: function invoked in the receive thread with completed epochs, in the format of
+                `get_epochs()`, instead of queueing them. It should return quickly.
+
+        Raises:
+            ValueError: if the window is empty or `baseline` exceeds it.
+        """
+        if pre < 0 or post <= 0:
+            raise ValueError("pre should be non-negative and post positive.")
+        if baseline is not None:
+            start, end = baseline
+            start = -pre if start is None else start
+            end = post if end is None else end
+            if not -pre <= start < end <= post:
+                raise ValueError("Baseline should be an interval within the epoch.")
+            baseline = (start, end)
+        self.pre = pre
+        self.post = post
+        self.events = None if events is None else np.asarray(list(events))
+        self.baseline = baseline
+        self.callback = callback
+        self.dropped = 0
+        self.__epochs: deque = deque(maxlen=capacity)
+        self.fs: Optional[float] = None
+
+    def bind(self, fs: float, columns: int, trigger: int = -1) -> None:
+        """
+        Allocate the ring buffer for a stream and clear epochs, invoked by devices on acquisition start.
+
+        Args:
+            fs: sample frequency of the stream in Hz.
+            columns: number of columns of each block.
+            trigger: index of the trigger column, excluded from epochs.
+        """
+        self.fs = float(fs)
+        self._trigger = trigger % columns
+        self._channels = [i for i in range(columns) if i != self._trigger]
+        self._pre = int(round(self.pre * self.fs))
+        self._length = self._pre + max(int(round(self.post * self.fs)), 1)
+        self._offsets = np.arange(self._length) - self._pre
+        self._times = self._offsets / self.fs
+        self._baseline = None
+        if self.baseline is not None:
+            start, end = (int(round(t * self.fs)) + self._pre for t in self.baseline)
+            self._baseline = slice(start, max(end, start + 1))
+        # one window plus the largest block written at once
+        self._ring = np.zeros(
+            (self._length + max(self._length, 1024), len(self._channels))
+        )
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear buffered data, pending events and queued epochs."""
+        self._samples = 0
+        self._last = 0.0
+        self._pending = np.zeros((0, 2), dtype=np.int64)  # event sample and value
+        self.__epochs.clear()
+
+    def feed(self, block) -> None:
+        """
+        Account a block of consecutive samples, invoked by devices on every received block.
+
+        Args:
+            block: array like in shape `(samples, columns)`, including the trigger column.
+        """
+        block = np.asarray(block, dtype=float)
+        if block.size == 0:
+            return
+        step = len(self._ring) - self._length
+        for start in range(0, len(block), step):
+            self.__feed(block[start : start + step])
+
+    def __feed(self, block: np.ndarray) -> None:
+        count, capacity = len(block), len(self._ring)
+        pos = self._samples % capacity
+        first = min(count, capacity - pos)
+        data = block[:, self._channels]
+        self._ring[pos : pos + first] = data[:first]
+        self._ring[: count - first] = data[first:]
+        trigger = block[:, self._trigger]
+        previous = np.concatenate(([self._last], trigger[:-1]))
+        onset = (trigger != 0) & (trigger != previous)
+        if self.events is not None:
+            onset &= np.isin(trigger, self.events)
+        index = np.flatnonzero(onset)
+        if len(index):
+            found = np.column_stack((index + self._samples, trigger[index]))
+            self._pending = np.concatenate((self._pending, found.astype(np.int64)))
+        self._last = trigger[-1]
+        self._samples += count
+        # events whose post-stimulus window is complete
+        done = np.searchsorted(
+            self._pending[:, 0], self._samples - self._length + self._pre, "right"
+        )
+        if not done:
+            return
+        events, self._pending = self._pending[:done], self._pending[done:]
+        events = events[events[:, 0] >= self._pre]  # window starts before acquisition
+        if len(events):
+            self.__emit(events)
+
+    def __emit(self, events: np.ndarray) -> None:
+        index = (events[:, :1] + self._offsets) % len(self._ring)
+        data = self._ring[index]  # (epochs, samples, channels)
+        if self._baseline is not None:
+            data -= data[:, self._baseline].mean(axis=1, keepdims=True)
+        epochs = {
+            "data": data,
+            "events": events[:, 1],
+            "samples": events[:, 0],
+            "times": self._times,
+        }
+        if self.callback is not None:
+            self.callback(epochs)
+            return
+        overflow = len(self.__epochs) + len(events) - self.__epochs.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+        self.__epochs.extend(zip(data, events[:, 1], events[:, 0]))
+
+    def get_epochs(self) -> Optional[dict]:
+        """
+        Get epochs completed since last call, return immediately.
+
+        Returns:
+            `None` if no epoch completed, otherwise a dictionary containing:
+                `data`: epochs in shape `(epochs, samples, channels)`, trigger column excluded;
+                `events`: trigger value of each epoch;
+                `samples`: index of the event sample since acquisition start;
+                `times`: time of each epoch sample relative to the event in seconds.
+        """
+        count = len(self.__epochs)
+        if not count:
+            return None
+        epochs = [self.__epochs.popleft() for _ in range(count)]
+        data, events, samples = zip(*epochs)
+        return {
+            "data": np.stack(data),
+            "events": np.array(events),
+            "samples": np.array(samples),
+            "times": self._times,
+        }
@@ -0,0 +1,99 @@
+from typing import Callable, Optional
+
+import numpy as np
+
+
+class frameSync:
+    def __init__(
+        self,
+        header: bytes,
+        length: int,
+        check: Optional[Callable[[bytes], bool]] = None,
+    ):
+        """
+        Split a byte stream into fixed length frames starting with `header`.
+
+        While unlocked, a candidate header is accepted only if `check` passes on its frame and
+            the next frame starts with `header` too, otherwise the search resumes one byte later,
+            so a false header inside payload never hides a real frame. Once locked, frames are cut
+            at a fixed stride and headers are compared for a whole block at once, the lock is lost
+            on the first header mismatch.
+
+        Args:
+            header: bytes each frame starts with.
+            length: frame length in bytes, including header.
+            check: frame validation used to confirm a candidate header, e.g. checksum.
+        """
+        self.header = bytes(header)
+        self.length = int(length)
+        self.check = check
+        self.__header = np.frombuffer(self.header, dtype=np.uint8)
+        self.__buffer = bytearray()
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop buffered bytes and lock."""
+        del self.__buffer[:]
+        self.__start = 0  # bytes before are the last frame read, kept for resync
+        self.locked = False
+        self.skipped = 0
+
+    def __len__(self) -> int:
+        return len(self.__buffer) - self.__start
+
+    def extend(self, data: bytes) -> None:
+        self.__buffer.extend(data)
+
+    def read(self) -> np.ndarray:
+        """
+        Cut all complete frames from buffered bytes.
+
+        Returns:
+            Frames in shape `(frames, length)`, dtype `uint8`, bytes skipped to regain lock
+                are counted in `skipped`.
+        """
+        buffer, length = self.__buffer, self.length
+        blocks, pos, self.skipped = [], self.__start, 0
+        while True:
+            if not self.locked:
+                # a frame shortened by dropped bytes starts inside the previous one
+                found, resume = self.__search(max(pos - length + 1, 0))
+                self.skipped += max(resume - pos, 0)
+                pos = resume
+                if not found:
+                    break
+                self.locked = True
+            n = (len(buffer) - pos) // length
+            if n == 0:
+                break
+            block = np.frombuffer(bytes(buffer[pos : pos + n * length]), np.uint8)
+            block = block.reshape(n, length)
+            bad = np.flatnonzero((block[:, : len(self.header)] != self.__header).any(1))
+            k = bad[0] if len(bad) else n
+            blocks.append(block[:k])
+            pos += k * length
+            if k == n:
+                break
+            self.locked = False
+        keep = max(pos - length, 0)
+        del buffer[:keep]
+        self.__start = pos - keep
+        if not blocks:
+            return np.empty((0, length), dtype=np.uint8)
+        return np.concatenate(blocks) if len(blocks) > 1 else blocks[0]
+
+    def __search(self, pos: int) -> tuple[bool, int]:
+        """Return whether a frame is confirmed and where to resume."""
+        buffer, length, header = self.__buffer, self.length, self.header
+        while True:
+            i = buffer.find(header, pos)
+            if i < 0:  # keep a partial header at the end
+                return False, max(pos, len(buffer) - len(header) + 1)
+            if i + length + len(header) > len(buffer):  # wait for lookahead
+                return False, i
+            ahead = buffer[i + length : i + length + len(header)] == header
+            if ahead and (
+                self.check is None or self.check(bytes(buffer[i : i + length]))
+            ):
+                return True, i
+            pos = i + 1
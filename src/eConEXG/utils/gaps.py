@@ -0,0 +1,89 @@
+from typing import Optional
+
+import numpy as np
+
+MODES = ("nan", "hold", "linear")
+
+
+def lost_frames(seq: np.ndarray, last: np.ndarray) -> np.ndarray:
+    """
+    Frames missing before each frame from 8-bit sequence numbers.
+
+    Args:
+        seq: sequence number of each frame.
+        last: sequence number of the previous frame of each frame.
+
+    Returns:
+        Number of missing frames, wraparound aware, in range `[0, 255]`.
+    """
+    return (np.asarray(seq, dtype=int) - np.asarray(last, dtype=int) - 1) % 256
+
+
+def fill_gaps(
+    data: np.ndarray,
+    lost: np.ndarray,
+    mode: str,
+    prev: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Insert rows for missing frames in front of the rows following them.
+
+    Args:
+        data: received rows in shape `(rows, ...)`.
+        lost: number of missing rows before each received row.
+        mode: `"nan"` to insert `nan`, `"zero"` to insert `0`, `"hold"` to repeat the previous row
+            or `"linear"` to interpolate between the rows around the gap, rounded for integer data.
+        prev: last row received before `data`, used for a gap in front of the first row,
+            the first row is used if not given.
+
+    Returns:
+        Rows in shape `(rows + sum(lost), ...)`, integer data is converted to float in `"nan"` mode.
+    """
+    lost = np.asarray(lost, dtype=int)
+    total = len(data) + int(lost.sum())
+    pos = np.arange(len(data)) + np.cumsum(lost)  # output index of received rows
+    dtype = float if mode == "nan" else data.dtype
+    out = np.empty((total,) + data.shape[1:], dtype=dtype)
+    out[pos] = data
+    missing = np.ones(total, dtype=bool)
+    missing[pos] = False
+    idx = np.flatnonzero(missing)
+    if len(idx) == 0:
+        return out
+    if mode == "nan":
+        out[idx] = np.nan
+        return out
+    if mode == "zero":
+        out[idx] = 0
+        return out
+    # rows around each missing row, index 0 is the row before data
+    ext = np.concatenate((data[:1] if prev is None else prev[None], data))
+    ext_pos = np.concatenate(([-1], pos))
+    k = np.searchsorted(pos, idx)
+    if mode == "hold":
+        out[idx] = ext[k]
+        return out
+    weight = (idx - ext_pos[k]) / (ext_pos[k + 1] - ext_pos[k])
+    weight = weight.reshape((-1,) + (1,) * (data.ndim - 1))
+    value = ext[k] * (1 - weight) + ext[k + 1] * weight
+    out[idx] = np.rint(value) if np.issubdtype(dtype, np.integer) else value
+    return out
+
+
+def gap_runs(lost: np.ndarray, rows: int = 1) -> list[tuple[int, int]]:
+    """
+    Locate inserted rows in the output of `fill_gaps()`.
+
+    Args:
+        lost: number of missing frames before each received frame.
+        rows: rows per frame.
+
+    Returns:
+        `(offset, length)` in rows of each gap.
+    """
+    lost = np.asarray(lost, dtype=int)
+    end = (np.arange(len(lost)) + np.cumsum(lost)) * rows
+    return [
+        (int(end[i] - lost[i] * rows), int(lost[i] * rows))
+        for i in np.flatnonzero(lost)
+    ]
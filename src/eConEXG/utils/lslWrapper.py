@@ -1,4 +1,13 @@
-from pylsl import StreamInfo, StreamOutlet, cf_double64
+import time
+
+from pylsl import (
+    IRREGULAR_RATE,
+    StreamInfo,
+    StreamOutlet,
+    cf_double64,
+    cf_string,
+    local_clock,
+)
 
 
 class lslSender(StreamOutlet):
@@ -11,6 +20,7 @@ class lslSender(StreamOutlet):
         with_trigger=True,
         unit="microvolts",
         precision=cf_double64,
+        scales=None,
     ):
         info = StreamInfo(
             name=dev,
@@ -22,13 +32,16 @@ class lslSender(StreamOutlet):
         )
         maf = "Niantong Intelligence Technology Co., Ltd."
         info.desc().append_child_value("manufacturer", maf)
+        # raw counts multiplied by scaling factor give values in unit
+        if scales is None:
+            scales = [1] * len(elctds)
         chns = info.desc().append_child("channels")
-        for label in elctds.values():
+        for label, scale in zip(elctds.values(), scales):
             ch = chns.append_child("channel")
             ch.append_child_value("label", label)
             ch.append_child_value("unit", unit)
             ch.append_child_value("type", devtype)
-            ch.append_child_value("scaling_factor", "1")
+            ch.append_child_value("scaling_factor", str(float(scale)))
         # Trigger
         if with_trigger:
             ch = chns.append_child("channel")
@@ -37,3 +50,23 @@ class lslSender(StreamOutlet):
             ch.append_child_value("type", "Trigger Box")
             ch.append_child_value("scaling_factor", "1")
         super().__init__(info, max_buffered=60)
+
+
+class lslMarkerSender(StreamOutlet):
+    def __init__(self, dev="eConEEG"):
+        info = StreamInfo(
+            name=f"{dev}_Markers",
+            type="Markers",
+            channel_count=1,
+            nominal_srate=IRREGULAR_RATE,
+            channel_format=cf_string,
+            source_id=f"{dev}_Markers",
+        )
+        maf = "Niantong Intelligence Technology Co., Ltd."
+        info.desc().append_child_value("manufacturer", maf)
+        super().__init__(info)
+        # markers are stamped with time.perf_counter(), convert to LSL clock
+        self._offset = local_clock() - time.perf_counter()
+
+    def push_marker(self, marker: str, timestamp: float):
+        self.push_sample([marker], timestamp + self._offset)
@@ -0,0 +1,55 @@
+import time
+from collections import deque
+from typing import Optional
+
+from .timestamp import timestampModel
+
+
+class markerLog:
+    """
+    Map software markers to sample indexes of a stream.
+
+    `mark()` may be called from any thread, it only appends to a deque, which is atomic in CPython,
+    so the receive thread is never blocked by a lock. The receive thread calls `update()` with every
+    parsed chunk, markers are resolved once the sample taken at their timestamp has been received.
+    """
+
+    def __init__(self, fs: float, history: int = 4096):
+        self.model = timestampModel(fs)
+        self._pending = deque()
+        self._resolved = deque(maxlen=history)
+
+    def reset(self, fs: Optional[float] = None):
+        if fs is not None:
+            self.model.fs = float(fs)
+        self.model.reset()
+        self._pending.clear()
+        self._resolved.clear()
+
+    def mark(self, label: str, timestamp: Optional[float] = None) -> float:
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        self._pending.append((timestamp, str(label)))
+        return timestamp
+
+    def update(self, n_samples: int, arrival: float) -> list[dict]:
+        """Account a received chunk, return markers resolved by it in sample order."""
+        self.model.update(n_samples, arrival)
+        last = self.model.count - 1
+        ret = []
+        for _ in range(len(self._pending)):
+            timestamp, label = self._pending.popleft()
+            index = round(self.model.index_of(timestamp))
+            if index > last:  # sample not received yet
+                self._pending.append((timestamp, label))
+                continue
+            ret.append({"index": max(index, 0), "label": label, "timestamp": timestamp})
+        ret.sort(key=lambda marker: marker["index"])
+        self._resolved.extend(ret)
+        return ret
+
+    def get(self) -> list[dict]:
+        ret = []
+        while self._resolved:
+            ret.append(self._resolved.popleft())
+        return ret
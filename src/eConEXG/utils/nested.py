@@ -0,0 +1,123 @@
+from typing import TYPE_CHECKING, Callable
+
+import numpy as np
+
+from .dispatch import frameDispatcher
+
+if TYPE_CHECKING:
+    from .dsp import dspPipeline
+
+
+class nestedDispatcher(frameDispatcher):
+    def __init__(self, name: str, parser, recv: Callable[[], bytes]):
+        """
+        Receive side of iFocus, DFocus and eConAlpha, whose frames pack the EXG samples of a packet
+            followed by one IMU row, a tuple of `int32` arrays `(exg, imu)` in raw mode.
+
+        Software markers and filled gaps are resolved to EXG sample indexes, spectrum, subscribers,
+            the LSL stream and stream `0` of the stream server receive EXG rows, IMU rows go to
+            `lsl_imu` and stream `1`, see `frameDispatcher`.
+
+        Args:
+            name: device name, used for profiler, reader and subscriber thread names.
+            parser: device parser, with `parse_data()`, `to_frames()`, `raw`, `scale`, `gap_fill`, `gaps` and `stats`.
+            recv: transport read, see `socketReader`.
+        """
+        super().__init__(name, parser, recv, 250)
+        self.lsl_imu = None
+
+    def check_pipeline(self, pipeline: "dspPipeline", targets: set) -> None:
+        if pipeline.decimation > 1:
+            raise Exception(
+                "Decimation not supported, EXG and IMU data are packed in frames."
+            )
+
+    def scale(self) -> tuple:
+        return tuple(scale.copy() for scale in self.parser.scale)
+
+    def lsl_format(self, stream: int) -> dict:
+        """LSL stream options of EXG (`0`) or IMU (`1`) stream, `int32` samples in raw mode."""
+        return self.raw_format(self.parser.scale[stream])
+
+    def _bind(self, columns: int):
+        if self.pipeline is not None:
+            self.pipeline[0].bind(self.fs, columns)
+        if self.spectrum is not None:
+            self.spectrum.bind(self.fs, columns)
+
+    def _samples(self, ret) -> int:
+        if self.parser.raw:
+            return len(ret[0])
+        return sum(len(frame) - 1 for frame in ret)
+
+    def _push(self, ret):
+        if self.parser.raw:
+            self.__push_raw(*ret)
+        else:
+            self.__push(ret)
+
+    def __push(self, ret: list):
+        # outputs are read once, devices may close them from other threads
+        spectrum, subscribers, bdf = self.spectrum, self.subscribers, self.bdf
+        lsl, lsl_imu, stream = self.lsl, self.lsl_imu, self.stream
+        outs = self.__run_pipeline(ret)
+        frames = outs.get("queue", ret)
+        if spectrum is not None or subscribers:
+            exg = [row for frame in frames for row in frame[:-1]]
+            if spectrum is not None:
+                spectrum.feed(exg)
+        self.profiler.mark("dsp")
+        if self.queue is not None:
+            self.queue.put(frames)
+        for subscriber in subscribers:
+            subscriber.feed(exg)
+        self.profiler.mark("queue")
+        if bdf is not None:
+            bdf.write_chunk(outs.get("bdf", ret))
+        self.profiler.mark("bdf")
+        if lsl is not None or stream is not None:
+            exg = [row for frame in outs.get("lsl", ret) for row in frame[:-1]]
+        if lsl is not None:
+            lsl.push_chunk(exg)
+        if lsl_imu is not None:
+            lsl_imu.push_chunk([frame[-1] for frame in ret])
+        self.profiler.mark("lsl")
+        if stream is not None:
+            stream.publish(exg)
+            stream.publish([frame[-1] for frame in ret], 1)
+        self.profiler.mark("stream")
+
+    def __push_raw(self, exg: np.ndarray, imu: np.ndarray):
+        spectrum, bdf, stream = self.spectrum, self.bdf, self.stream
+        lsl, lsl_imu = self.lsl, self.lsl_imu
+        if spectrum is not None:
+            spectrum.feed(exg * self.parser.scale[0])
+        self.profiler.mark("dsp")
+        if self.queue is not None:
+            self.queue.put((exg, imu))
+        for subscriber in self.subscribers:
+            subscriber.feed(exg)
+        self.profiler.mark("queue")
+        if bdf is not None:
+            bdf.write_chunk(self.parser.to_frames(exg, imu))
+        self.profiler.mark("bdf")
+        if lsl is not None:
+            lsl.push_chunk(exg)
+        if lsl_imu is not None:
+            lsl_imu.push_chunk(imu)
+        self.profiler.mark("lsl")
+        if stream is not None:
+            stream.publish(exg)
+            stream.publish(imu, 1)
+        self.profiler.mark("stream")
+
+    def __run_pipeline(self, ret: list) -> dict:
+        pipeline = self.pipeline
+        if pipeline is None:
+            return {}
+        exg = np.asarray([frame[:-1] for frame in ret], dtype=float)
+        out = pipeline[0].process(exg.reshape(-1, exg.shape[-1]))
+        out = out.reshape(exg.shape).tolist()
+        return dict.fromkeys(
+            pipeline[1], [rows + [frame[-1]] for rows, frame in zip(out, ret)]
+        )
@@ -0,0 +1,148 @@
+import sys
+from contextlib import contextmanager
+from time import perf_counter_ns
+from typing import Optional, TextIO
+
+# 4 buckets per power of two, bucket midpoints are within 12.5% of recorded spans
+_SUB_BITS = 2
+_BUCKETS = 64 << _SUB_BITS
+
+
+def _bucket(ns: int) -> int:
+    shift = max(ns.bit_length() - _SUB_BITS - 1, 0)
+    return (shift << _SUB_BITS) + (ns >> shift)
+
+
+def _upper(bucket: int) -> int:
+    if bucket < 2 << _SUB_BITS:
+        return bucket
+    shift = (bucket >> _SUB_BITS) - 1
+    return ((bucket - (shift << _SUB_BITS) + 1) << shift) - 1
+
+
+def _middle(bucket: int) -> int:
+    lower = _upper(bucket - 1) + 1 if bucket else 0
+    return (lower + _upper(bucket)) // 2
+
+
+class stageProfiler:
+    def __init__(self, name: str):
+        """
+        Opt-in timings of the stages of a device acquisition loop.
+
+        The receive thread calls `begin()` before waiting for data and `mark(stage)` after each stage,
+            the span since the previous call is added to a histogram of the stage. Spans are measured
+            with `perf_counter_ns()` and counted in logarithmic buckets, so recording is a few integer
+            operations and percentiles are resolved within 12.5%. Both calls return at once while
+            `enabled` is `False`.
+
+        Args:
+            name: device name shown in reports.
+        """
+        self.name = name
+        self.enabled = False
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear all histograms, may be called while the receive thread records."""
+        # stage: [histogram, total, max], swapped at once, `add()` reads it once
+        self.__stages: dict[str, list] = {}
+        self.__last = 0
+        self.__cycle = 0
+
+    def begin(self) -> None:
+        """Start a loop cycle, time since the previous cycle start is recorded as `cycle`."""
+        if not self.enabled:
+            return
+        now = perf_counter_ns()
+        if self.__cycle:
+            self.add("cycle", now - self.__cycle)
+        self.__last = self.__cycle = now
+
+    def mark(self, stage: str) -> None:
+        """Record the span since the previous `begin()` or `mark()` as `stage`."""
+        if not self.enabled or not self.__last:
+            return
+        now = perf_counter_ns()
+        self.add(stage, now - self.__last)
+        self.__last = now
+
+    def add(self, stage: str, ns: int) -> None:
+        """Record a span of `ns` nanoseconds."""
+        stages = self.__stages
+        entry = stages.get(stage)
+        if entry is None:
+            entry = stages[stage] = [[0] * _BUCKETS, 0, 0]
+        entry[0][_bucket(ns)] += 1
+        entry[1] += ns
+        if ns > entry[2]:
+            entry[2] = ns
+
+    def get(self) -> dict[str, dict]:
+        """
+        Get timings of all recorded stages.
+
+        Returns:
+            Stage name and a dictionary containing `count`: recorded spans; `total`, `mean`, `p50`,
+                `p99`, `max`: span statistics in seconds.
+        """
+        ret = {}
+        for stage, (hist, total, peak) in list(self.__stages.items()):
+            hist = hist[:]
+            count = sum(hist)
+            if not count:
+                continue
+            ret[stage] = {
+                "count": count,
+                "total": total / 1e9,
+                "mean": total / count / 1e9,
+                "p50": min(_percentile(hist, count, 0.5), peak) / 1e9,
+                "p99": min(_percentile(hist, count, 0.99), peak) / 1e9,
+                "max": peak / 1e9,
+            }
+        return ret
+
+    def report(self) -> str:
+        """Format timings as a text table in microseconds."""
+        lines = [
+            f"{self.name} stage timings (us)",
+            f"{'stage':<10}{'count':>10}{'mean':>12}{'p50':>12}{'p99':>12}{'max':>12}",
+        ]
+        for stage, value in self.get().items():
+            row = [value[key] * 1e6 for key in ("mean", "p50", "p99", "max")]
+            lines.append(
+                f"{stage:<10}{value['count']:>10}" + "".join(f"{v:>12.1f}" for v in row)
+            )
+        return "\n".join(lines)
+
+
+def _percentile(hist: list[int], count: int, q: float) -> int:
+    rank, seen = q * count, 0
+    for bucket, n in enumerate(hist):
+        seen += n
+        if seen >= rank:
+            return _middle(bucket)
+    return _middle(len(hist) - 1)
+
+
+@contextmanager
+def profiling(*devices, file: Optional[TextIO] = None):
+    """
+    Profile acquisition loops of devices inside a `with` block and print stage timings on exit.
+
+    Args:
+        devices: device instances with `set_profiling()` and `get_profile()`.
+        file: text stream to print to, defaults to `sys.stderr`.
+
+    Examples:
+        >>> with profiling(dev):
+        ...     time.sleep(10)
+    """
+    for dev in devices:
+        dev.set_profiling(True)
+    try:
+        yield
+    finally:
+        for dev in devices:
+            dev.set_profiling(False)
+            print(dev.get_profile("text"), file=file or sys.stderr)
@@ -0,0 +1,121 @@
+import time
+from queue import Queue
+from threading import Event, Thread
+from typing import Callable, Optional
+
+from .profiler import stageProfiler
+from .realtime import raise_priority, set_affinity
+
+
+class socketReader:
+    def __init__(
+        self,
+        recv: Callable[[], bytes],
+        name: str,
+        threaded: bool = False,
+        affinity: Optional[list[int]] = None,
+        priority: Optional[int] = None,
+        profiler: Optional[stageProfiler] = None,
+        depth: int = 4096,
+    ):
+        """
+        Receive side of a device acquisition loop, reading in the loop thread or in a dedicated thread.
+
+        Inline, `get()` calls `recv` and stamps the arrival time. Threaded, a reader thread blocks in `recv`,
+            which releases the GIL, and queues stamped chunks for the loop thread, so the transport is
+            drained and arrival times are taken while the loop parses. `affinity` and `priority` are
+            applied to the thread calling `recv`: the reader thread, or the loop thread on `start()`.
+            An exception raised by `recv` stops the reader thread and is raised again by `get()`.
+
+        Args:
+            recv: transport read returning received bytes, empty bytes on closed connection.
+            name: reader thread name.
+            threaded: read in a dedicated thread.
+            affinity: CPU cores to pin the reading thread to, see `set_affinity()`.
+            priority: scheduling priority to request for the reading thread, see `raise_priority()`.
+            profiler: device profiler, intervals between arrival times are recorded as `arrival` stage.
+            depth: chunks queued before the reader thread waits for the loop.
+        """
+        self.recv = recv
+        self.name = name
+        self.threaded = threaded
+        self.affinity = affinity
+        self.priority = priority
+        self.profiler = profiler
+        self.__queue: Queue = Queue(depth)
+        self.__stop = Event()
+        self.__thread = None
+        self.__tuned = False
+        self.__last = 0.0
+
+    def start(self) -> None:
+        """Start reading, invoked by the loop thread after the transport started streaming."""
+        self.__last = 0.0
+        if not self.threaded:
+            if not self.__tuned:  # the loop thread keeps its settings
+                self.__tune()
+                self.__tuned = True
+            return
+        self.stop()
+        self.__stop = Event()
+        self.__queue = Queue(self.__queue.maxsize)
+        self.__thread = Thread(
+            target=self.__run, args=(self.__stop, self.__queue), daemon=True
+        )
+        self.__thread.name = self.name
+        self.__thread.start()
+
+    def get(self) -> tuple[bytes, float]:
+        """
+        Get the next received chunk.
+
+        Returns:
+            Received bytes and their `time.perf_counter()` arrival time.
+
+        Raises:
+            Exception: raised by `recv`.
+        """
+        if self.__thread is None:
+            data = self.recv()
+            arrival = time.perf_counter()
+        else:
+            data, arrival = self.__queue.get()
+            if isinstance(data, Exception):
+                raise data
+        profiler = self.profiler
+        if profiler is not None and profiler.enabled and self.__last:
+            profiler.add("arrival", int((arrival - self.__last) * 1e9))
+        self.__last = arrival
+        return data, arrival
+
+    def stop(self, timeout: float = 5) -> None:
+        """Stop the reader thread, waiting up to `timeout` seconds for a blocked read to return."""
+        thread, self.__thread = self.__thread, None
+        if thread is None:
+            return
+        self.__stop.set()
+        while thread.is_alive():  # unblock a reader waiting for queue space
+            while not self.__queue.empty():
+                self.__queue.get_nowait()
+            thread.join(min(timeout, 0.1))
+            timeout -= 0.1
+            if timeout <= 0:
+                break
+
+    def __tune(self):
+        if self.affinity is not None:
+            set_affinity(self.affinity)
+        if self.priority is not None:
+            raise_priority(self.priority)
+
+    def __run(self, stop: Event, queue: Queue):
+        self.__tune()
+        while not stop.is_set():
+            try:
+                data = self.recv()
+            except Exception as e:
+                queue.put((e, time.perf_counter()))
+                return
+            queue.put((data, time.perf_counter()))
+            if not data:
+                return
@@ -0,0 +1,82 @@
+import os
+from platform import system
+from threading import get_native_id
+from typing import Optional
+
+
+def raise_priority(level: int = 10) -> Optional[str]:
+    """
+    Raise the scheduling priority of the calling thread, as far as the platform and permissions allow.
+
+    Args:
+        level: real-time priority on Linux (`SCHED_FIFO`, 1~99), also used as nice decrement as fallback.
+
+    Returns:
+        Achieved policy: "SCHED_FIFO", "nice", "TIME_CRITICAL", or `None` if unchanged.
+    """
+    if system() == "Windows":
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        # THREAD_PRIORITY_TIME_CRITICAL
+        if kernel32.SetThreadPriority(kernel32.GetCurrentThread(), 15):
+            return "TIME_CRITICAL"
+        return
+    if hasattr(os, "sched_setscheduler"):
+        try:  # pid 0 is the calling thread on Linux
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(level))
+            return "SCHED_FIFO"
+        except (OSError, ValueError):
+            pass
+    if hasattr(os, "setpriority"):
+        try:  # the thread id addresses the calling thread on Linux
+            os.setpriority(os.PRIO_PROCESS, get_native_id(), -level)
+            return "nice"
+        except OSError:
+            pass
+
+
+def set_affinity(cores: list[int]) -> bool:
+    """
+    Pin the calling thread to CPU cores, on Linux and Windows.
+
+    Args:
+        cores: CPU core indexes the thread may run on.
+
+    Returns:
+        Whether the affinity was applied.
+    """
+    if system() == "Windows":
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        kernel32.SetThreadAffinityMask.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        mask = sum(1 << core for core in cores)
+        return bool(kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), mask))
+    if hasattr(os, "sched_setaffinity"):
+        try:  # pid 0 is the calling thread on Linux
+            os.sched_setaffinity(0, cores)
+            return True
+        except (OSError, ValueError):
+            pass
+    return False
+
+
+class timerResolution:
+    """
+    Request 1 ms system timer resolution on Windows while in use, so that `time.sleep()`
+    wakes up close to its deadline, no-op on other platforms.
+    """
+
+    def __enter__(self):
+        if system() == "Windows":
+            import ctypes
+
+            ctypes.windll.winmm.timeBeginPeriod(1)
+        return self
+
+    def __exit__(self, *args):
+        if system() == "Windows":
+            import ctypes
+
+            ctypes.windll.winmm.timeEndPeriod(1)
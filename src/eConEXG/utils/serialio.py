@@ -0,0 +1,65 @@
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from serial import Serial
+
+
+def tune_serial(dev: "Serial", rx_buffer: int = 1 << 16, low_latency: bool = True):
+    """
+    Tune an open serial port for streaming, settings a driver doesn't support are skipped.
+
+    Args:
+        dev: opened serial port.
+        rx_buffer: driver receive buffer size in bytes, applied on Windows, `0` to keep the default.
+        low_latency: enable low latency mode on Linux, USB serial adapters then pass received bytes
+            at once instead of every latency timer tick, typically 16 ms.
+    """
+    if rx_buffer and hasattr(dev, "set_buffer_size"):
+        try:
+            dev.set_buffer_size(rx_size=rx_buffer)
+        except Exception:
+            pass
+    if low_latency and hasattr(dev, "set_low_latency_mode"):
+        try:
+            dev.set_low_latency_mode(True)
+        except Exception:
+            pass
+
+
+class serialReader:
+    def __init__(
+        self,
+        dev: "Serial",
+        size: int,
+        rx_buffer: int = 1 << 16,
+        low_latency: bool = True,
+    ):
+        """
+        Read a serial port in blocks of all pending bytes instead of a fixed size.
+
+        Each `read()` asks for `max(size, in_waiting)` bytes, it still blocks until `size` bytes arrive
+            but drains a backlog in one call, so the number of reads follows the receive loop pace
+            instead of the frame rate. The port is tuned by `tune_serial()`. `Serial.readinto()` is
+            implemented over `read()` in pyserial, so reading into a preallocated buffer would only
+            add a copy, received bytes are handed over as returned.
+
+        Args:
+            dev: opened serial port.
+            size: minimum bytes per read, e.g. one frame.
+            rx_buffer: driver receive buffer size in bytes, see `tune_serial()`.
+            low_latency: enable low latency mode, see `tune_serial()`.
+        """
+        self.dev = dev
+        self.size = size
+        self.calls = 0
+        self.bytes = 0
+        tune_serial(dev, rx_buffer, low_latency)
+
+    def read(self, size: Optional[int] = None) -> bytes:
+        """Read at least `size` bytes, defaults to `self.size`, or less on timeout."""
+        if size is None:
+            size = self.size
+        data = self.dev.read(max(size, self.dev.in_waiting))
+        self.calls += 1
+        self.bytes += len(data)
+        return data
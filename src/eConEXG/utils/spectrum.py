@@ -0,0 +1,143 @@
+from typing import Optional
+
+import numpy as np
+
+BANDS = {
+    "delta": (1, 4),
+    "theta": (4, 8),
+    "alpha": (8, 13),
+    "beta": (13, 30),
+    "gamma": (30, 45),
+}
+
+
+class spectralEngine:
+    def __init__(
+        self,
+        segment: float = 1.0,
+        overlap: float = 0.5,
+        average: int = 8,
+        bands: Optional[dict] = None,
+    ):
+        """
+        Streaming Welch power spectral density and band power per channel.
+
+        Data is cut into Hann windowed segments, a new segment is transformed every
+            `segment * (1 - overlap)` seconds, and the PSD is the mean of the last `average`
+            segment periodograms, so only the newest hop is computed on each update.
+
+        Args:
+            segment: segment length in seconds, frequency resolution is `1 / segment` Hz.
+            overlap: fraction of overlap between consecutive segments, in range `[0, 1)`.
+            average: number of segments averaged, the spectrum covers
+                `segment * (1 + (average - 1) * (1 - overlap))` seconds of data.
+            bands: band name and `(low, high)` frequency range in Hz, defaults to EEG bands delta to gamma.
+        """
+        if not 0 <= overlap < 1:
+            raise ValueError("Overlap should be in range [0, 1).")
+        self.__segment = segment
+        self.__overlap = overlap
+        self.__average = int(average)
+        self.bands = dict(BANDS if bands is None else bands)
+        self.fs: Optional[float] = None
+
+    def bind(self, fs: float, columns: int, discrete: tuple = ()) -> None:
+        """
+        Allocate buffers for a stream and clear results, invoked by devices on acquisition start.
+
+        Args:
+            fs: sample frequency of the stream in Hz.
+            columns: number of columns of each block.
+            discrete: indexes of columns excluded from spectrum, e.g. trigger channel.
+        """
+        self.fs = float(fs)
+        discrete = [i % columns for i in discrete]
+        self._channels = [i for i in range(columns) if i not in discrete]
+        self._nperseg = max(int(round(self.__segment * self.fs)), 2)
+        self._hop = max(int(round(self._nperseg * (1 - self.__overlap))), 1)
+        window = np.hanning(self._nperseg + 1)[:-1]  # periodic Hann
+        self._window = window[:, None]
+        self._freqs = np.fft.rfftfreq(self._nperseg, 1 / self.fs)
+        scale = np.full(len(self._freqs), 2 / (self.fs * np.sum(window**2)))
+        scale[0] /= 2
+        if self._nperseg % 2 == 0:
+            scale[-1] /= 2
+        self._scale = scale[:, None]
+        df = self._freqs[1] - self._freqs[0]
+        self._band_matrix = np.array(
+            [
+                ((self._freqs >= low) & (self._freqs < high)) * df
+                for low, high in self.bands.values()
+            ]
+        ).reshape(len(self.bands), len(self._freqs))
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear buffered data and results."""
+        self._buffer = np.zeros((0, len(self._channels)))
+        self._periodograms = np.zeros(
+            (self.__average, len(self._freqs), len(self._channels))
+        )
+        self._sum = np.zeros((len(self._freqs), len(self._channels)))
+        self._count = 0
+        self._samples = 0
+        self._result = None
+
+    def feed(self, block) -> None:
+        """
+        Account a block of consecutive samples, invoked by devices on every received block.
+
+        Args:
+            block: array like in shape `(samples, columns)`.
+        """
+        block = np.asarray(block, dtype=float)
+        if block.size == 0:
+            return
+        self._samples += len(block)
+        self._buffer = np.concatenate((self._buffer, block[:, self._channels]))
+        n = (len(self._buffer) - self._nperseg) // self._hop + 1
+        if n <= 0:
+            return
+        from numpy.lib.stride_tricks import sliding_window_view
+
+        # (segments, channels, nperseg) view of new segments, transformed at once,
+        # segments pushed out of the average are skipped
+        skip = max(n - self.__average, 0)
+        segments = sliding_window_view(self._buffer, self._nperseg, axis=0)
+        segments = segments[skip * self._hop : n * self._hop : self._hop]
+        segments = segments - segments.mean(axis=-1, keepdims=True)
+        spectra = np.fft.rfft(segments * self._window.T, axis=-1)
+        power = (spectra.real**2 + spectra.imag**2).transpose(0, 2, 1) * self._scale
+        self._count += skip
+        for periodogram in power:
+            slot = self._count % self.__average
+            self._sum += periodogram - self._periodograms[slot]
+            self._periodograms[slot] = periodogram
+            self._count += 1
+            if slot == self.__average - 1:  # drop accumulated rounding error
+                self._sum = self._periodograms.sum(axis=0)
+        end = self._samples - len(self._buffer) + (n - 1) * self._hop + self._nperseg
+        self._buffer = self._buffer[n * self._hop :]
+        psd = self._sum / min(self._count, self.__average)
+        bands = self._band_matrix @ psd
+        self._result = {
+            "freqs": self._freqs,
+            "psd": psd,
+            "bands": dict(zip(self.bands, bands)),
+            "segments": min(self._count, self.__average),
+            "samples": end,
+        }
+
+    def get_spectrum(self) -> Optional[dict]:
+        """
+        Get the latest spectrum, return immediately.
+
+        Returns:
+            `None` if less than one segment received, otherwise a dictionary containing:
+                `freqs`: frequencies in Hz, in shape `(freqs,)`;
+                `psd`: power spectral density in µV²/Hz, in shape `(freqs, channels)`;
+                `bands`: band name and band power in µV² per channel;
+                `segments`: number of segments averaged;
+                `samples`: samples accounted up to the end of the newest segment.
+        """
+        return self._result
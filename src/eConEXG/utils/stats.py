@@ -0,0 +1,247 @@
+import json
+import logging
+import time
+from threading import Thread
+from typing import Optional
+
+# upper bounds of lost frames per gap, for the Prometheus histogram
+GAP_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class linkStats:
+    def __init__(self, name: str, interval: float = 1.0):
+        """
+        Link quality counters of a device stream, updated by the parser and the receive thread.
+
+        Counters are plain integers updated from the receive thread only, readers get a snapshot
+            from `get()`. Warnings are sent to the `eConEXG.<name>` logger, at most one per `interval`
+            seconds, the number of suppressed messages is appended to the next one.
+
+        Args:
+            name: device name used for the logger and exported labels.
+            interval: minimum seconds between warnings, also the update period of rates.
+        """
+        self.name = name
+        self.interval = interval
+        self.logger = logging.getLogger(f"eConEXG.{name}")
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear all counters, invoked by devices on acquisition start."""
+        self.started = time.perf_counter()
+        self.bytes = 0
+        self.frames = 0
+        self.blocks = 0
+        self.checksum_errors = 0
+        self.seq_gaps = 0
+        self.lost_frames = 0
+        self.resync_bytes = 0
+        self.reconnects = 0
+        self.gaps: dict[int, int] = {}
+        self.parse_time = 0.0
+        self.parse_time_max = 0.0
+        self.bytes_rate = 0.0
+        self.frames_rate = 0.0
+        self.__mark = (self.started, 0, 0)
+        self.__logged = 0.0
+        self.__suppressed = 0
+
+    def add_block(self, nbytes: int, parse_time: float) -> None:
+        """Account a received block and the time spent parsing it."""
+        self.bytes += nbytes
+        self.blocks += 1
+        self.parse_time += parse_time
+        if parse_time > self.parse_time_max:
+            self.parse_time_max = parse_time
+        now = time.perf_counter()
+        elapsed = now - self.__mark[0]
+        if elapsed >= self.interval:
+            self.bytes_rate = (self.bytes - self.__mark[1]) / elapsed
+            self.frames_rate = (self.frames - self.__mark[2]) / elapsed
+            self.__mark = (now, self.bytes, self.frames)
+
+    def add_frames(self, n: int) -> None:
+        self.frames += n
+
+    def add_checksum_error(self, n: int = 1) -> None:
+        self.checksum_errors += n
+
+    def add_gap(self, lost: int) -> None:
+        """Account a sequence discontinuity of `lost` missing frames."""
+        self.seq_gaps += 1
+        self.lost_frames += lost
+        self.gaps[lost] = self.gaps.get(lost, 0) + 1
+
+    def add_resync(self, nbytes: int) -> None:
+        """Account bytes skipped while searching for frame headers."""
+        self.resync_bytes += nbytes
+
+    def add_reconnect(self) -> None:
+        """Account a connection restored during acquisition."""
+        self.reconnects += 1
+
+    def warn(self, message: str) -> None:
+        """Log a warning, rate limited to one per `interval` seconds."""
+        now = time.perf_counter()
+        if now - self.__logged < self.interval:
+            self.__suppressed += 1
+            return
+        if self.__suppressed:
+            message += f" ({self.__suppressed} similar messages suppressed)"
+        self.logger.warning(message)
+        self.__logged = now
+        self.__suppressed = 0
+
+    def get(self) -> dict:
+        """
+        Get a snapshot of counters.
+
+        Returns:
+            A dictionary containing:
+                `elapsed`: seconds since counters reset;
+                `bytes`, `frames`, `blocks`: received bytes, valid frames and blocks;
+                `bytes_per_second`, `frames_per_second`: rates over the last `interval` seconds;
+                `checksum_errors`: frames dropped for invalid checksum;
+                `seq_gaps`, `lost_frames`: sequence discontinuities and frames lost in them;
+                `gap_histogram`: number of gaps by lost frames;
+                `resync_bytes`: bytes skipped between frames;
+                `reconnects`: connections restored during acquisition;
+                `parse_time_mean`, `parse_time_max`: parse time per block in seconds.
+        """
+        return {
+            "elapsed": time.perf_counter() - self.started,
+            "bytes": self.bytes,
+            "frames": self.frames,
+            "blocks": self.blocks,
+            "bytes_per_second": self.bytes_rate,
+            "frames_per_second": self.frames_rate,
+            "checksum_errors": self.checksum_errors,
+            "seq_gaps": self.seq_gaps,
+            "lost_frames": self.lost_frames,
+            "gap_histogram": dict(sorted(self.gaps.items())),
+            "resync_bytes": self.resync_bytes,
+            "reconnects": self.reconnects,
+            "parse_time_mean": self.parse_time / max(self.blocks, 1),
+            "parse_time_max": self.parse_time_max,
+        }
+
+    def export(self, fmt: str = "json") -> str:
+        """
+        Serialize counters.
+
+        Args:
+            fmt: `"json"` or `"prometheus"` text exposition format.
+
+        Returns:
+            Serialized counters.
+        """
+        if fmt == "json":
+            stats = self.get()
+            stats["device"] = self.name
+            return json.dumps(stats)
+        if fmt == "prometheus":
+            return to_prometheus({self.name: self.get()})
+        raise ValueError("Format should be 'json' or 'prometheus'.")
+
+
+def to_prometheus(stats: dict[str, dict]) -> str:
+    """
+    Format counters of several devices in Prometheus text exposition format.
+
+    Args:
+        stats: device name and dictionary returned by `linkStats.get()`.
+
+    Returns:
+        Metrics text, one sample per device labelled by `device`.
+    """
+    metrics = {
+        "bytes": ("counter", "Received bytes."),
+        "frames": ("counter", "Valid frames."),
+        "checksum_errors": ("counter", "Frames dropped for invalid checksum."),
+        "seq_gaps": ("counter", "Sequence discontinuities."),
+        "lost_frames": ("counter", "Frames lost in sequence discontinuities."),
+        "resync_bytes": ("counter", "Bytes skipped between frames."),
+        "reconnects": ("counter", "Connections restored during acquisition."),
+        "bytes_per_second": ("gauge", "Received bytes per second."),
+        "frames_per_second": ("gauge", "Valid frames per second."),
+        "parse_time_mean": ("gauge", "Mean parse time per block in seconds."),
+        "parse_time_max": ("gauge", "Max parse time per block in seconds."),
+    }
+    lines = []
+    for key, (kind, text) in metrics.items():
+        name = f"econexg_{key}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+        for dev, value in stats.items():
+            lines.append(f'{name}{{device="{dev}"}} {value[key]}')
+    name = "econexg_gap_size"
+    lines += [f"# HELP {name} Lost frames per gap.", f"# TYPE {name} histogram"]
+    for dev, value in stats.items():
+        hist = value["gap_histogram"]
+        for bound in GAP_BUCKETS:
+            count = sum(n for size, n in hist.items() if size <= bound)
+            lines.append(f'{name}_bucket{{device="{dev}",le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{device="{dev}",le="+Inf"}} {value["seq_gaps"]}')
+        lines.append(f'{name}_sum{{device="{dev}"}} {value["lost_frames"]}')
+        lines.append(f'{name}_count{{device="{dev}"}} {value["seq_gaps"]}')
+    return "\n".join(lines) + "\n"
+
+
+class statsExporter(Thread):
+    def __init__(self, devices: dict, port: int = 9108, host: str = "127.0.0.1"):
+        """
+        Serve `get_stats()` of devices over HTTP, `/metrics` in Prometheus text format and `/stats` in JSON.
+
+        Args:
+            devices: name and device instance, e.g. `{"eeg": iRecorder("W32")}`.
+            port: TCP port to listen on.
+            host: interface to listen on, `"0.0.0.0"` for all.
+
+        Examples:
+            >>> exporter = statsExporter({"eeg": dev})
+            >>> exporter.start()
+            >>> exporter.close()
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        super().__init__(daemon=True, name="statsExporter")
+        self.devices = devices
+
+        exporter = self
+
+        class handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stats = exporter.collect()
+                if self.path == "/metrics":
+                    body = to_prometheus(stats)
+                    kind = "text/plain; version=0.0.4"
+                elif self.path == "/stats":
+                    body = json.dumps(stats)
+                    kind = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                body = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", kind)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), handler)
+
+    def collect(self) -> dict[str, dict]:
+        """Get counters of all devices."""
+        return {name: dev.get_stats() for name, dev in self.devices.items()}
+
+    def run(self):
+        self.server.serve_forever()
+
+    def close(self, timeout: Optional[float] = None):
+        """Stop serving and release the port."""
+        if self.is_alive():
+            self.server.shutdown()
+            self.join(timeout)
+        self.server.server_close()
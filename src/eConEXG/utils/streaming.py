@@ -0,0 +1,285 @@
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+from collections import deque
+from threading import Thread
+from typing import Optional
+
+import numpy as np
+
+# magic, version, kind, dtype, stream, channels, rows, index of first row
+HEADER = struct.Struct("<2sBBBBHIQ")
+MAGIC = b"EX"
+VERSION = 1
+KIND_DATA = 0
+KIND_INFO = 1
+DTYPES = {0: np.dtype("<f4"), 1: np.dtype("<i4")}
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def encode_block(data, stream: int = 0, index: int = 0) -> bytes:
+    """
+    Encode a block of samples as one message.
+
+    Args:
+        data: samples in shape `(rows, channels)`, integer data is sent as `int32`, other as `float32`.
+        stream: stream id, e.g. `0` for EXG and `1` for IMU.
+        index: sample index of the first row.
+
+    Returns:
+        `HEADER` followed by rows in little-endian row major order.
+    """
+    block = np.asarray(data)
+    if block.ndim == 1:
+        block = block.reshape(len(block), -1)
+    code = 1 if np.issubdtype(block.dtype, np.integer) else 0
+    payload = block.astype(DTYPES[code], copy=False).tobytes()
+    rows, chs = block.shape
+    return (
+        HEADER.pack(MAGIC, VERSION, KIND_DATA, code, stream, chs, rows, index) + payload
+    )
+
+
+def encode_info(info: dict) -> bytes:
+    """Encode stream information as a JSON message, its length is stored in `rows`."""
+
+    def convert(value):
+        return value.tolist() if hasattr(value, "tolist") else str(value)
+
+    payload = json.dumps(info, default=convert).encode()
+    return HEADER.pack(MAGIC, VERSION, KIND_INFO, 0, 0, 0, len(payload), 0) + payload
+
+
+def decode_message(message: bytes) -> tuple[int, int, int, object]:
+    """
+    Decode a message received from `streamServer`.
+
+    Args:
+        message: one whole message.
+
+    Returns:
+        `(kind, stream, index, value)`, `value` is a dictionary for `KIND_INFO` messages and an array
+            in shape `(rows, channels)` for `KIND_DATA` messages.
+
+    Raises:
+        ValueError: if message header is invalid.
+    """
+    magic, version, kind, code, stream, chs, rows, index = HEADER.unpack_from(message)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Invalid message header.")
+    payload = memoryview(message)[HEADER.size :]
+    if kind == KIND_INFO:
+        return kind, stream, index, json.loads(bytes(payload[:rows]))
+    data = np.frombuffer(payload, DTYPES[code], rows * chs).reshape(rows, chs)
+    return kind, stream, index, data
+
+
+def message_size(header: bytes) -> int:
+    """Total length of a message from its first `HEADER.size` bytes, for reading a TCP stream."""
+    _, _, kind, code, _, chs, rows, _ = HEADER.unpack_from(header)
+    if kind == KIND_INFO:
+        return HEADER.size + rows
+    return HEADER.size + rows * chs * DTYPES[code].itemsize
+
+
+def _ws_frame(payload: bytes) -> bytes:
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x82, n)
+    elif n < 1 << 16:
+        head = struct.pack("!BBH", 0x82, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x82, 127, n)
+    return head + payload
+
+
+class _client:
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.pending = deque()
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+
+class streamServer(Thread):
+    def __init__(
+        self,
+        port: int = 9109,
+        host: str = "127.0.0.1",
+        protocol: str = "tcp",
+        policy: str = "drop",
+        max_pending: int = 64,
+    ):
+        """
+        Send device data to any number of remote clients over TCP or WebSocket, attach it to devices by `set_stream()`.
+
+        Each block of samples is encoded once into a message of `HEADER`, a 20 bytes little-endian header,
+            followed by `float32` or `int32` samples, and the same bytes are queued to every client,
+            see `encode_block()` and `decode_message()`. A JSON message with device information is sent
+            first on connection and whenever acquisition starts. Over TCP messages are sent back to back,
+            `message_size()` gives the length of a message from its header. Over WebSocket each message
+            is a binary frame. Clients send nothing, incoming bytes are discarded.
+
+        Clients that can't keep up are handled by `policy`: with `"drop"` the oldest queued messages are
+            dropped once `max_pending` messages are queued, with `"disconnect"` the client is disconnected.
+
+        Args:
+            port: TCP port to listen on, `0` for any free port, the bound port is available in `port`.
+            host: interface to listen on, `"0.0.0.0"` for all.
+            protocol: `"tcp"` or `"websocket"`.
+            policy: `"drop"` or `"disconnect"`.
+            max_pending: messages queued per client before `policy` applies.
+
+        Raises:
+            ValueError: if arguments are invalid.
+            OSError: if the port can't be bound.
+
+        Examples:
+            >>> server = streamServer(9109, protocol="websocket")
+            >>> server.start()
+            >>> dev.set_stream(server)
+            >>> server.close()
+        """
+        if protocol not in ("tcp", "websocket"):
+            raise ValueError("Protocol should be 'tcp' or 'websocket'.")
+        if policy not in ("drop", "disconnect"):
+            raise ValueError("Policy should be 'drop' or 'disconnect'.")
+        if max_pending < 1:
+            raise ValueError("max_pending should be positive.")
+        super().__init__(daemon=True, name="streamServer")
+        self.protocol = protocol
+        self.policy = policy
+        self.max_pending = max_pending
+        self.dropped = 0
+        self.disconnected = 0
+        self.__clients: set[_client] = set()
+        self.__info = self.__wrap(encode_info({}))
+        self.__index: dict[int, int] = {}
+        self.__loop = asyncio.new_event_loop()
+        self.__server = self.__loop.run_until_complete(
+            asyncio.start_server(self.__serve, host, port)
+        )
+        self.port = self.__server.sockets[0].getsockname()[1]
+
+    @property
+    def clients(self) -> int:
+        """Number of connected clients."""
+        return len(self.__clients)
+
+    def set_info(self, info: dict) -> None:
+        """Send device information to connected clients and clients connecting later, sample indexes restart from 0."""
+        payload = self.__wrap(encode_info(info))
+        self.__index.clear()
+        self.__info = payload
+        if self.__loop.is_closed():
+            return
+        self.__loop.call_soon_threadsafe(self.__fanout, payload)
+
+    def publish(self, data, stream: int = 0) -> None:
+        """
+        Send a block of samples to all clients, thread safe.
+
+        Args:
+            data: samples in shape `(rows, channels)`.
+            stream: stream id.
+        """
+        index = self.__index.get(stream, 0)
+        self.__index[stream] = index + len(data)
+        if not self.__clients or not len(data) or self.__loop.is_closed():
+            return
+        payload = self.__wrap(encode_block(data, stream, index))
+        self.__loop.call_soon_threadsafe(self.__fanout, payload)
+
+    def __wrap(self, message: bytes) -> bytes:
+        return _ws_frame(message) if self.protocol == "websocket" else message
+
+    def __fanout(self, payload: bytes):
+        for client in list(self.__clients):
+            if len(client.pending) >= self.max_pending:
+                if self.policy == "disconnect":
+                    self.__clients.discard(client)
+                    self.disconnected += 1
+                    client.writer.close()
+                    continue
+                client.pending.popleft()
+                client.dropped += 1
+                self.dropped += 1
+            client.pending.append(payload)
+            client.ready.set()
+
+    async def __send(self, client: _client):
+        try:
+            while True:
+                await client.ready.wait()
+                client.ready.clear()
+                while client.pending:
+                    client.writer.write(client.pending.popleft())
+                    await client.writer.drain()
+        except (ConnectionError, OSError):
+            client.writer.close()
+
+    async def __serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            if self.protocol == "websocket" and not await _handshake(reader, writer):
+                writer.close()
+                return
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, OSError):
+            writer.close()
+            return
+        client = _client(writer)
+        client.pending.append(self.__info)
+        client.ready.set()
+        self.__clients.add(client)
+        sender = asyncio.ensure_future(self.__send(client))
+        try:
+            while await reader.read(4096):
+                pass
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.__clients.discard(client)
+            sender.cancel()
+            writer.close()
+
+    def run(self):
+        self.__loop.run_forever()
+
+    async def __shutdown(self):
+        self.__server.close()
+        for client in list(self.__clients):
+            client.writer.close()
+        self.__clients.clear()
+        await self.__server.wait_closed()
+
+    def close(self, timeout: Optional[float] = None):
+        """Disconnect all clients and release the port."""
+        if self.is_alive():
+            future = asyncio.run_coroutine_threadsafe(self.__shutdown(), self.__loop)
+            future.result(timeout)
+            self.__loop.call_soon_threadsafe(self.__loop.stop)
+            self.join(timeout)
+        else:
+            self.__loop.run_until_complete(self.__shutdown())
+        self.__loop.close()
+
+
+async def _handshake(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> bool:
+    request = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    key = None
+    for line in request.split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "sec-websocket-key":
+            key = value.strip()
+    if key is None:
+        writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+        return False
+    accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest())
+    writer.write(
+        b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+        b"Connection: Upgrade\r\nSec-WebSocket-Accept: " + accept + b"\r\n\r\n"
+    )
+    return True
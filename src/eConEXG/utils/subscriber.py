@@ -0,0 +1,120 @@
+import traceback
+from collections import deque
+from threading import Condition, Thread
+from typing import Callable, Optional
+
+import numpy as np
+
+POLICIES = ("block", "drop_oldest", "coalesce")
+
+
+class blockSubscriber(Thread):
+    def __init__(
+        self,
+        callback: Callable[[np.ndarray], None],
+        block_size: int = 50,
+        dtype: Optional[np.dtype] = None,
+        policy: str = "drop_oldest",
+        max_pending: int = 16,
+        name: str = "subscriber",
+    ):
+        """
+        Deliver received rows to a callback in fixed-size NumPy blocks, invoked from a worker thread.
+
+        The receive loop calls `feed()`, which converts rows to `dtype`, cuts them into blocks of
+            `block_size` rows and queues them, rows of an incomplete block wait for the next call.
+            The worker thread invokes `callback` with each block, so a slow callback delays the
+            worker, not the transport, and `policy` decides what happens once `max_pending` blocks
+            are queued:
+
+            - `"block"`: `feed()` waits for the callback, nothing is dropped but the receive loop stalls.
+            - `"drop_oldest"`: the oldest queued block is dropped, counted in `dropped`.
+            - `"coalesce"`: the callback receives all queued blocks concatenated, in shape
+                `(k * block_size, columns)`, the oldest block is dropped once `max_pending` are queued.
+
+            Exceptions raised by `callback` are printed and the worker continues with the next block.
+
+        Args:
+            callback: function invoked with each block, in shape `(block_size, columns)`.
+            block_size: rows per block.
+            dtype: block data type, `None` keeps the received type.
+            policy: one of `"block"`, `"drop_oldest"` and `"coalesce"`.
+            max_pending: blocks queued before `policy` applies.
+            name: worker thread name.
+
+        Raises:
+            ValueError: if `block_size` or `max_pending` is less than 1, or `policy` is unknown.
+        """
+        if block_size < 1 or max_pending < 1:
+            raise ValueError("block_size and max_pending must be at least 1.")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, use one of {POLICIES}.")
+        super().__init__(daemon=True, name=name)
+        self.callback = callback
+        self.block_size = block_size
+        self.dtype = dtype
+        self.policy = policy
+        self.max_pending = max_pending
+        self.dropped = 0
+        self.delivered = 0
+        self.closed = False
+        self.__blocks: deque = deque()
+        self.__cond = Condition()
+        self.__rest: Optional[np.ndarray] = None
+
+    def feed(self, rows) -> None:
+        """Append rows in shape `(rows, columns)`, queue every completed block."""
+        # own copy, rows may also be returned by get_data() and blocks may be written by callbacks
+        rows = np.array(rows, dtype=self.dtype, copy=True)
+        if not rows.size or self.closed:
+            return
+        rest = self.__rest
+        if rest is not None and len(rest) and rest.shape[1:] == rows.shape[1:]:
+            rows = np.concatenate((rest, rows))
+        count = len(rows) // self.block_size
+        split = count * self.block_size
+        self.__rest = rows[split:].copy()
+        if not count:
+            return
+        blocks = rows[:split].reshape(count, self.block_size, *rows.shape[1:])
+        with self.__cond:
+            for block in blocks:
+                if self.policy == "block":
+                    while len(self.__blocks) >= self.max_pending and not self.closed:
+                        self.__cond.wait()
+                elif len(self.__blocks) >= self.max_pending:
+                    self.__blocks.popleft()
+                    self.dropped += 1
+                self.__blocks.append(block)
+            self.__cond.notify_all()
+
+    def reset(self) -> None:
+        """Discard rows of an incomplete block, invoked when acquisition restarts."""
+        self.__rest = None
+
+    def close(self, timeout: Optional[float] = 5) -> None:
+        """Deliver queued blocks and stop the worker thread."""
+        with self.__cond:
+            self.closed = True
+            self.__cond.notify_all()
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self):
+        while True:
+            with self.__cond:
+                while not self.__blocks and not self.closed:
+                    self.__cond.wait()
+                if not self.__blocks:
+                    return
+                if self.policy == "coalesce" and len(self.__blocks) > 1:
+                    block = np.concatenate(self.__blocks)
+                    self.__blocks.clear()
+                else:
+                    block = self.__blocks.popleft()
+                self.__cond.notify_all()
+            try:
+                self.callback(block)
+            except Exception:
+                traceback.print_exc()
+            self.delivered += len(block) // self.block_size
@@ -0,0 +1,69 @@
+import time
+from collections import deque
+from typing import Optional
+
+
+class timestampModel:
+    """
+    Map sample indexes of a stream to host `time.perf_counter()` time.
+
+    Each received chunk gives a pair of (samples received so far, arrival time).
+    A chunk can only arrive *after* its last sample was taken, so the lower envelope
+    of `arrival - count / fs` is the best estimate of the stream start time.
+    The effective sample rate is refitted from the same pairs once enough history
+    is available, which compensates the crystal drift of long recordings.
+    """
+
+    def __init__(self, fs: float, history: float = 30, refit_interval: float = 1):
+        self.fs = float(fs)
+        self._history = history
+        self._refit_interval = refit_interval
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.rate = self.fs
+        self.offset: Optional[float] = None
+        self.latency = 0.0
+        self._points = deque()
+        self._last_fit = 0.0
+
+    def update(self, n_samples: int, arrival: Optional[float] = None):
+        """Account `n_samples` new samples received at `arrival`, defaults to now."""
+        if arrival is None:
+            arrival = time.perf_counter()
+        self.count += n_samples
+        self._points.append((self.count, arrival))
+        while arrival - self._points[0][1] > self._history:
+            self._points.popleft()
+        if arrival - self._last_fit > self._refit_interval:
+            self._refit()
+            self._last_fit = arrival
+        start = arrival - self.count / self.rate
+        if self.offset is None or start < self.offset:
+            self.offset = start
+        self.latency = arrival - self.time_of(self.count - 1)
+
+    def _refit(self):
+        if len(self._points) < 8:
+            return
+        first, last = self._points[0], self._points[-1]
+        if last[1] - first[1] < self._history / 3:
+            return
+        rate = (last[0] - first[0]) / (last[1] - first[1])
+        if abs(rate - self.fs) > self.fs * 0.01:
+            return  # stalls and bursts, keep previous estimation
+        self.rate = rate
+        self.offset = min(t - c / rate for c, t in self._points)
+
+    def time_of(self, index):
+        """Host time of sample `index`, accepts scalars and NumPy arrays."""
+        if self.offset is None:
+            raise ValueError("No sample received yet.")
+        return self.offset + (index + 1) / self.rate
+
+    def index_of(self, timestamp: float) -> float:
+        """Fractional sample index taken at host time `timestamp`."""
+        if self.offset is None:
+            raise ValueError("No sample received yet.")
+        return (timestamp - self.offset) * self.rate - 1
@@ -0,0 +1,373 @@
+import multiprocessing
+import time
+import traceback
+from multiprocessing import shared_memory
+from threading import Event, Lock, Thread
+from typing import Optional, Union
+
+import numpy as np
+
+NESTED = ("iFocus", "DFocus", "eConAlpha")
+# control block: generation and columns of each stream ring, worker error flag
+_CONTROL = 8
+_ERROR = 4
+
+
+class sharedRing:
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        columns: int = 1,
+        capacity: int = 1 << 16,
+    ):
+        """
+        Single producer, single consumer ring of `float64` rows in shared memory.
+
+        The block starts with the count of rows ever written, the ring capacity and columns as `int64`,
+            followed by `capacity` rows. The writer copies rows then advances the count, a reader keeps its own
+            position and loses the oldest rows once the writer is a whole ring ahead.
+
+        Args:
+            name: shared memory name to attach to, `None` to create a new block.
+            columns: values per row, used when creating.
+            capacity: rows in the ring, used when creating.
+        """
+        if name is None:
+            size = 32 + columns * capacity * 8
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            np.ndarray(3, np.int64, self.shm.buf)[:] = (0, capacity, columns)
+        else:
+            self.shm = shared_memory.SharedMemory(name)
+        self.name = self.shm.name
+        self.__head = np.ndarray(3, np.int64, self.shm.buf)
+        self.capacity, self.columns = int(self.__head[1]), int(self.__head[2])
+        self.__rows = np.ndarray(
+            (self.capacity, self.columns), np.float64, self.shm.buf, offset=32
+        )
+        self.dropped = 0
+
+    def write(self, rows: np.ndarray) -> None:
+        count, capacity = int(self.__head[0]), self.capacity
+        if len(rows) > capacity:
+            count += len(rows) - capacity
+            rows = rows[-capacity:]
+        start = count % capacity
+        first = min(len(rows), capacity - start)
+        self.__rows[start : start + first] = rows[:first]
+        self.__rows[: len(rows) - first] = rows[first:]
+        self.__head[0] = count + len(rows)
+
+    def read(self, pos: int) -> tuple[np.ndarray, int]:
+        """Copy rows written since `pos`, return them and the new position."""
+        written, capacity = int(self.__head[0]), self.capacity
+        if written - pos > capacity:
+            self.dropped += written - pos - capacity
+            pos = written - capacity
+        index = np.arange(pos, written) % capacity
+        rows = self.__rows[index]
+        lapped = int(self.__head[0]) - pos - capacity  # overwritten while copying
+        if lapped > 0:
+            self.dropped += lapped
+            rows = rows[lapped:]
+        return rows, written
+
+    def close(self, unlink: bool = False) -> None:
+        self.__head = self.__rows = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _blocks(data, nested: bool) -> list[np.ndarray]:
+    if isinstance(data, tuple):  # raw mode of nested devices
+        return [np.asarray(block, dtype=np.float64) for block in data]
+    if nested:
+        exg = np.asarray([frame[:-1] for frame in data], dtype=np.float64)
+        imu = np.asarray([frame[-1] for frame in data], dtype=np.float64)
+        return [exg.reshape(-1, exg.shape[-1]), imu]
+    return [np.asarray(data, dtype=np.float64)]
+
+
+class _pump(Thread):
+    def __init__(self, device, control_name: str, nested: bool, capacity: int):
+        super().__init__(daemon=True, name="processDevice pump")
+        self.device = device
+        self.nested = nested
+        self.capacity = capacity
+        self.active = Event()
+        self.busy = Lock()
+        self.closed = False
+        self.error = None
+        self.rings: list[Optional[sharedRing]] = [None, None]
+        self.__retired: list[sharedRing] = []
+        self.__names = None
+        self.__control_shm = shared_memory.SharedMemory(control_name)
+        self.control = np.ndarray(_CONTROL, np.int64, self.__control_shm.buf)
+
+    def run(self):
+        while not self.closed:
+            if not self.active.wait(0.1):
+                continue
+            with self.busy:
+                if not self.active.is_set():
+                    continue
+                try:
+                    data = self.device.get_data(timeout=0.1)
+                    if data is not None and len(data):
+                        for stream, block in enumerate(_blocks(data, self.nested)):
+                            self.__write(stream, block)
+                except Exception as e:
+                    self.error = e
+                    self.active.clear()
+                    self.control[_ERROR] = 1
+
+    def pause(self):
+        """Stop draining the device, wait for a pending `get_data()` to return."""
+        self.active.clear()
+        with self.busy:
+            pass
+
+    def __write(self, stream: int, block: np.ndarray):
+        if not len(block):
+            return
+        ring = self.rings[stream]
+        if ring is None or ring.columns != block.shape[1]:
+            if ring is not None:  # readers may still be attached
+                self.__retired.append(ring)
+            ring = self.rings[stream] = sharedRing(None, block.shape[1], self.capacity)
+            self.__publish(stream, ring.name.encode())
+            self.control[stream * 2 + 1] = block.shape[1]
+            self.control[stream * 2] += 1
+        ring.write(block)
+
+    def __publish(self, stream: int, name: bytes):
+        # ring names are published next to the control block, before its generation changes
+        if self.__names is None:
+            self.__names = shared_memory.SharedMemory(
+                self.__control_shm.name + "n", create=True, size=128
+            )
+        self.__names.buf[stream * 64 : stream * 64 + 64] = name.ljust(64, b"\0")
+
+    def close(self):
+        self.closed = True
+        self.pause()
+        for ring in self.rings + self.__retired:
+            if ring is not None:
+                ring.close(unlink=True)
+        if self.__names is not None:
+            self.__names.close()
+            self.__names.unlink()
+        self.control = None
+        self.__control_shm.close()
+
+
+def _serve(conn, cls: str, args: tuple, kwargs: dict, control: str, capacity: int):
+    import eConEXG
+
+    try:
+        device = getattr(eConEXG, cls)(*args, **kwargs)
+    except Exception as e:
+        conn.send((False, e))
+        return
+    pump = _pump(device, control, cls in NESTED, capacity)
+    pump.start()
+    conn.send((True, None))
+    while True:
+        try:
+            name, args, kwargs = conn.recv()
+        except EOFError:  # parent exited
+            name, args, kwargs = "close_dev", (), {}
+        if name in ("stop_acquisition", "start_acquisition_impedance", "close_dev"):
+            pump.pause()
+        try:
+            if name == "_error":  # fetch the error flagged in the control block
+                ret, pump.error = pump.error, None
+                pump.control[_ERROR] = 0
+            else:
+                ret = getattr(device, name)(*args, **kwargs)
+            if name == "start_acquisition_data":
+                pump.active.set()
+            reply = (True, ret)
+        except Exception as e:
+            reply = (False, e)
+        if name == "close_dev":
+            pump.close()
+        try:
+            conn.send(reply)
+        except (OSError, EOFError):
+            pass
+        if name == "close_dev":
+            return
+
+
+class processDevice:
+    def __init__(self, device: str, *args, capacity: int = 1 << 16, **kwargs):
+        """
+        Run a device, its transport, parser and sinks in a child process, controlled through this proxy.
+
+        Decoding, BDF writing and LSL pushing then use the GIL of the child process, so heavy code in the
+            calling process can't starve acquisition. Method calls are forwarded to the device in the child
+            and return its results, exceptions are raised again here. While data acquisition runs, the child
+            drains `get_data()` of the device into `sharedRing` blocks in shared memory, which `get_data()`
+            of this proxy reads without pickling. The child process is spawned, so scripts using it need an
+            `if __name__ == "__main__":` guard on Windows and macOS. Arguments and results of forwarded
+            calls must be picklable, callbacks such as update functions or a `streamServer` can't be set.
+
+        Args:
+            device: device class name, e.g. `"iRecorder"`, `"iFocus"`.
+            args: positional arguments of the device class.
+            capacity: rows kept in shared memory per stream, older rows are dropped once the
+                reader is that far behind, counted in `dropped`.
+            kwargs: keyword arguments of the device class.
+
+        Raises:
+            Exception: raised by the device class in the child process.
+
+        Examples:
+            >>> dev = processDevice("iRecorder", "W32")
+            >>> dev.connect_device(dev.find_devs(duration=3)[0])
+            >>> dev.start_acquisition_data()
+            >>> data = dev.get_data(timeout=0.02)
+            >>> dev.close_dev()
+        """
+        self.device = device
+        self.__nested = device in NESTED
+        self.__lock = Lock()
+        self.__control_shm = shared_memory.SharedMemory(create=True, size=_CONTROL * 8)
+        self.__control = np.ndarray(_CONTROL, np.int64, self.__control_shm.buf)
+        self.__control[:] = 0
+        self.__rings: list[Optional[sharedRing]] = [None, None]
+        self.__generation = [0, 0]
+        self.__pos = [0, 0]
+        self.__names = None
+        context = multiprocessing.get_context("spawn")
+        self.__conn, child = context.Pipe()
+        self.__process = context.Process(
+            target=_serve,
+            args=(child, device, args, kwargs, self.__control_shm.name, capacity),
+            daemon=True,
+            name=f"processDevice {device}",
+        )
+        self.__process.start()
+        child.close()
+        ok, ret = self.__conn.recv()
+        if not ok:
+            self.__conn.close()
+            self.__conn = None
+            self.__process.join()
+            self.__release()
+            raise ret
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            return self.__call(name, args, kwargs)
+
+        call.__name__ = name
+        return call
+
+    def __call(self, name: str, args: tuple = (), kwargs: Optional[dict] = None):
+        with self.__lock:
+            if self.__conn is None:
+                raise Exception("Device process closed.")
+            self.__conn.send((name, args, kwargs or {}))
+            ok, ret = self.__conn.recv()
+        if not ok:
+            raise ret
+        return ret
+
+    @property
+    def dropped(self) -> int:
+        """Rows dropped because `get_data()` wasn't called often enough."""
+        return sum(ring.dropped for ring in self.__rings if ring is not None)
+
+    def get_data(
+        self, timeout: Optional[float] = 0.02
+    ) -> Union[list, np.ndarray, tuple[np.ndarray, np.ndarray]]:
+        """
+        Get data received since last call.
+
+        Args:
+            timeout: seconds to wait for data, `None` to wait until any arrives.
+
+        Returns:
+            An empty list if no data arrived. Otherwise a `float64` array in shape `(frames, channels + 1)`
+                for iRecorder and iSense, or a tuple of `(exg, imu)` arrays in shape `(samples, exg_channels)`
+                and `(frames, imu_channels)` for iFocus, DFocus and eConAlpha, the same layout as raw mode.
+                Raw counts are exact in `float64`.
+
+        Raises:
+            Exception: raised by `get_data()` of the device in the child process.
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            # the flag is read first, data written before the error is returned first
+            failed = self.__control[_ERROR]
+            blocks = [self.__read(stream) for stream in range(1 + self.__nested)]
+            if any(len(block) for block in blocks):
+                return tuple(blocks) if self.__nested else blocks[0]
+            if failed:
+                error = self.__call("_error")
+                if error is not None:
+                    raise error
+            if deadline is not None and time.perf_counter() >= deadline:
+                return []
+            time.sleep(0.001)
+
+    def __read(self, stream: int) -> np.ndarray:
+        generation = int(self.__control[stream * 2])
+        if generation != self.__generation[stream]:
+            if self.__rings[stream] is not None:
+                self.__rings[stream].close()
+            if self.__names is None:
+                self.__names = shared_memory.SharedMemory(self.__control_shm.name + "n")
+            raw = bytes(self.__names.buf[stream * 64 : stream * 64 + 64])
+            self.__rings[stream] = sharedRing(raw.rstrip(b"\0").decode())
+            self.__generation[stream] = generation
+            self.__pos[stream] = 0
+        ring = self.__rings[stream]
+        if ring is None:
+            return np.empty((0, int(self.__control[stream * 2 + 1])))
+        rows, self.__pos[stream] = ring.read(self.__pos[stream])
+        return rows
+
+    def close_dev(self) -> None:
+        """Close the device and stop the child process."""
+        if self.__conn is None:
+            return
+        try:
+            self.__call("close_dev")
+        except Exception:
+            traceback.print_exc()
+        with self.__lock:
+            self.__conn.close()
+            self.__conn = None
+        self.__process.join(5)
+        self.__release()
+
+    def __release(self):
+        for ring in self.__rings:
+            if ring is not None:
+                ring.close()
+        self.__rings = [None, None]
+        if self.__names is not None:
+            self.__names.close()
+            self.__names = None
+        self.__control = None
+        self.__control_shm.close()
+        self.__control_shm.unlink()
+
+    def __del__(self):
+        # no pipe round trip during garbage collection, the child closes the device
+        # once its end of the pipe reports EOF
+        conn = self.__dict__.get("_processDevice__conn")
+        if conn is None:
+            return
+        self.__conn = None
+        try:
+            conn.close()
+            self.__release()
+        except Exception:
+            pass
@@ -0,0 +1,36 @@
+import time
+
+from eConEXG.utils.capture import captureWriter, read_capture, replaySocket
+
+
+def test_capture_round_trip(tmp_path):
+    filename = str(tmp_path / "capture.ecx")
+    chunks = [b"\xbb\xaa" * n for n in range(1, 6)] + [b""]
+    writer = captureWriter(filename, {"type": "W8"})
+    for chunk in chunks:
+        writer.write(chunk)
+    writer.close()
+    writer.write(b"ignored")
+    header, records = read_capture(filename)
+    assert header["info"] == {"type": "W8"}
+    records = list(records)
+    assert [data for _, data in records] == chunks
+    times = [t for t, _ in records]
+    assert times == sorted(times)
+    replay = replaySocket(filename, realtime=False)
+    assert [replay.recv_socket() for _ in chunks[:-1]] == chunks[:-1]
+    assert replay.recv_socket() == b"" and replay.recv_socket() == b""
+
+
+def test_capture_keeps_given_receive_time(tmp_path):
+    filename = str(tmp_path / "capture.ecx")
+    writer = captureWriter(filename)
+    arrival = time.perf_counter()
+    time.sleep(0.05)  # queued in a reader thread before being written
+    writer.write(b"\x01", arrival + 0.01)
+    writer.write(b"\x02", arrival + 0.03)
+    writer.close()
+    _, records = read_capture(filename)
+    times = [t for t, _ in records]
+    assert abs(times[1] - times[0] - 20_000_000) < 1000
+    assert times[0] < 20_000_000  # not stamped on write, 50 ms later
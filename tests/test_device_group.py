@@ -0,0 +1,87 @@
+from threading import Thread
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from eConEXG.utils.deviceGroup import DeviceGroup
+from eConEXG.utils.markers import markerLog
+
+
+class stubDevice(Thread):
+    def __init__(self, info: dict):
+        super().__init__(daemon=True)
+        self.info = info
+
+    def get_dev_info(self) -> dict:
+        return self.info
+
+
+def ramp(count: int, fs: float) -> np.ndarray:
+    # value of each sample is its time since the stream start
+    return (np.arange(count) + 1) / fs
+
+
+def test_group_merges_and_resamples_devices():
+    group = DeviceGroup(fs=100, block_size=10, max_delay=1.0)
+    group.add_device(stubDevice({"type": "A", "fs": 100, "ch_info": {0: "C1"}}))
+    group.add_device(stubDevice({"type": "B", "fs_exg": 50, "channel_exg": {0: "E1"}}))
+    group.connect()
+    info = group.get_dev_info()
+    assert info["ch_info"] == {0: "A_0:C1", 1: "A_0:Trigger", 2: "B_1:E1"}
+    a, b = group._DeviceGroup__members
+    group._DeviceGroup__grid = None
+    # both streams start at 1.0 s, chunks arrive right after their last sample
+    trigger = np.where(np.arange(20) >= 7, 5, 0)
+    a.append(a.to_block(np.column_stack((ramp(20, 100), trigger)).tolist()), 1.2)
+    exg = ramp(10, 50).reshape(5, 2, 1).tolist()
+    b.append(b.to_block([frame + [[0, 0, 0]] for frame in exg]), 1.2)
+
+    blocks = group._DeviceGroup__collect()
+    assert len(blocks) == 1
+    data, ts = blocks[0]
+    assert ts == pytest.approx(1.02 + np.arange(10) / 100)
+    assert data[:, 0] == pytest.approx(ts - 1)
+    assert data[:, 2] == pytest.approx(ts - 1)  # 50 Hz interpolated
+    assert data[ts < 1.075, 1].tolist() == [0] * 6
+    assert data[ts > 1.085, 1].tolist() == [5] * 3
+
+    # B lags more than max_delay, its columns are filled with nan
+    a.append(a.to_block(np.column_stack((ramp(170, 100)[20:], [5] * 150))), 2.7)
+    blocks = group._DeviceGroup__collect()
+    data = np.concatenate([block[0] for block in blocks])
+    ts = np.concatenate([block[1] for block in blocks])
+    assert ts[-1] <= 2.7
+    assert data[:, 0] == pytest.approx(ts - 1)
+    assert np.isnan(data[ts > 1.2, 2]).all()
+    assert group.get_metrics()["stalls"] > 0
+
+
+class rawDevice(stubDevice):
+    # receive thread fits sample times, a pipeline decimates the queue by 2
+    def __init__(self, info: dict):
+        super().__init__(info)
+        self._dispatch = SimpleNamespace(
+            markers=markerLog(100), decimation=lambda target: 2
+        )
+
+    def get_scale(self) -> tuple:
+        return np.array([0.5]), np.array([1.0, 1.0, 1.0])
+
+
+def test_group_uses_receive_time_and_raw_data():
+    group = DeviceGroup(fs=50, block_size=5, max_delay=1.0)
+    group.add_device(rawDevice({"type": "F", "fs_exg": 100, "channel_exg": {0: "E"}}))
+    group.connect()
+    (member,) = group._DeviceGroup__members
+    group._DeviceGroup__grid = None
+    member.clear()
+    # 20 samples received at 1.2 s, polled as 10 decimated rows 0.3 s later
+    member.model.update(20, 1.2)
+    exg = np.arange(10, dtype=np.int32).reshape(-1, 1) * 4
+    member.append(member.to_block((exg, np.zeros((10, 3), np.int32))), 1.5)
+    assert member.buffer[:, 0].tolist() == [2.0 * i for i in range(10)]
+    assert group.get_metrics()["devices"]["F_0"]["samples"] == 20
+    data, ts = group._DeviceGroup__collect()[0]
+    assert ts == pytest.approx(1.01 + np.arange(5) / 50)
+    assert data[:, 0] == pytest.approx(np.arange(5) * 2.0)
@@ -0,0 +1,113 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from eConEXG.utils import discovery
+from eConEXG.utils.discovery import RULES, deviceRegistry
+
+
+def port(device, vid, pid, serial_number=None, manufacturer=None):
+    return SimpleNamespace(
+        device=device,
+        vid=vid,
+        pid=pid,
+        serial_number=serial_number,
+        manufacturer=manufacturer,
+    )
+
+
+def matches(p) -> dict:
+    ret = {}
+    for dev_type, (transport, matcher, _) in RULES.items():
+        name = matcher(p) if transport == "serial" else None
+        if name is not None:
+            ret[dev_type] = name
+    return ret
+
+
+@pytest.mark.parametrize(
+    "p, expected",
+    [
+        (
+            port("COM3", 0x0483, 0x5740, "IR1_0042"),
+            {"USB8": "iRe8-0042", "triggerBoxWired": "COM3"},
+        ),
+        (
+            port("COM3", 0x0483, 0x5740, "IR2_0042"),
+            {"USB16": "iRe16-0042", "triggerBoxWired": "COM3"},
+        ),
+        (
+            port("COM3", 0x0483, 0x5740, "0042"),
+            {"USB32": "iRe32-0042", "triggerBoxWired": "COM3"},
+        ),
+        (
+            port("COM4", 0x0403, 0x6015, "iFocus_01", "FTDI"),
+            {"iFocus": "COM4", "DFocus": "COM4"},
+        ),
+        (
+            port("COM5", 0x2FE3, 0x0001),
+            {"iFocus": "COM5", "DFocus": "COM5", "eConAlpha": "COM5"},
+        ),
+        (
+            port("COM6", 0x0403, 0x6001, "LIGHTSTIM"),
+            {"triggerBoxWireless": "COM6", "lightStimulator": "COM6"},
+        ),
+        (port("COM7", 0x0403, 0x6001, "A10K"), {"triggerBoxWireless": "COM7"}),
+        (port("COM8", 0x1234, 0x5678), {}),
+    ],
+)
+def test_rules_match_ports(p, expected):
+    assert matches(p) == expected
+
+
+@pytest.fixture
+def ports(monkeypatch):
+    current, busy = [], set()
+    monkeypatch.setattr("serial.tools.list_ports.comports", lambda: list(current))
+    monkeypatch.setattr(
+        discovery, "probe_ports", lambda names: [n for n in names if n not in busy]
+    )
+    return current, busy
+
+
+def test_registry_tracks_hotplug_and_reprobes(ports):
+    current, busy = ports
+    focus = port("COM5", 0x2FE3, 0x0001, "F1")
+    trigger = port("COM6", 0x0403, 0x6001, "T1")
+    current.extend([focus, trigger])
+    busy.update(["COM5", "COM6"])
+    registry = deviceRegistry(poll_interval=60)
+    added, removed = [], []
+    registry.add_callback(added.append, removed.append)
+    assert [d["device"] for d in added] == ["COM5", "COM6"]
+    # busy when plugged in, trigger boxes are never probed
+    assert [d["available"] for d in registry.devices()] == [False, True]
+    busy.clear()
+    registry.refresh(reprobe=False)  # hot-plug event, known ports keep their state
+    assert not registry.devices("eConAlpha")[0]["available"]
+    registry.refresh()
+    assert registry.devices("eConAlpha")[0]["available"]
+    busy.add("COM5")  # opened since
+    assert registry.devices("eConAlpha")[0]["available"]
+    registry.refresh()
+    assert not registry.devices("eConAlpha")[0]["available"]
+    current.remove(focus)
+    registry.refresh()
+    assert [d["device"] for d in removed] == ["COM5"]
+    assert registry.devices("eConAlpha") == []
+    assert [d["types"] for d in registry.devices()] == [{"triggerBoxWireless": "COM6"}]
+
+
+def test_find_first_without_waiting(ports, monkeypatch):
+    current, busy = ports
+    monkeypatch.setattr(discovery, "registry", deviceRegistry(poll_interval=60))
+    finder = discovery.deviceDiscovery()
+    start = time.perf_counter()
+    with pytest.raises(Exception, match="^eConAlpha device not found$"):
+        finder.find_first("eConAlpha", timeout=0)
+    assert time.perf_counter() - start < 0.5
+    current.append(port("COM5", 0x2FE3, 0x0001, "F1"))
+    discovery.registry.refresh()
+    found = finder.find_first("eConAlpha", timeout=0)
+    assert (found["transport"], found["addr"]) == ("serial", "COM5")
@@ -0,0 +1,98 @@
+import time
+from queue import Queue
+
+import numpy as np
+import pytest
+
+from eConEXG.utils.dispatch import epochMixin, frameDispatcher
+from eConEXG.utils.stats import linkStats
+
+
+class stubParser:
+    # each received byte is a frame of two channels and the trigger
+    def __init__(self):
+        self.raw, self.gap_fill, self.gaps, self.max_gap = False, None, [], 255
+        self.scale = np.array([0.5, 0.5, 1.0])
+        self.stats = linkStats("test")
+
+    def parse_data(self, data: bytes):
+        frames = np.column_stack((list(data), list(data), [0] * len(data)))
+        return frames.astype(np.int32) if self.raw else (frames * self.scale).tolist()
+
+
+class sink:
+    def __init__(self):
+        self.chunks, self.markers, self._data_position = [], [], 0
+
+    def write_chunk(self, chunk):
+        self.chunks.append(chunk)
+        self._data_position += len(chunk)
+
+    def push_chunk(self, chunk):
+        self.chunks.append(chunk)
+
+    def write_marker(self, index, label, duration=-1):
+        self.markers.append((index, label))
+
+    def push_marker(self, label, timestamp):
+        self.markers.append(label)
+
+
+class stubDevice(epochMixin):
+    def __init__(self):
+        self._dispatch = frameDispatcher("stub", stubParser(), lambda: b"", 100)
+        self.acquiring = False
+
+    def _check_idle(self):
+        if self.acquiring:
+            raise Exception("Data acquisition in progress, please stop first.")
+
+    def get_dev_info(self) -> dict:
+        return {"type": "stub"}
+
+
+def test_dispatcher_feeds_flat_outputs():
+    dispatch = frameDispatcher("stub", stubParser(), lambda: b"", 100)
+    dispatch.queue = Queue()
+    dispatch.bdf, dispatch.lsl, dispatch.lsl_marker = sink(), sink(), sink()
+    dispatch.lsl_columns = [1, 2]
+    dispatch.start(100, 3, {})
+    arrival = time.perf_counter()
+    dispatch.handle(bytes(range(10)), arrival)
+    dispatch.markers.mark("stim", arrival)
+    dispatch.handle(bytes(range(10, 20)), arrival + 0.1)
+    frames = dispatch.queue.get() + dispatch.queue.get()
+    assert [frame[0] for frame in frames] == [i / 2 for i in range(20)]
+    assert dispatch.lsl.chunks[0][1] == [0.5, 0]  # selected columns only
+    assert dispatch.bdf.markers == [(9, "stim")]
+    assert dispatch.lsl_marker.markers == ["stim"]
+    with pytest.raises(Exception, match="Remote end closed"):
+        dispatch.handle(b"", arrival + 0.2)
+
+
+def test_dispatcher_raw_mode_and_update_function():
+    dispatch = frameDispatcher("stub", stubParser(), lambda: b"", 100)
+    blocks = []
+    dispatch.update, dispatch.bdf, dispatch.raw = blocks.append, sink(), True
+    dispatch.start(100, 3, {})
+    dispatch.handle(bytes(range(4)), time.perf_counter())
+    assert blocks[0].dtype == np.int32 and blocks[0][:, 0].tolist() == [0, 1, 2, 3]
+    assert dispatch.bdf.chunks[0][:, 0].tolist() == [0, 0.5, 1, 1.5]
+
+
+def test_mixin_checks_settings():
+    device = stubDevice()
+    device.set_raw_mode()
+    with pytest.raises(Exception, match="Raw mode enabled"):
+        device.set_pipeline(object())
+    with pytest.raises(ValueError, match="'queue', 'lsl' or 'bdf'"):
+        device.set_pipeline(None, ("queue", "file"))
+    device.acquiring = True
+    with pytest.raises(Exception, match="in progress"):
+        device.set_gap_fill("hold")
+    device.acquiring = False
+    device.set_gap_fill("hold", 10)
+    assert device._dispatch.parser.max_gap == 10
+    assert device.get_scale().tolist() == [0.5, 0.5, 1.0]
+    assert device.get_spectrum() is None and device.get_epochs() is None
+    assert device.send_marker("a", 1.0) == 1.0
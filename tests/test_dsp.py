@@ -0,0 +1,47 @@
+import numpy as np
+
+from eConEXG.utils.dsp import dspPipeline, polyphaseDecimator
+from eConEXG.utils.spectrum import spectralEngine
+
+
+def test_blocks_match_whole_signal():
+    fs = 1000
+    t = np.arange(4 * fs) / fs
+    exg = np.sin(2 * np.pi * 10 * t) + np.sin(2 * np.pi * 50 * t)
+    data = np.stack([exg + 3, exg, np.zeros_like(t)], axis=1)
+    data[1234, -1] = 7  # trigger
+    pipeline = dspPipeline().add_bandpass(1, 40).add_notch(50).set_decimation(4)
+    pipeline.bind(fs, 3, discrete=(-1,))
+    whole = pipeline.process(data)
+    pipeline.reset()
+    blocks = [pipeline.process(data[i : i + 37]) for i in range(0, len(data), 37)]
+    assert np.allclose(np.concatenate(blocks), whole)
+    assert whole.shape == (fs, 3)
+    assert whole[:, -1].tolist().count(7) == 1
+
+
+def test_decimator_rejects_alias():
+    fs = 16000
+    t = np.arange(fs) / fs
+    decimator = polyphaseDecimator(16)
+    for freq, gain in [(100, 1), (700, 0)]:  # output Nyquist is 500 Hz
+        decimator.reset()
+        out = decimator.process(np.sin(2 * np.pi * freq * t)[:, None])
+        assert len(out) == fs // 16
+        assert abs(np.std(out[100:]) * np.sqrt(2) - gain) < 0.01
+
+
+def test_spectrum_matches_welch():
+    from scipy.signal import welch
+
+    fs = 500
+    data = np.random.default_rng(0).standard_normal((fs * 10, 3))
+    engine = spectralEngine(segment=1, overlap=0.5, average=8)
+    engine.bind(fs, 3, discrete=(-1,))
+    for i in range(0, len(data), 23):
+        engine.feed(data[i : i + 23])
+    spectrum = engine.get_spectrum()
+    end = spectrum["samples"]
+    start = end - fs - 7 * fs // 2  # 8 segments with 50% overlap
+    _, psd = welch(data[start:end, :2], fs=fs, nperseg=fs, axis=0)
+    assert np.allclose(spectrum["psd"], psd)
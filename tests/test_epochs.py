@@ -0,0 +1,42 @@
+import numpy as np
+
+from eConEXG.utils.epochs import epochExtractor
+
+
+def stream(samples: int, events: dict) -> np.ndarray:
+    block = np.zeros((samples, 3))
+    block[:, 0] = np.arange(samples)
+    block[:, 1] = 5.0
+    for index, value in events.items():
+        block[index : index + 3, 2] = value  # trigger held for a few samples
+    return block
+
+
+def test_epochs_complete_across_blocks():
+    extractor = epochExtractor(pre=0.1, post=0.2, events=[1, 2])
+    extractor.bind(100, 3)
+    block = stream(1000, {5: 1, 100: 2, 300: 7, 500: 1, 995: 2})
+    extractor.feed(block[:105])
+    assert extractor.get_epochs() is None  # first event starts before acquisition
+    for start in range(105, 1000, 37):
+        extractor.feed(block[start : start + 37])
+    epochs = extractor.get_epochs()
+    assert epochs["events"].tolist() == [2, 1] and epochs["samples"].tolist() == [
+        100,
+        500,
+    ]
+    assert epochs["data"].shape == (2, 30, 2)
+    assert epochs["data"][:, 0, 0].tolist() == [90, 490]
+    assert epochs["times"][10] == 0
+    assert extractor.get_epochs() is None  # last event incomplete
+
+
+def test_epochs_baseline_and_large_blocks():
+    extractor = epochExtractor(pre=0.1, post=0.1, baseline=(None, 0))
+    extractor.bind(1000, 3)
+    extractor.feed(stream(5000, {1000 + i * 150: 1 + i % 3 for i in range(20)}))
+    epochs = extractor.get_epochs()
+    assert len(epochs["data"]) == 20
+    baseline = epochs["data"][:, :100].mean(axis=1)
+    assert np.allclose(baseline, 0)
+    assert np.allclose(epochs["data"][:, 100, 0], 50.5)
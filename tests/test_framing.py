@@ -0,0 +1,24 @@
+from eConEXG.utils.framing import frameSync
+
+
+def frame(seq: int) -> bytes:
+    body = bytes([seq, 0xBB, 0xAA, seq])  # false header in payload
+    return b"\xbb\xaa" + body + bytes([~sum(body) & 0xFF])
+
+
+def check(frame: bytes) -> bool:
+    return (~sum(frame[2:-1]) & 0xFF) == frame[-1]
+
+
+def test_resync_after_dropped_and_inserted_bytes():
+    stream = bytearray(b"".join(frame(i) for i in range(20)))
+    del stream[5 * 7 + 2]  # frame 5 shortened by one byte
+    stream[12 * 7 - 1 : 12 * 7 - 1] = b"\x00\xbb"  # junk in front of frame 12
+    sync = frameSync(b"\xbb\xaa", 7, check)
+    seqs, skipped = [], 0
+    for i in range(0, len(stream), 5):
+        sync.extend(stream[i : i + 5])
+        seqs += [int(f[2]) for f in sync.read() if check(bytes(f))]
+        skipped += sync.skipped
+    assert seqs == [i for i in range(20) if i != 5]
+    assert skipped == 2 and sync.locked and len(sync) == 0
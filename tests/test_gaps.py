@@ -0,0 +1,37 @@
+import numpy as np
+
+from eConEXG.iRecorder.data_parser import Parser
+from eConEXG.utils.gaps import fill_gaps, gap_runs, lost_frames
+
+
+def frame(seq: int, value: int, chs: int = 8) -> bytes:
+    body = value.to_bytes(3, "big", signed=True) * chs
+    return b"\xbb\xaa" + body + bytes([~sum(body) & 0xFF, 0, 100, seq])
+
+
+def test_lost_frames_wrap_around():
+    assert lost_frames([0, 3, 2], [255, 0, 3]).tolist() == [0, 2, 254]
+
+
+def test_fill_gaps_modes():
+    data = np.array([[10], [40]])
+    lost = np.array([0, 2])
+    assert fill_gaps(data, lost, "linear").ravel().tolist() == [10, 20, 30, 40]
+    assert fill_gaps(data, lost, "hold").ravel().tolist() == [10, 10, 10, 40]
+    assert np.isnan(fill_gaps(data, lost, "nan")[1:3]).all()
+    assert gap_runs(lost) == [(1, 2)] and gap_runs(lost, 5) == [(5, 10)]
+
+
+def test_parser_keeps_sample_count():
+    parser = Parser(8)
+    parser._update_fs(500)
+    parser._update_chs(list(range(8)))
+    parser.gap_fill = "linear"
+    seqs = [253, 254, 255, 2, 3]  # frames 0 and 1 lost across wraparound
+    stream = b"".join(frame(seq, i * 100) for i, seq in enumerate(seqs))
+    frames = parser.parse_data(stream)
+    assert len(frames) == len(seqs) + 2
+    assert parser.gaps == [(3, 2)]
+    values = [round(row[0] / parser._ratio) for row in frames]
+    assert values == [0, 100, 200, 233, 267, 300, 400]
+    assert [row[-1] for row in frames][3:5] == [0, 0]
@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = str(Path(__file__).parents[1].joinpath("src"))
+HEAVY = ["numpy", "usb", "ctypes", "pylsl", "pyedflib"]
+NAMES = [
+    "triggerBoxWired",
+    "triggerBoxWireless",
+    "lightStimulator",
+    "markerScheduler",
+    "iRecorder",
+    "iFocus",
+    "DFocus",
+    "eConAlpha",
+    "iSense",
+    "DeviceGroup",
+]
+
+
+def measure(name: str, repeat: int = 5) -> dict:
+    """Import `name` from eConEXG in fresh interpreters, return the best time and loaded heavy modules."""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"from eConEXG import {name}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = [m for m in {HEAVY!r} if m in sys.modules]\n"
+        "print(__import__('json').dumps({'elapsed': elapsed, 'heavy': heavy}))\n"
+    )
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC, env.get("PYTHONPATH")]))
+    results = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, env=env
+        )
+        if out.returncode:
+            return {"elapsed": None, "heavy": [], "error": out.stderr.splitlines()[-1]}
+        results.append(json.loads(out.stdout))
+    return min(results, key=lambda ret: ret["elapsed"])
+
+
+def test_trigger_box_import_is_light():
+    for name in ["triggerBoxWired", "triggerBoxWireless", "markerScheduler"]:
+        assert measure(name, repeat=1)["heavy"] == []
+
+
+if __name__ == "__main__":
+    for name in NAMES:
+        ret = measure(name)
+        if ret["elapsed"] is None:
+            print(f"{name:<20} failed: {ret['error']}")
+            continue
+        print(f"{name:<20}{ret['elapsed'] * 1000:8.2f} ms  heavy: {ret['heavy']}")
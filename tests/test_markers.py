@@ -0,0 +1,25 @@
+import pytest
+
+from eConEXG.utils.markers import markerLog
+
+
+def test_markers_resolve_to_sample_index():
+    # 10 samples per chunk at 100 Hz, first chunk arrives right after its last sample
+    log = markerLog(100)
+    log.mark("early", 0.5)  # before acquisition start
+    log.mark("b", 1.156)
+    log.mark("a", 1.0555)
+    log.mark("late", 1.252)
+    assert [m["label"] for m in log.update(10, 1.1)] == ["early", "a"]
+    assert log.model.offset == pytest.approx(1.0)
+    assert [(m["label"], m["index"]) for m in log.update(10, 1.2)] == [("b", 15)]
+    assert [(m["label"], m["index"]) for m in log.update(10, 1.3)] == [("late", 24)]
+    resolved = log.get()
+    assert [(m["label"], m["index"]) for m in resolved] == [
+        ("early", 0),
+        ("a", 5),
+        ("b", 15),
+        ("late", 24),
+    ]
+    assert resolved[1]["timestamp"] == 1.0555
+    assert log.get() == []
@@ -0,0 +1,48 @@
+import time
+from queue import Queue
+
+from eConEXG.iFocus.data_parser import Parser
+from eConEXG.utils.nested import nestedDispatcher
+
+
+def ifocus_frame(seq: int) -> bytes:
+    frame = b"\xbb\xaa" + bytes(range(15)) + b"\x00"
+    frame += bytes([sum(frame[2:]) & 0xFF, seq]) + b"\xdd\xcc"
+    return frame + bytes(6) + bytes([0, seq])
+
+
+class sink:
+    def __init__(self):
+        self.chunks, self.markers, self._data_position = [], [], 0
+
+    def write_chunk(self, chunk):
+        self.chunks.append(chunk)
+        self._data_position += sum(len(frame) - 1 for frame in chunk)
+
+    def push_chunk(self, chunk):
+        self.chunks.append(chunk)
+
+    def write_marker(self, index, label, duration=-1):
+        self.markers.append((index, label))
+
+    def push_marker(self, label, timestamp):
+        self.markers.append(label)
+
+
+def test_dispatcher_feeds_outputs_and_resolves_markers():
+    parser = Parser()
+    dispatch = nestedDispatcher("iFocus", parser, lambda: b"")
+    dispatch.queue = Queue()
+    dispatch.bdf, dispatch.lsl, dispatch.lsl_marker = sink(), sink(), sink()
+    dispatch.start(250, 1, {})
+    arrival = time.perf_counter()
+    dispatch.handle(b"".join(ifocus_frame(i) for i in range(10)), arrival)
+    dispatch.markers.mark("stim", arrival)
+    dispatch.handle(b"".join(ifocus_frame(i) for i in range(10, 20)), arrival + 0.2)
+    frames = dispatch.queue.get() + dispatch.queue.get()
+    assert len(frames) == 20 and len(frames[0]) == 6  # 5 EXG rows and an IMU row
+    assert sum(len(chunk) for chunk in dispatch.lsl.chunks) == 100
+    assert dispatch.bdf.markers[0][1] == "stim" and dispatch.lsl_marker.markers == [
+        "stim"
+    ]
+    assert dispatch.get_gaps() == []
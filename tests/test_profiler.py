@@ -0,0 +1,48 @@
+import threading
+
+from eConEXG.utils.profiler import stageProfiler
+
+
+def test_percentiles_within_bucket_resolution():
+    profiler = stageProfiler("test")
+    for ns in range(1, 100001):
+        profiler.add("parse", ns)
+    stats = profiler.get()["parse"]
+    assert stats["count"] == 100000 and stats["max"] == 1e-4
+    assert abs(stats["p50"] * 1e9 / 50000 - 1) < 0.125
+    assert abs(stats["p99"] * 1e9 / 99000 - 1) < 0.125
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = stageProfiler("test")
+    profiler.begin()
+    profiler.mark("recv")
+    assert profiler.get() == {}
+    profiler.enabled = True
+    profiler.begin()
+    profiler.mark("recv")
+    profiler.begin()
+    assert set(profiler.get()) == {"recv", "cycle"}
+    assert "recv" in profiler.report()
+
+
+def test_reset_while_recording():
+    profiler = stageProfiler("test")
+    profiler.enabled = True
+    done, errors = threading.Event(), []
+
+    def record():
+        try:
+            while not done.is_set():
+                profiler.begin()
+                profiler.mark("recv")
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=record)
+    thread.start()
+    for _ in range(20000):
+        profiler.reset()
+    done.set()
+    thread.join()
+    assert errors == []
@@ -0,0 +1,39 @@
+import pytest
+
+from eConEXG.utils.profiler import stageProfiler
+from eConEXG.utils.reader import socketReader
+
+
+def chunks(*items):
+    it = iter(items)
+
+    def recv():
+        item = next(it)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    return recv
+
+
+@pytest.mark.parametrize("threaded", [False, True])
+def test_reader_keeps_order_and_records_arrival(threaded):
+    profiler = stageProfiler("test")
+    profiler.enabled = True
+    reader = socketReader(
+        chunks(b"a", b"b", b"c", b""), "test", threaded, profiler=profiler
+    )
+    reader.start()
+    received = [reader.get()[0] for _ in range(4)]
+    reader.stop()
+    assert received == [b"a", b"b", b"c", b""]
+    assert profiler.get()["arrival"]["count"] == 3
+
+
+def test_threaded_reader_raises_in_loop_thread():
+    reader = socketReader(chunks(b"a", OSError("closed")), "test", threaded=True)
+    reader.start()
+    assert reader.get()[0] == b"a"
+    with pytest.raises(OSError):
+        reader.get()
+    reader.stop()
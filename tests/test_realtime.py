@@ -0,0 +1,23 @@
+import os
+import threading
+
+import pytest
+
+from eConEXG.utils import realtime
+
+
+@pytest.mark.skipif(not hasattr(os, "setpriority"), reason="POSIX only")
+def test_raise_priority_falls_back_to_thread_nice(monkeypatch):
+    def deny(*args):
+        raise PermissionError("SCHED_FIFO not permitted")
+
+    calls = []
+    monkeypatch.setattr(realtime, "system", lambda: "Linux")
+    monkeypatch.setattr(os, "sched_setscheduler", deny, raising=False)
+    monkeypatch.setattr(os, "setpriority", lambda *args: calls.append(args))
+    ret = []
+    thread = threading.Thread(target=lambda: ret.append(realtime.raise_priority(5)))
+    thread.start()
+    thread.join()
+    assert ret == ["nice"]
+    assert calls == [(os.PRIO_PROCESS, thread.native_id, -5)]
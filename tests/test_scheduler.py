@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from eConEXG.triggerBox import markerScheduler, triggerBoxWired, triggerBoxWireless
+
+
+class fakePort:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.written = []
+
+    def write(self, packet: bytes):
+        if self.fail:
+            raise OSError("device unplugged")
+        self.written.append((time.perf_counter(), packet))
+
+    def flush(self):
+        pass
+
+
+def box(cls, port: fakePort):
+    box = cls.__new__(cls)  # skip opening a serial port
+    box.dev = port
+    box._packets = {i: bytes([i]) for i in range(1, 256)}
+    return box
+
+
+def wait_results(scheduler, count: int) -> list[dict]:
+    results, deadline = [], time.perf_counter() + 5
+    while len(results) < count and time.perf_counter() < deadline:
+        results += scheduler.get_results()
+        time.sleep(0.005)
+    return results
+
+
+def test_scheduler_sends_in_deadline_order_and_reports_jitter():
+    port = fakePort()
+    scheduler = markerScheduler(box(triggerBoxWired, port))
+    assert not scheduler.is_alive()  # started by the first marker
+    now = time.perf_counter()
+    ids = {
+        m: scheduler.schedule(m, now + d) for m, d in ((3, 0.06), (1, 0.02), (2, 0.04))
+    }
+    results = wait_results(scheduler, 3)
+    scheduler.close()
+    assert [packet for _, packet in port.written] == [b"\x01", b"\x02", b"\x03"]
+    assert [r["id"] for r in results] == [ids[1], ids[2], ids[3]]
+    for result in results:
+        assert result["jitter"] == pytest.approx(result["sent"] - result["deadline"])
+        assert result["jitter"] >= 0
+    assert scheduler.get_jitter()["count"] == 3
+
+
+def test_scheduler_keeps_wireless_minimum_interval():
+    port = fakePort()
+    scheduler = markerScheduler(box(triggerBoxWireless, port))
+    now = time.perf_counter()
+    for marker in (1, 2, 3):
+        scheduler.schedule(marker, now)
+    results = wait_results(scheduler, 3)
+    scheduler.close()
+    sent = [t for t, _ in port.written]
+    assert len(results) == 3
+    assert min(b - a for a, b in zip(sent, sent[1:])) >= 0.04
+    assert results[-1]["jitter"] >= 0.08
+
+
+def test_scheduler_raises_write_error():
+    scheduler = markerScheduler(box(triggerBoxWired, fakePort(fail=True)))
+    scheduler.schedule(1)
+    scheduler.join(5)  # stopped by the failed write
+    with pytest.raises(OSError):
+        scheduler.get_results()
+    with pytest.raises(OSError):
+        scheduler.schedule(2)
+    scheduler.close()
@@ -1,4 +1,4 @@
-from eConEXG import iRecorder
+from eConEXG import iRecorder, spectralEngine
 import numpy as np
 import pyqtgraph as pg
 from PySide6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout
@@ -13,9 +13,8 @@ dev.set_frequency(fs)
 ret = dev.find_devs(duration=1)
 print(f"Devs: {ret}")
 dev.connect_device(ret[0])
-fftLen = fs * 1
-signal_scale = 1.0 / 2000
-signal = np.zeros(fftLen, dtype=float)
+# 1 second segments, a new spectrum every 20 ms
+dev.set_spectrum(spectralEngine(segment=1, overlap=0.98, average=1))
 
 app = QApplication()
 app.quitOnLastWindowClosed()
@@ -47,18 +46,14 @@ dev.start_acquisition_data()
 
 
 def update_data():
-    global signal, dev
-    newdata = dev.get_data()
-    if (len(newdata) > 0) and (len(newdata) < len(signal)):
-        newdata = np.array(newdata)[:, 0]
-        signal = np.roll(signal, -len(newdata))
-        signal[-len(newdata) :] = newdata
+    dev.get_data()
 
 
 def update_plot():
-    global signal, fs
-    fftspec = np.fft.fft(signal)
-    specItem.plot(abs(fftspec[: int(fs / 2)] * signal_scale), clear=True)
+    spectrum = dev.get_spectrum()
+    if spectrum is None:
+        return
+    specItem.plot(spectrum["freqs"], np.sqrt(spectrum["psd"][:, 0]), clear=True)
 
 
 timer = QTimer()
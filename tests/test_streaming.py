@@ -0,0 +1,95 @@
+import base64
+import socket
+import time
+
+import numpy as np
+
+from eConEXG.utils.streaming import (
+    HEADER,
+    KIND_DATA,
+    KIND_INFO,
+    decode_message,
+    message_size,
+    streamServer,
+)
+
+
+def read_message(conn: socket.socket) -> bytes:
+    message = b""
+    while len(message) < HEADER.size or len(message) < message_size(message):
+        message += conn.recv(
+            message_size(message) - len(message) if message else HEADER.size
+        )
+    return message
+
+
+def wait_clients(server: streamServer, n: int):
+    deadline = time.time() + 5
+    while server.clients < n and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_tcp_clients_receive_same_blocks():
+    server = streamServer(0)
+    server.start()
+    try:
+        server.set_info({"fs": 500})
+        conns = [socket.create_connection(("127.0.0.1", server.port)) for _ in range(3)]
+        wait_clients(server, 3)
+        server.publish(np.arange(6, dtype=np.int32).reshape(3, 2))
+        server.publish([[0.5, 1.5]])
+        for conn in conns:
+            kind, _, _, info = decode_message(read_message(conn))
+            assert kind == KIND_INFO and info == {"fs": 500}
+            kind, _, index, data = decode_message(read_message(conn))
+            assert kind == KIND_DATA and index == 0 and data.dtype == np.int32
+            assert data.tolist() == [[0, 1], [2, 3], [4, 5]]
+            _, _, index, data = decode_message(read_message(conn))
+            assert index == 3 and data.tolist() == [[0.5, 1.5]]
+            conn.close()
+    finally:
+        server.close()
+
+
+def test_websocket_handshake_and_binary_frame():
+    server = streamServer(0, protocol="websocket")
+    server.start()
+    try:
+        conn = socket.create_connection(("127.0.0.1", server.port))
+        key = base64.b64encode(b"0123456789abcdef").decode()
+        conn.sendall(
+            f"GET / HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode()
+        )
+        response = b""
+        while b"\r\n\r\n" not in response:
+            response += conn.recv(1024)
+        assert response.startswith(b"HTTP/1.1 101")
+        assert b"Sec-WebSocket-Accept: " in response
+        frame = response.split(b"\r\n\r\n", 1)[1]
+        while len(frame) < 2 or len(frame) < 2 + frame[1]:
+            frame += conn.recv(1024)
+        assert frame[0] == 0x82
+        assert decode_message(frame[2 : 2 + frame[1]])[0] == KIND_INFO
+        conn.close()
+    finally:
+        server.close()
+
+
+def test_slow_client_drops_oldest():
+    server = streamServer(0, max_pending=2)
+    server.start()
+    try:
+        conn = socket.create_connection(("127.0.0.1", server.port))
+        conn.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        wait_clients(server, 1)
+        block = np.zeros((4096, 8), dtype=np.float32)
+        for _ in range(200):
+            server.publish(block)
+        deadline = time.time() + 5
+        while not server.dropped and time.time() < deadline:
+            time.sleep(0.01)
+        assert server.dropped > 0 and server.clients == 1
+        conn.close()
+    finally:
+        server.close()
@@ -0,0 +1,67 @@
+import threading
+
+import numpy as np
+import pytest
+
+from eConEXG.utils.subscriber import blockSubscriber
+
+
+def test_subscriber_delivers_fixed_size_blocks():
+    blocks = []
+    subscriber = blockSubscriber(blocks.append, block_size=4, dtype=np.float32)
+    subscriber.start()
+    rows = np.arange(24.0).reshape(12, 2)
+    for chunk in np.split(rows[:11], [3, 5, 10]):  # uneven chunks, one row left over
+        subscriber.feed(chunk.tolist())
+    subscriber.close()
+    assert [block.shape for block in blocks] == [(4, 2), (4, 2)]
+    assert blocks[0].dtype == np.float32
+    assert np.array_equal(np.concatenate(blocks), rows[:8])
+
+
+def test_subscriber_blocks_do_not_share_fed_rows():
+    blocks = []
+    subscriber = blockSubscriber(blocks.append, block_size=2, dtype=np.int32)
+    subscriber.start()
+    rows = np.arange(4, dtype=np.int32).reshape(2, 2)
+    subscriber.feed(rows)
+    rows[:] = -1  # e.g. written by a get_data() consumer
+    subscriber.close()
+    assert blocks[0].tolist() == [[0, 1], [2, 3]]
+
+
+@pytest.mark.parametrize(
+    "policy, delivered, dropped",
+    [
+        ("block", [2, 2, 2, 2, 2], 0),
+        ("drop_oldest", [2, 2, 2], 2),
+        ("coalesce", [2, 4], 2),
+    ],
+)
+def test_subscriber_policies_with_slow_callback(policy, delivered, dropped):
+    busy, release, blocks = threading.Event(), threading.Event(), []
+
+    def callback(block):
+        busy.set()
+        release.wait(5)
+        blocks.append(block)
+
+    subscriber = blockSubscriber(callback, 2, policy=policy, max_pending=2)
+    subscriber.start()
+    subscriber.feed(np.arange(2).reshape(2, 1))
+    assert busy.wait(5)  # first block held by the callback
+    feeder = threading.Thread(target=subscriber.feed, args=(np.arange(2, 10)[:, None],))
+    feeder.start()
+    feeder.join(0.2)
+    assert feeder.is_alive() == (policy == "block")
+    release.set()
+    feeder.join()
+    subscriber.close()
+    assert [len(block) for block in blocks] == delivered
+    assert subscriber.dropped == dropped
+    assert np.concatenate(blocks)[-4:, 0].tolist() == [6, 7, 8, 9]
+
+
+def test_subscriber_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        blockSubscriber(print, policy="newest")
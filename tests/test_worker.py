@@ -0,0 +1,59 @@
+import time
+
+import numpy as np
+import pytest
+
+from eConEXG.utils.capture import captureWriter
+from eConEXG.utils.worker import processDevice, sharedRing
+
+
+def test_shared_ring_wraps_and_drops_oldest():
+    ring = sharedRing(None, columns=2, capacity=4)
+    reader = sharedRing(ring.name)
+    assert (reader.capacity, reader.columns) == (4, 2)
+    ring.write(np.arange(6.0).reshape(3, 2))
+    rows, pos = reader.read(0)
+    assert rows[:, 0].tolist() == [0, 2, 4] and pos == 3
+    ring.write(np.arange(6.0, 16.0).reshape(5, 2))  # wraps, one row unread is lost
+    rows, pos = reader.read(pos)
+    assert rows[:, 0].tolist() == [8, 10, 12, 14] and pos == 8
+    assert reader.dropped == 1
+    reader.close()
+    ring.close(unlink=True)
+
+
+def ifocus_capture(filename: str, frames: int = 500):
+    start = time.perf_counter()
+    writer = captureWriter(filename, {"type": "iFocus"})
+    for i in range(0, frames, 10):
+        chunk = b""
+        for seq in range(i, i + 10):
+            frame = b"\xbb\xaa" + bytes(range(15)) + b"\x00"
+            frame += bytes([sum(frame[2:]) & 0xFF, seq % 256]) + b"\xdd\xcc"
+            chunk += frame + bytes(6) + bytes([0, seq % 256])
+        writer.write(chunk, start + i / 500)  # 500 frames per second
+    writer.close()
+
+
+def test_process_device_replays_and_forwards_errors(tmp_path):
+    filename = str(tmp_path / "ifocus.ecx")
+    ifocus_capture(filename)
+    dev = processDevice("iFocus", f"replay:{filename}")
+    try:
+        with pytest.raises(ValueError):
+            dev.set_frequency(123)  # raised in the child
+        assert dev.get_dev_info()["type"] == "iFocus"
+        dev.start_acquisition_data()
+        exg = imu = 0
+        with pytest.raises(Exception, match="timeout"):  # replay ended
+            for _ in range(1000):
+                data = dev.get_data(timeout=0.1)
+                if len(data):
+                    assert data[0].shape[1] == 1 and data[1].shape[1] == 3
+                    exg, imu = exg + len(data[0]), imu + len(data[1])
+        # chunks read right before the error may be discarded, as for a dropped connection
+        assert exg == 5 * imu and 450 <= imu <= 500
+    finally:
+        dev.close_dev()
+    with pytest.raises(Exception, match="closed"):
+        dev.get_dev_info()